@@ -3,8 +3,8 @@ from loguru import logger
 from ..database.db import DatabaseManager, ReputationEntry
 
 class ReputationDBManager:
-    def __init__(self, database_url: str):
-        self.db_manager = DatabaseManager(database_url)
+    def __init__(self, database_url: str, db_manager: DatabaseManager = None):
+        self.db_manager = db_manager or DatabaseManager(database_url)
 
     async def connect(self):
         await self.db_manager.connect()
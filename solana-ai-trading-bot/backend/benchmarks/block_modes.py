@@ -0,0 +1,208 @@
+"""
+Benchmark des modes getBlock : "full" (transactions JSON, décodées par le chemin d'origine,
+sans préfiltre) contre "lean" (transactions base64 + préfiltre sur les programmes surveillés).
+La ligne "full+pf" décode les blocs JSON avec le décodeur actuel (préfiltre sur les clés).
+
+Mesure, par slot, les octets reçus et le temps CPU de décodage (json.loads + extraction des
+enregistrements). Sans argument les blocs sont synthétiques ; avec --rpc-url les derniers
+blocs confirmés sont récupérés dans les deux encodages.
+
+    python -m backend.benchmarks.block_modes --slots 20 --txs 1500
+    python -m backend.benchmarks.block_modes --rpc-url https://api.mainnet-beta.solana.com --slots 5
+"""
+import argparse
+import base64
+import gc
+import json
+import os
+import random
+import time
+from typing import Any, Callable, Dict, List, Tuple
+import base58
+import httpx
+from ..blockchain.block_decoder import (
+    DEX_PROGRAMS, SPL_INITIALIZE_MINT, SPL_INITIALIZE_MINT2, SPL_TRANSFER, SPL_TRANSFER_CHECKED, TOKEN_PROGRAM_ID,
+    RAYDIUM_AMM_PROGRAM_ID, _decode_data, extract_records,
+)
+from ..blockchain.block_fetcher import DEFAULT_BLOCK_PARAMS, LEAN_BLOCK_PARAMS
+
+VOTE_PROGRAM_ID = "Vote111111111111111111111111111111111111111"
+SYSTEM_PROGRAM_ID = "11111111111111111111111111111111"
+
+
+def _shortvec(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _synthetic_transaction(rng: random.Random) -> Tuple[dict, dict]:
+    """Une transaction dans les deux encodages ; ~10 % touchent le programme Token ou Raydium."""
+    roll = rng.random()
+    program = TOKEN_PROGRAM_ID if roll < 0.07 else RAYDIUM_AMM_PROGRAM_ID if roll < 0.1 else \
+        SYSTEM_PROGRAM_ID if roll < 0.3 else VOTE_PROGRAM_ID
+    keys = [os.urandom(32) for _ in range(rng.randint(3, 12))] + [base58.b58decode(program)]
+    signature = os.urandom(64)
+    if program == TOKEN_PROGRAM_ID and rng.random() < 0.3:
+        data = bytes([0, 6]) + os.urandom(65)  # initializeMint
+    else:
+        data = bytes([3]) + rng.randrange(1 << 40).to_bytes(8, "little")
+    accounts = list(range(min(3, len(keys) - 1)))
+    wire = _shortvec(1) + signature + bytes([1, 0, 1]) + _shortvec(len(keys)) + b"".join(keys) \
+        + os.urandom(32) + _shortvec(1) + bytes([len(keys) - 1]) + _shortvec(len(accounts)) \
+        + bytes(accounts) + _shortvec(len(data)) + data
+    meta = {
+        "err": None, "fee": 5000, "status": {"Ok": None},
+        "preBalances": [rng.randrange(10 ** 10) for _ in keys], "postBalances": [rng.randrange(10 ** 10) for _ in keys],
+        "innerInstructions": [], "preTokenBalances": [], "postTokenBalances": [],
+        "logMessages": [f"Program {program} invoke [1]", f"Program {program} success"],
+        "loadedAddresses": {"writable": [], "readonly": []}, "computeUnitsConsumed": 2100,
+    }
+    key_strings = [base58.b58encode(key).decode() for key in keys]
+    full = {"meta": meta, "version": "legacy", "transaction": {
+        "signatures": [base58.b58encode(signature).decode()],
+        "message": {
+            "header": {"numRequiredSignatures": 1, "numReadonlySignedAccounts": 0, "numReadonlyUnsignedAccounts": 1},
+            "accountKeys": key_strings, "recentBlockhash": base58.b58encode(os.urandom(32)).decode(),
+            "instructions": [{"programIdIndex": len(keys) - 1, "accounts": accounts,
+                              "data": base58.b58encode(data).decode(), "stackHeight": None}],
+        },
+    }}
+    lean = {"meta": meta, "version": "legacy", "transaction": [base64.b64encode(wire).decode(), "base64"]}
+    return full, lean
+
+
+def synthetic_responses(slots: int, txs: int, seed: int = 7) -> Dict[str, List[bytes]]:
+    rng = random.Random(seed)
+    responses = {"full": [], "lean": []}
+    for slot in range(slots):
+        pairs = [_synthetic_transaction(rng) for _ in range(txs)]
+        for mode, index in (("full", 0), ("lean", 1)):
+            block = {"blockhash": "x", "parentSlot": slot - 1, "transactions": [pair[index] for pair in pairs]}
+            responses[mode].append(json.dumps({"jsonrpc": "2.0", "id": 1, "result": block}).encode())
+    return responses
+
+
+def rpc_responses(rpc_url: str, slots: int) -> Dict[str, List[bytes]]:
+    responses = {"full": [], "lean": []}
+    with httpx.Client(timeout=30) as client:
+        head = client.post(rpc_url, json={"jsonrpc": "2.0", "id": 1, "method": "getSlot",
+                                          "params": [{"commitment": "confirmed"}]}).json()["result"]
+        slot = head - 1
+        while len(responses["full"]) < slots:
+            slot -= 1
+            batch = {}
+            for mode, params in (("full", DEFAULT_BLOCK_PARAMS), ("lean", LEAN_BLOCK_PARAMS)):
+                response = client.post(rpc_url, json={"jsonrpc": "2.0", "id": 1, "method": "getBlock",
+                                                      "params": [slot, params]})
+                batch[mode] = response.content
+            if b'"result":null' in batch["full"] or b'"error"' in batch["full"]:
+                continue  # slot sauté
+            for mode, raw in batch.items():
+                responses[mode].append(raw)
+    return responses
+
+
+def baseline_records(block: Dict[str, Any], slot: int) -> List[Dict[str, Any]]:
+    """Chemin de décodage d'origine : toutes les instructions de toutes les transactions, clés en liste."""
+    records = []
+    for tx in block.get("transactions") or []:
+        if (tx.get("meta") or {}).get("err"):
+            continue
+        message = tx["transaction"]["message"]
+        loaded = (tx.get("meta") or {}).get("loadedAddresses") or {}
+        keys = [k["pubkey"] if isinstance(k, dict) else k for k in message.get("accountKeys", [])] \
+            + loaded.get("writable", []) + loaded.get("readonly", [])
+        signature = (tx["transaction"].get("signatures") or [None])[0]
+        fee_payer = keys[0] if keys else None
+        instructions = list(message.get("instructions", []))
+        for inner in (tx.get("meta") or {}).get("innerInstructions") or []:
+            instructions += inner.get("instructions", [])
+        for instr in instructions:
+            program_id = instr.get("programId")
+            if program_id is None and "programIdIndex" in instr:
+                program_id = keys[instr["programIdIndex"]]
+            if program_id != TOKEN_PROGRAM_ID and program_id not in DEX_PROGRAMS:
+                continue
+            accounts = [keys[i] if isinstance(i, int) else i for i in instr.get("accounts", [])]
+            if program_id in DEX_PROGRAMS:
+                records.append({"type": "swap", "program": DEX_PROGRAMS[program_id], "accounts": accounts,
+                                "slot": slot, "signature": signature, "signer": fee_payer})
+                continue
+            try:
+                data = _decode_data(instr.get("data"))
+            except ValueError:
+                continue
+            if not data or not accounts:
+                continue
+            if data[0] in (SPL_INITIALIZE_MINT, SPL_INITIALIZE_MINT2):
+                records.append({"type": "mint_init", "mint": accounts[0], "creator": fee_payer,
+                                "slot": slot, "signature": signature})
+            elif data[0] in (SPL_TRANSFER, SPL_TRANSFER_CHECKED) and len(data) >= 9:
+                destination_index = 2 if data[0] == SPL_TRANSFER_CHECKED else 1
+                if len(accounts) <= destination_index:
+                    continue
+                records.append({"type": "transfer", "source": accounts[0], "destination": accounts[destination_index],
+                                "mint": accounts[1] if data[0] == SPL_TRANSFER_CHECKED else None,
+                                "amount": int.from_bytes(data[1:9], "little"), "slot": slot, "signature": signature})
+    return records
+
+
+def measure(raw_blocks: List[bytes], extract: Callable = extract_records) -> Tuple[float, float, int]:
+    """
+    Retourne (octets moyens par slot, CPU moyen par slot en ms, enregistrements) pour une passe.
+    Le ramasse-miettes est coupé pendant la passe, comme avec timeit.
+    """
+    records = 0
+    gc.collect()
+    gc.disable()
+    try:
+        start = time.process_time()
+        for slot, raw in enumerate(raw_blocks):
+            block = json.loads(raw)["result"]
+            records += len(extract(block, slot))
+        cpu_ms = (time.process_time() - start) * 1000 / len(raw_blocks)
+    finally:
+        gc.enable()
+    return sum(len(raw) for raw in raw_blocks) / len(raw_blocks), cpu_ms, records
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rpc-url", help="endpoint RPC réel (sinon blocs synthétiques)")
+    parser.add_argument("--slots", type=int, default=20)
+    parser.add_argument("--txs", type=int, default=1500, help="transactions par bloc synthétique")
+    parser.add_argument("--repeat", type=int, default=5, help="passes par mode, la meilleure est retenue")
+    args = parser.parse_args()
+
+    if args.rpc_url:
+        responses = rpc_responses(args.rpc_url, args.slots)
+    else:
+        responses = synthetic_responses(args.slots, args.txs)
+    modes = {
+        "full": (responses["full"], baseline_records),
+        "full+pf": (responses["full"], extract_records),
+        "lean": (responses["lean"], extract_records),
+    }
+    # Passes entrelacées, meilleure passe retenue par mode : la dérive de la machine touche tous les modes
+    results = {}
+    for _ in range(args.repeat):
+        for mode, (raw_blocks, extract) in modes.items():
+            result = measure(raw_blocks, extract)
+            if mode not in results or result[1] < results[mode][1]:
+                results[mode] = result
+    print(f"{'mode':<8} {'Ko/slot':>10} {'CPU ms/slot':>12} {'enregistrements':>16}")
+    for mode, (size, cpu_ms, records) in results.items():
+        print(f"{mode:<8} {size / 1024:>10.1f} {cpu_ms:>12.2f} {records:>16}")
+    full, lean = results["full"], results["lean"]
+    print(f"lean / full : octets x{lean[0] / full[0]:.2f}, CPU x{lean[1] / full[1]:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark des clés de BlockchainCache.
+
+Compare l'ancienne clé `f"{nom}_{str(args)}_{str(kwargs)}"` (instance comprise dans args) à
+CacheKey (tuple normalisé) :
+- coût de génération de la clé, par style d'appel (position, nom, config RPC en dict) ;
+- coût d'une lecture en cache réussie (clé + get_or_load) ;
+- taux de hit et entrées stockées sur une charge mêlant les styles d'appel et deux analyseurs
+  partageant un cache.
+
+    python -m backend.benchmarks.cache_keys --iterations 200000
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import Any, Callable, Dict, List, Tuple
+from ..blockchain.block_decoder import b58encode
+from ..blockchain.cache_manager import BlockchainCache, CacheKey
+
+
+class Analyzer:
+    """Méthode typique : mint, commitment et config RPC."""
+
+    def __init__(self, rpc_url: str):
+        self.rpc_url = rpc_url
+
+    async def get_info(self, mint_address: str, commitment: str = "confirmed", config: Dict[str, Any] = None):
+        return {"mint": mint_address}
+
+
+def legacy_key(func_name: str, args: tuple, kwargs: dict) -> str:
+    return f"{func_name}_{str(args)}_{str(kwargs)}"
+
+
+def _calls(rng: random.Random, analyzers: List[Analyzer], mints: List[str], count: int) -> List[Tuple[tuple, dict]]:
+    """(args avec instance, kwargs) : mêmes requêtes écrites de façons équivalentes."""
+    calls = []
+    for _ in range(count):
+        analyzer, mint = rng.choice(analyzers), rng.choice(mints)
+        style = rng.randrange(3)
+        if style == 0:
+            calls.append(((analyzer, mint), {}))
+        elif style == 1:
+            calls.append(((analyzer,), {"mint_address": mint, "commitment": "confirmed"}))
+        else:
+            calls.append(((analyzer, mint, "confirmed"), {"config": {"encoding": "jsonParsed"}}))
+    return calls
+
+
+def measure_keys(make_key: Callable[[tuple, dict], Any], calls: List[Tuple[tuple, dict]], repeat: int = 3) -> float:
+    """ns par clé, meilleur de `repeat` passages."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for args, kwargs in calls:
+            make_key(args, kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best / len(calls) * 1e9
+
+
+async def measure_hits(make_key: Callable[[tuple, dict], Any],
+                       calls: List[Tuple[tuple, dict]]) -> Tuple[float, float, int]:
+    cache = BlockchainCache(maxsize=len(calls), ttl=3600, name="bench")
+
+    async def loader():
+        return None
+
+    start = time.perf_counter()
+    for args, kwargs in calls:
+        await cache.get_or_load(make_key(args, kwargs), loader)
+    elapsed = (time.perf_counter() - start) / len(calls) * 1e9
+    BlockchainCache._instances.remove(cache)
+    return elapsed, cache.hits / len(calls), len(cache.cache)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=200000)
+    parser.add_argument("--mints", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    analyzers = [Analyzer("https://api.mainnet-beta.solana.com"), Analyzer("https://api.mainnet-beta.solana.com")]
+    mints = [b58encode(bytes(rng.getrandbits(8) for _ in range(32))) for _ in range(args.mints)]
+    calls = _calls(rng, analyzers, mints, args.iterations)
+    key = CacheKey(Analyzer.get_info, bound=True)
+    schemes = (
+        ("f-string", lambda call_args, kwargs: legacy_key("get_info", call_args, kwargs)),
+        ("CacheKey", lambda call_args, kwargs: key(call_args[1:], kwargs)),
+    )
+
+    print(f"{args.iterations} appels, {args.mints} mints, 3 styles d'appel, 2 instances")
+    print(f"{'clé':<10} {'ns/clé (pos.)':>14} {'ns/clé (mix)':>13} {'ns/lecture':>11} {'hit rate':>9} {'entrées':>8}")
+    positional = [(call_args[:2], {}) for call_args, _ in calls]
+    for name, make_key in schemes:
+        per_positional = measure_keys(make_key, positional)
+        per_mix = measure_keys(make_key, calls)
+        per_read, hit_rate, entries = asyncio.run(measure_hits(make_key, calls))
+        print(f"{name:<10} {per_positional:>14,.0f} {per_mix:>13,.0f} {per_read:>11,.0f} {hit_rate:>9.1%} {entries:>8}")
+    # Plafond : un hit par requête distincte (mint, commitment, config)
+    distinct = len({key(call_args[1:], kwargs) for call_args, kwargs in calls})
+    print(f"hit rate maximal : {1 - distinct / len(calls):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark du classement des lignes de log des notifications logsSubscribe.
+
+Compare, en lignes par seconde sur des notifications synthétiques :
+- "substring" : le test historique du listener (`"initializeMint" in ligne` puis recherche d'adresse) ;
+- "multi-substring" : la même couverture que le matcher avec un test `in` par motif et par ligne ;
+- "matcher" : `classify_logs`, une expression compilée appliquée en une passe à la notification.
+
+    python -m backend.benchmarks.log_matcher --notifications 20000
+"""
+import argparse
+import base64
+import os
+import random
+import time
+from typing import Callable, List
+from ..blockchain.block_decoder import RAYDIUM_AMM_PROGRAM_ID, TOKEN_PROGRAM_ID
+from ..blockchain.log_matcher import (
+    BASE58_ADDRESS_RE, KNOWN_PROGRAMS, PUMP_CREATE_EVENT, PUMP_FUN_PROGRAM_ID, classify_logs
+)
+
+SYSTEM_PROGRAM_ID = "11111111111111111111111111111111"
+COMPUTE_BUDGET_ID = "ComputeBudget111111111111111111111111111111"
+
+
+def _string(value: str) -> bytes:
+    raw = value.encode()
+    return len(raw).to_bytes(4, "little") + raw
+
+
+def _invocation(program: str, body: List[str], depth: int = 1) -> List[str]:
+    return [f"Program {program} invoke [{depth}]", *body,
+            f"Program {program} consumed {random.randint(1000, 60000)} of 200000 compute units",
+            f"Program {program} success"]
+
+
+def synthetic_notification(rng: random.Random) -> List[str]:
+    """Logs d'une transaction : surtout des transferts et swaps, quelques mints, pools et lancements pump.fun."""
+    logs = _invocation(COMPUTE_BUDGET_ID, [])
+    roll = rng.random()
+    if roll < 0.02:
+        event = PUMP_CREATE_EVENT + _string("Moon") + _string("MOON") + _string("https://x/y.json") + os.urandom(96)
+        logs += _invocation(PUMP_FUN_PROGRAM_ID, [
+            "Program log: Instruction: Create",
+            *_invocation(TOKEN_PROGRAM_ID, ["Program log: Instruction: InitializeMint2"], depth=2),
+            f"Program data: {base64.b64encode(event).decode()}",
+        ])
+    elif roll < 0.04:
+        logs += _invocation(TOKEN_PROGRAM_ID, ["Program log: Instruction: InitializeMint"])
+    elif roll < 0.05:
+        logs += _invocation(RAYDIUM_AMM_PROGRAM_ID, [
+            "Program log: initialize2: InitializeInstruction2 { nonce: 254, open_time: 0, "
+            "init_pc_amount: 79000000000, init_coin_amount: 206900000000000 }",
+        ])
+    elif roll < 0.5:
+        logs += _invocation(RAYDIUM_AMM_PROGRAM_ID, [
+            f"Program log: ray_log: {base64.b64encode(os.urandom(57)).decode()}",
+            *_invocation(TOKEN_PROGRAM_ID, ["Program log: Instruction: Transfer"], depth=2),
+            *_invocation(TOKEN_PROGRAM_ID, ["Program log: Instruction: Transfer"], depth=2),
+        ])
+    else:
+        logs += _invocation(TOKEN_PROGRAM_ID, ["Program log: Instruction: TransferChecked"])
+        logs += _invocation(SYSTEM_PROGRAM_ID, [])
+    return logs
+
+
+def substring(logs: List[str]) -> int:
+    found = 0
+    for line in logs:
+        if "initializeMint" not in line:
+            continue
+        [address for address in BASE58_ADDRESS_RE.findall(line) if address not in KNOWN_PROGRAMS]
+        found += 1
+    return found
+
+
+def multi_substring(logs: List[str]) -> int:
+    found = 0
+    stack = []
+    for line in logs:
+        if " invoke [" in line:
+            stack.append(line.split(" ", 2)[1])
+        elif line.endswith(" success") or " failed" in line:
+            if stack:
+                stack.pop()
+        elif "InitializeMint" in line or "initializeMint" in line:
+            [address for address in BASE58_ADDRESS_RE.findall(line) if address not in KNOWN_PROGRAMS]
+            found += 1
+        elif "initialize2: InitializeInstruction2" in line:
+            found += 1
+        elif line.startswith("Program data: ") and stack and stack[-1] == PUMP_FUN_PROGRAM_ID:
+            if base64.b64decode(line[14:])[:8] == PUMP_CREATE_EVENT:
+                found += 1
+    return found
+
+
+def matcher(logs: List[str]) -> int:
+    return len(classify_logs(logs))
+
+
+def measure(classify: Callable[[List[str]], int], notifications: List[List[str]]):
+    events = 0
+    start = time.perf_counter()
+    for logs in notifications:
+        events += classify(logs)
+    return time.perf_counter() - start, events
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notifications", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    notifications = [synthetic_notification(rng) for _ in range(args.notifications)]
+    lines = sum(len(logs) for logs in notifications)
+    print(f"{len(notifications)} notifications, {lines} lignes")
+    print(f"{'méthode':<16} {'lignes/s':>12} {'événements':>11}")
+    for name, classify in (("substring", substring), ("multi-substring", multi_substring), ("matcher", matcher)):
+        elapsed, events = measure(classify, notifications)
+        print(f"{name:<16} {lines / elapsed:>12,.0f} {events:>11}")
+    # Contrôle : noms de mint extraits du CreateEvent
+    sample = next(logs for logs in notifications if any(PUMP_FUN_PROGRAM_ID in line for line in logs))
+    print("exemple pump_create :", [event for event in classify_logs(sample) if event["type"] == "pump_create"][0]["mint"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Latence événement -> décision et débit du pipeline WebSocketListener, hors ligne et déterministe.
+
+Rejoue un enregistrement (TRAFFIC_RECORD_PATH) ou une rafale de lancements synthétique via
+ReplayServer ; le module de décision est remplacé par une sonde qui note l'instant où chaque
+mint lui parvient. La latence mesurée va de l'envoi de la trame par le serveur à l'appel de
+process_new_token_candidate (classement des logs, files, getTokenSupply rejoué compris).
+
+    python -m backend.benchmarks.pipeline_replay --synthetic 2000 --rate 500 --speed 1
+    python -m backend.benchmarks.pipeline_replay --file data/traffic.rec --speed 10
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import tempfile
+import time
+from typing import Dict, Optional
+from ..blockchain.block_decoder import b58encode, TOKEN_PROGRAM_ID
+from ..blockchain.rpc_client import close_rpc_clients
+from ..blockchain.log_matcher import PUMP_CREATE_EVENT, PUMP_FUN_PROGRAM_ID, classify_logs
+from ..config.settings import settings
+from ..utils.metrics import LatencyHistogram
+from ..utils.traffic_recorder import KIND_RPC, KIND_WS_FRAME, RECORD_HEADER
+from .replay_server import ReplayServer
+
+
+def _string(value: str) -> bytes:
+    raw = value.encode()
+    return len(raw).to_bytes(4, "little") + raw
+
+
+def write_synthetic_storm(path: str, launches: int, rate: float, seed: int = 7):
+    """Enregistrement d'une rafale de lancements pump.fun : notifications + réponses getTokenSupply."""
+    rng = random.Random(seed)
+    with open(path, "wb") as f:
+        def write(kind: int, timestamp: float, payload: bytes):
+            f.write(RECORD_HEADER.pack(kind, timestamp, len(payload)))
+            f.write(payload)
+
+        for subscription in range(3):
+            write(KIND_WS_FRAME, 0.0, json.dumps({"jsonrpc": "2.0", "result": subscription, "id": subscription + 1}).encode())
+        timestamp = 0.0
+        for index in range(launches):
+            timestamp += rng.expovariate(rate)
+            keys = bytes(rng.getrandbits(8) for _ in range(96))
+            event = PUMP_CREATE_EVENT + _string(f"Token{index}") + _string("TKN") + _string("https://x/y.json") + keys
+            logs = [
+                f"Program {PUMP_FUN_PROGRAM_ID} invoke [1]",
+                "Program log: Instruction: Create",
+                f"Program {TOKEN_PROGRAM_ID} invoke [2]",
+                "Program log: Instruction: InitializeMint2",
+                f"Program {TOKEN_PROGRAM_ID} success",
+                f"Program data: {base64.b64encode(event).decode()}",
+                f"Program {PUMP_FUN_PROGRAM_ID} success",
+            ]
+            signature = b58encode(bytes(rng.getrandbits(8) for _ in range(64)))
+            write(KIND_WS_FRAME, timestamp, json.dumps({"jsonrpc": "2.0", "method": "logsNotification", "params": {
+                "result": {"context": {"slot": 300_000_000 + index // 4},
+                           "value": {"signature": signature, "err": None, "logs": logs}},
+                "subscription": 0,
+            }}).encode())
+            mint = b58encode(keys[:32])
+            request = json.dumps({"method": "getTokenSupply", "params": [mint], "latency_ms": rng.uniform(20, 60)},
+                                 sort_keys=True, separators=(",", ":"))
+            response = json.dumps({"jsonrpc": "2.0", "result": {
+                "context": {"slot": 300_000_000}, "value": {"amount": "1000000000000000", "decimals": 6,
+                                                           "uiAmount": 1e9, "uiAmountString": "1000000000"}}, "id": 1})
+            write(KIND_RPC, timestamp, request.encode() + b"\n" + response.encode())
+
+
+class DecisionProbe:
+    """Remplace le module de décision : note l'instant de la première décision par mint."""
+
+    def __init__(self):
+        self.ia_hooks = []
+        self.decided: Dict[str, float] = {}
+
+    async def process_new_token_candidate(self, token_mint_address: str, current_price: float, confirmation=None):
+        self.decided.setdefault(token_mint_address, time.monotonic())
+
+
+def _frame_mint(text: str) -> Optional[str]:
+    value = json.loads(text)["params"]["result"]["value"]
+    return next((event["mint"] for event in classify_logs(value.get("logs") or []) if event.get("mint")), None)
+
+
+async def run(path: str, speed: float, timeout: float):
+    # Pas de porte de commitment (ses getSignatureStatuses n'ont pas de réponse enregistrée)
+    # ni d'index des mints persisté entre deux rejeux
+    settings.WS_SUBSCRIBE_COMMITMENT = settings.BUY_COMMITMENT
+    settings.MINT_DEDUP_PATH = ""
+    from ..blockchain.websocket_listener import WebSocketListener
+
+    server = ReplayServer(path, speed)
+    await server.start()
+    probe = DecisionProbe()
+    listener = WebSocketListener(server.ws_url, "sqlite://", server.rpc_url)
+    await listener.start_listening(probe)
+    deadline = time.monotonic() + timeout
+    queues = (listener.mint_queue, listener.registration_queue)
+    while time.monotonic() < deadline and (not server.done or any(len(q) or q.in_progress for q in queues)):
+        await asyncio.sleep(0.05)
+    await asyncio.sleep(0.2)
+    await listener.stop_listening()
+    await close_rpc_clients()
+    await server.stop()
+
+    histogram = LatencyHistogram()
+    first_frame: Dict[str, int] = {}
+    for index, (_, text) in enumerate(server.frames):
+        mint = _frame_mint(text)
+        if mint and mint not in first_frame:
+            first_frame[mint] = index
+    for mint, index in first_frame.items():
+        if mint in probe.decided and server.sent_at[index] is not None:
+            histogram.observe((probe.decided[mint] - server.sent_at[index]) * 1000)
+    sent = [at for at in server.sent_at if at is not None]
+    elapsed = (max(probe.decided.values(), default=sent[-1]) - sent[0]) if sent else 0.0
+    print(f"trames envoyées     : {len(sent)} / {len(server.frames)}")
+    print(f"mints décidés       : {len(probe.decided)} / {len(first_frame)}")
+    print(f"débit               : {len(probe.decided) / elapsed if elapsed else 0:.0f} décisions/s")
+    print(f"latence trame->décision (ms) : p50={histogram.quantile(0.5):.1f} p90={histogram.quantile(0.9):.1f} "
+          f"p99={histogram.quantile(0.99):.1f} max={histogram.max:.1f}")
+    print(f"RPC rejouées        : {server.rpc_hits} servies, {server.rpc_misses} sans enregistrement")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", help="enregistrement à rejouer")
+    parser.add_argument("--synthetic", type=int, default=1000, help="lancements synthétiques (sans --file)")
+    parser.add_argument("--rate", type=float, default=200.0, help="lancements par seconde (synthétique)")
+    parser.add_argument("--speed", type=float, default=1.0, help="accélération (1 = temps réel, 0 = max)")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    args = parser.parse_args()
+
+    path = args.file
+    if path is None:
+        fd, path = tempfile.mkstemp(suffix=".rec")
+        os.close(fd)
+        write_synthetic_storm(path, args.synthetic, args.rate)
+    try:
+        asyncio.run(run(path, args.speed, args.timeout))
+    finally:
+        if args.file is None:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
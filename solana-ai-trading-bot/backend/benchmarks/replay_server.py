@@ -0,0 +1,214 @@
+"""
+Serveur de rejeu d'un enregistrement de trafic (TRAFFIC_RECORD_PATH, utils/traffic_recorder.py).
+
+- WebSocket : répond aux logsSubscribe puis renvoie les notifications enregistrées avec leur
+  cadencement d'origine divisé par --speed (0 = aussi vite que possible) ;
+- HTTP JSON-RPC : répond à chaque (méthode, paramètres) par la réponse enregistrée, dans l'ordre
+  d'enregistrement, avec la latence enregistrée divisée par --speed. Une requête inconnue reçoit
+  `"result": null`.
+
+    python -m backend.benchmarks.replay_server --file data/traffic.rec --speed 10 --port 18900
+    SOLANA_RPC_URL=http://127.0.0.1:18900 SOLANA_WS_URL=ws://127.0.0.1:18901 ...
+"""
+import argparse
+import asyncio
+import json
+import time
+from collections import defaultdict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+import websockets
+from loguru import logger
+from ..utils.traffic_recorder import KIND_RPC, KIND_WS_FRAME, read_records
+
+
+def _rpc_key(method: str, params) -> Tuple[str, str]:
+    return method, json.dumps(params or [], sort_keys=True, separators=(",", ":"))
+
+
+class ReplayServer:
+    """Rejoue un enregistrement ; `sent_at` garde l'instant d'envoi de chaque trame notifiée."""
+
+    def __init__(self, path: str, speed: float = 1.0, host: str = "127.0.0.1", rpc_port: int = 0, ws_port: int = 0,
+                 rpc_latency: bool = True):
+        self.speed = speed
+        self.host = host
+        self.rpc_port = rpc_port
+        self.ws_port = ws_port
+        self.rpc_latency = rpc_latency
+        self.frames: List[Tuple[float, str]] = []      # notifications (t, texte)
+        self.acks: List[object] = []                   # ids d'abonnement enregistrés, dans l'ordre
+        self.responses: Dict[Tuple[str, str], Deque[Tuple[float, bytes]]] = defaultdict(deque)
+        self.sent_at: List[Optional[float]] = []
+        self.rpc_hits = 0
+        self.rpc_misses = 0
+        self._cursor = 0
+        self._servers = []
+        self.load(path)
+
+    def load(self, path: str):
+        for kind, timestamp, payload in read_records(path):
+            if kind == KIND_WS_FRAME:
+                text = payload.decode()
+                message = json.loads(text)
+                if "method" in message:
+                    self.frames.append((timestamp, text))
+                elif "result" in message:
+                    self.acks.append(message["result"])
+            elif kind == KIND_RPC:
+                request, _, response = payload.partition(b"\n")
+                request = json.loads(request)
+                self.responses[_rpc_key(request["method"], request["params"])].append(
+                    (request.get("latency_ms", 0.0), response)
+                )
+        self.sent_at = [None] * len(self.frames)
+        logger.info(f"Rejeu : {len(self.frames)} notifications, "
+                    f"{sum(len(queue) for queue in self.responses.values())} réponses RPC chargées.")
+
+    @property
+    def rpc_url(self) -> str:
+        return f"http://{self.host}:{self.rpc_port}"
+
+    @property
+    def ws_url(self) -> str:
+        return f"ws://{self.host}:{self.ws_port}"
+
+    @property
+    def done(self) -> bool:
+        return self._cursor >= len(self.frames)
+
+    async def start(self):
+        rpc_server = await asyncio.start_server(self._serve_http, self.host, self.rpc_port)
+        self.rpc_port = rpc_server.sockets[0].getsockname()[1]
+        ws_server = await websockets.serve(self._serve_ws, self.host, self.ws_port, max_size=None)
+        self.ws_port = ws_server.sockets[0].getsockname()[1]
+        self._servers = [rpc_server, ws_server]
+        logger.info(f"Rejeu : RPC sur {self.rpc_url}, WebSocket sur {self.ws_url} (vitesse x{self.speed or 'max'}).")
+
+    async def stop(self):
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+
+    async def _serve_ws(self, ws, path=None):
+        subscribed = asyncio.Event()
+        expected = max(1, len(self.acks))
+        count = 0
+
+        async def answer_subscriptions():
+            nonlocal count
+            async for raw in ws:
+                request = json.loads(raw)
+                ack = self.acks[count] if count < len(self.acks) else count + 1
+                count += 1
+                await ws.send(json.dumps({"jsonrpc": "2.0", "result": ack, "id": request.get("id")}))
+                if count >= expected:
+                    subscribed.set()
+
+        reader = asyncio.create_task(answer_subscriptions())
+        try:
+            try:
+                await asyncio.wait_for(subscribed.wait(), 1.0)
+            except asyncio.TimeoutError:
+                pass  # moins d'abonnements qu'à l'enregistrement : on rejoue quand même
+            await self._stream(ws)
+            await reader
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            reader.cancel()
+
+    async def _stream(self, ws):
+        """Envoie les notifications depuis le curseur partagé (une reconnexion reprend où on en était)."""
+        if self.done:
+            return
+        origin = self.frames[self._cursor][0]
+        started = time.monotonic()
+        while not self.done:
+            index = self._cursor
+            timestamp, text = self.frames[index]
+            if self.speed:
+                delay = (timestamp - origin) / self.speed - (time.monotonic() - started)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            await ws.send(text)
+            self.sent_at[index] = time.monotonic()
+            self._cursor = index + 1
+            if not self.speed and index % 100 == 99:
+                await asyncio.sleep(0)  # laisser tourner le client dans le même processus
+
+    def _answer(self, call: dict) -> Tuple[float, dict, Optional[bytes]]:
+        """(latence ms, réponse par défaut, corps enregistré) ; la dernière réponse d'une clé est réutilisée."""
+        queue = self.responses.get(_rpc_key(call.get("method"), call.get("params")))
+        if not queue:
+            self.rpc_misses += 1
+            return 0.0, {"jsonrpc": "2.0", "result": None, "id": call.get("id")}, None
+        self.rpc_hits += 1
+        latency_ms, body = queue.popleft() if len(queue) > 1 else queue[0]
+        return latency_ms, {}, body
+
+    async def _serve_http(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    return
+                length = 0
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = header.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value.strip())
+                request = json.loads(await reader.readexactly(length)) if length else {}
+                if isinstance(request, list):
+                    answers = [self._answer(call) for call in request]
+                    latency_ms = max((answer[0] for answer in answers), default=0.0)
+                    items = []
+                    for call, (_, default, body) in zip(request, answers):
+                        item = json.loads(body) if body is not None else default
+                        if isinstance(item, dict):
+                            item["id"] = call.get("id")
+                        items.append(item)
+                    content = json.dumps(items).encode()
+                else:
+                    # Le client ne vérifie pas l'id d'une requête simple : corps renvoyé tel quel
+                    latency_ms, default, content = self._answer(request)
+                    if content is None:
+                        content = json.dumps(default).encode()
+                if self.rpc_latency and self.speed and latency_ms:
+                    await asyncio.sleep(latency_ms / 1000 / self.speed)
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\n"
+                             b"Content-Length: " + str(len(content)).encode() + b"\r\n\r\n" + content)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+        finally:
+            writer.close()
+
+
+async def _serve(args):
+    server = ReplayServer(args.file, args.speed, args.host, args.port, args.port + 1, not args.no_rpc_latency)
+    await server.start()
+    while not server.done:
+        await asyncio.sleep(1)
+    logger.info(f"Rejeu terminé : {server.rpc_hits} réponses RPC servies, {server.rpc_misses} requêtes inconnues.")
+    await asyncio.Event().wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--file", required=True, help="fichier produit avec TRAFFIC_RECORD_PATH")
+    parser.add_argument("--speed", type=float, default=1.0, help="accélération (1 = temps réel, 0 = max)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18900, help="port RPC ; WebSocket sur port + 1")
+    parser.add_argument("--no-rpc-latency", action="store_true", help="répondre sans la latence enregistrée")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
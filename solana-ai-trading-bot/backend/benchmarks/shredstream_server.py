@@ -0,0 +1,142 @@
+"""
+Serveur gRPC local imitant un proxy Jito ShredStream (SubscribeEntries), pour tester
+ShredstreamSource sans accès au réseau : chaque message Entry porte un slot et une entrée
+contenant des transactions synthétiques (création pump.fun, InitializeMint2 ou bruit).
+
+    python -m backend.benchmarks.shredstream_server --port 18999 --rate 200
+    INGEST_SOURCES=websocket,shredstream JITO_SHREDSTREAM_GRPC_URL=127.0.0.1:18999 ...
+"""
+import argparse
+import asyncio
+import random
+import time
+from typing import List, Optional, Tuple
+import base58
+import grpc
+from loguru import logger
+from ..blockchain.block_decoder import TOKEN_PROGRAM_ID
+from ..blockchain.shredstream import (
+    PUMP_CREATE_INSTRUCTION, PUMP_FUN_PROGRAM_KEY, SUBSCRIBE_ENTRIES_METHOD, encode_entries, encode_entry_message
+)
+
+TOKEN_PROGRAM_KEY = base58.b58decode(TOKEN_PROGRAM_ID)
+INITIALIZE_MINT2 = 20  # discriminant de l'instruction Token InitializeMint2
+
+
+def _shortvec(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def wire_transaction(signature: bytes, keys: List[bytes], program_index: int, accounts: List[int],
+                     data: bytes) -> bytes:
+    """Transaction legacy sérialisée (une signature, une instruction)."""
+    message = bytes([1, 0, 1]) + _shortvec(len(keys)) + b"".join(keys) + bytes(32)
+    message += _shortvec(1) + bytes([program_index]) + _shortvec(len(accounts)) + bytes(accounts)
+    message += _shortvec(len(data)) + data
+    return _shortvec(1) + signature + message
+
+
+def synthetic_transaction(rng: random.Random, kind: str) -> Tuple[bytes, Optional[str]]:
+    """(transaction, mint attendu) ; `kind` : pump, mint ou noise."""
+    signature = bytes(rng.getrandbits(8) for _ in range(64))
+    payer, mint = (bytes(rng.getrandbits(8) for _ in range(32)) for _ in range(2))
+    if kind == "pump":
+        raw = wire_transaction(signature, [payer, mint, PUMP_FUN_PROGRAM_KEY], 2, [1, 0], PUMP_CREATE_INSTRUCTION + bytes(24))
+    elif kind == "mint":
+        raw = wire_transaction(signature, [payer, mint, TOKEN_PROGRAM_KEY], 2, [1], bytes([INITIALIZE_MINT2, 6]) + payer)
+    else:
+        return wire_transaction(signature, [payer, mint, bytes(32)], 2, [0, 1], bytes(12)), None
+    return raw, base58.b58encode(mint).decode()
+
+
+class ShredstreamStandIn:
+    """Diffuse `rate` transactions/s (une entrée par slot de 400 ms) à chaque abonné ; `expected` garde les mints émis."""
+
+    def __init__(self, rate: float = 100.0, pump_ratio: float = 0.2, mint_ratio: float = 0.05,
+                 host: str = "127.0.0.1", port: int = 0, limit: int = None, seed: int = 11):
+        self.rate = rate
+        self.pump_ratio = pump_ratio
+        self.mint_ratio = mint_ratio
+        self.host = host
+        self.port = port
+        self.limit = limit
+        self.rng = random.Random(seed)
+        self.expected: List[Tuple[str, float]] = []  # (mint, instant d'envoi)
+        self.sent = 0
+        self._server = None
+
+    @property
+    def url(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    async def start(self):
+        service, method = SUBSCRIBE_ENTRIES_METHOD.strip("/").split("/")
+        handler = grpc.unary_stream_rpc_method_handler(
+            self._subscribe_entries, request_deserializer=lambda data: data, response_serializer=lambda data: data
+        )
+        self._server = grpc.aio.server()
+        self._server.add_generic_rpc_handlers((grpc.method_handlers_generic_handler(service, {method: handler}),))
+        self.port = self._server.add_insecure_port(f"{self.host}:{self.port}")
+        await self._server.start()
+        logger.info(f"ShredStream de test sur {self.url} ({self.rate:.0f} transactions/s).")
+
+    async def stop(self):
+        if self._server is not None:
+            await self._server.stop(0)
+
+    def _kind(self) -> str:
+        roll = self.rng.random()
+        if roll < self.pump_ratio:
+            return "pump"
+        return "mint" if roll < self.pump_ratio + self.mint_ratio else "noise"
+
+    async def _subscribe_entries(self, request, context):
+        slot = 300_000_000
+        per_slot = max(1, round(self.rate * 0.4))
+        while self.limit is None or self.sent < self.limit:
+            started = time.monotonic()
+            count = per_slot if self.limit is None else min(per_slot, self.limit - self.sent)
+            transactions, mints = [], []
+            for _ in range(count):
+                raw, mint = synthetic_transaction(self.rng, self._kind())
+                transactions.append(raw)
+                if mint:
+                    mints.append(mint)
+            # Deux entrées par message, comme un proxy qui regroupe les entrées d'un même slot
+            half = len(transactions) // 2
+            yield encode_entry_message(slot, encode_entries([transactions[:half], transactions[half:]]))
+            sent_at = time.monotonic()
+            self.expected.extend((mint, sent_at) for mint in mints)
+            self.sent += count
+            slot += 1
+            await asyncio.sleep(max(0.0, 0.4 - (time.monotonic() - started)))
+
+
+async def _serve(args):
+    server = ShredstreamStandIn(args.rate, host=args.host, port=args.port)
+    await server.start()
+    await server._server.wait_for_termination()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=18999)
+    parser.add_argument("--rate", type=float, default=100.0, help="transactions par seconde")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
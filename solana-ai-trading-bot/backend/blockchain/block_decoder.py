@@ -0,0 +1,321 @@
+import asyncio
+import base64
+import hashlib
+import itertools
+import json
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+import base58
+from loguru import logger
+from ..config.settings import settings
+
+TOKEN_PROGRAM_ID = "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"
+# AMM v4 de Raydium (pools, swaps, log initialize2) ; 9xQeW… est le carnet d'ordres Serum, pas Raydium
+RAYDIUM_AMM_PROGRAM_ID = "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8"
+ORCA_PROGRAM_ID = "whirLbMiicVdio4qvUfM5KAg6Ct8VwpYzGff3uctyCc"
+
+DEX_PROGRAMS = {RAYDIUM_AMM_PROGRAM_ID: "raydium", ORCA_PROGRAM_ID: "orca"}
+WATCHED_PROGRAMS = frozenset({TOKEN_PROGRAM_ID, *DEX_PROGRAMS})
+# Clés brutes (32 octets) des programmes surveillés, pour le préfiltre sur les transactions base64
+WATCHED_PROGRAM_KEYS = {base58.b58decode(program_id): program_id for program_id in WATCHED_PROGRAMS}
+
+# Instructions SPL Token retenues
+SPL_INITIALIZE_MINT = 0
+SPL_TRANSFER = 3
+SPL_TRANSFER_CHECKED = 12
+SPL_INITIALIZE_MINT2 = 20
+
+# Instructions DEX reconnues : tag (1er octet) Raydium AMM v4, discriminant Anchor (8 octets) Whirlpool
+RAYDIUM_INSTRUCTIONS = {
+    0: "pool_init", 1: "pool_init", 3: "deposit", 4: "withdraw",
+    9: "swap", 11: "swap", 16: "swap", 17: "swap",
+}
+WHIRLPOOL_INSTRUCTIONS = {
+    hashlib.sha256(f"global:{name}".encode()).digest()[:8]: kind
+    for name, kind in (
+        ("swap", "swap"), ("swap_v2", "swap"), ("two_hop_swap", "swap"), ("two_hop_swap_v2", "swap"),
+        ("initialize_pool", "pool_init"), ("initialize_pool_v2", "pool_init"),
+        ("increase_liquidity", "deposit"), ("increase_liquidity_v2", "deposit"),
+        ("decrease_liquidity", "withdraw"), ("decrease_liquidity_v2", "withdraw"),
+    )
+}
+
+_B58_ALPHABET = "123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz"
+_B58_PAIRS = [a + b for a in _B58_ALPHABET for b in _B58_ALPHABET]
+
+
+def b58encode(raw: bytes) -> str:
+    """Encodage base58 deux chiffres à la fois (deux fois moins de divisions que `base58`)."""
+    value = int.from_bytes(raw, "big")
+    chunks = []
+    while value:
+        value, pair = divmod(value, 3364)  # 58 ** 2
+        chunks.append(_B58_PAIRS[pair])
+    encoded = "".join(reversed(chunks)).lstrip("1")
+    return "1" * (len(raw) - len(raw.lstrip(b"\0"))) + encoded
+
+
+def _decode_data(data: Any) -> bytes:
+    """Données d'instruction : base58 en encodage "json", [données, "base64"] sinon."""
+    if not data:
+        return b""
+    if isinstance(data, bytes):
+        return data
+    if isinstance(data, list):
+        return base64.b64decode(data[0])
+    return base58.b58decode(data)
+
+
+def _account_keys(tx: Dict[str, Any]) -> List[str]:
+    message = tx["transaction"]["message"]
+    keys = [k["pubkey"] if isinstance(k, dict) else k for k in message.get("accountKeys", [])]
+    return keys + _loaded_addresses(tx)
+
+
+def _loaded_addresses(tx: Dict[str, Any]) -> List[str]:
+    # Transactions v0 : adresses chargées depuis les lookup tables, à la suite des clés statiques
+    loaded = (tx.get("meta") or {}).get("loadedAddresses") or {}
+    return loaded.get("writable", []) + loaded.get("readonly", [])
+
+
+def _inner_instructions(tx: Dict[str, Any]):
+    for inner in (tx.get("meta") or {}).get("innerInstructions") or []:
+        yield from inner.get("instructions", [])
+
+
+def _read_shortvec(buf: bytes, offset: int) -> Tuple[int, int]:
+    """Entier compact-u16 de la sérialisation Solana ; retourne (valeur, nouvel offset)."""
+    value = shift = 0
+    while True:
+        byte = buf[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def parse_wire_transaction(raw: bytes) -> Tuple[bytes, List[bytes], List[Dict[str, Any]]]:
+    """
+    Décode une transaction sérialisée (legacy ou v0).
+
+    Retourne (première signature, clés statiques, instructions au format de l'encodage "json"
+    avec les données déjà en octets). Les lookup tables v0 ne sont pas résolues ici : les
+    adresses chargées viennent de meta.loadedAddresses.
+    """
+    signature, keys, instructions, _, _ = parse_wire_transaction_at(raw, 0)
+    return signature, keys, instructions
+
+
+def parse_wire_transaction_at(raw: bytes, offset: int) -> Tuple[bytes, List[bytes], List[Dict[str, Any]], int, int]:
+    """
+    Comme parse_wire_transaction, pour une transaction commençant à `offset` dans un tampon
+    (entrées de shreds). Retourne aussi le nombre d'adresses chargées par lookup table et
+    l'offset de fin de la transaction.
+    """
+    signature_count, offset = _read_shortvec(raw, offset)
+    signature = raw[offset:offset + 64]
+    offset += 64 * signature_count
+    versioned = bool(raw[offset] & 0x80)
+    if versioned:  # préfixe de version (v0)
+        offset += 1
+    offset += 3  # en-tête : signatures requises, lecture seule signées / non signées
+    key_count, offset = _read_shortvec(raw, offset)
+    keys = [raw[offset + 32 * i:offset + 32 * (i + 1)] for i in range(key_count)]
+    offset += 32 * key_count + 32  # + recent blockhash
+    instruction_count, offset = _read_shortvec(raw, offset)
+    instructions = []
+    for _ in range(instruction_count):
+        program_index = raw[offset]
+        account_count, offset = _read_shortvec(raw, offset + 1)
+        accounts = list(raw[offset:offset + account_count])
+        data_length, offset = _read_shortvec(raw, offset + account_count)
+        instructions.append({
+            "programIdIndex": program_index, "accounts": accounts, "data": raw[offset:offset + data_length],
+        })
+        offset += data_length
+    loaded_count = 0
+    if versioned:
+        lookup_count, offset = _read_shortvec(raw, offset)
+        for _ in range(lookup_count):
+            offset += 32  # adresse de la table
+            for _ in range(2):  # index writable puis readonly
+                index_count, offset = _read_shortvec(raw, offset)
+                loaded_count += index_count
+                offset += index_count
+    return signature, keys, instructions, loaded_count, offset
+
+
+class _WireKeys:
+    """Table de clés d'une transaction base64, encodées en base58 seulement à la lecture."""
+
+    def __init__(self, static_keys: List[bytes], loaded: List[str]):
+        self._keys: List[Any] = static_keys + loaded
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def __getitem__(self, index: int) -> str:
+        key = self._keys[index]
+        if isinstance(key, bytes):
+            key = self._keys[index] = b58encode(key)
+        return key
+
+    def program(self, index: int) -> Optional[str]:
+        """Programme surveillé à cet index, None sinon (sans encodage base58)."""
+        key = self._keys[index]
+        if isinstance(key, bytes):
+            return WATCHED_PROGRAM_KEYS.get(key)
+        return key
+
+
+def _instruction_records(keys, signature: Optional[str], instructions, slot: int) -> List[Dict[str, Any]]:
+    records = []
+    for instr in instructions:
+        program_id = instr.get("programId")
+        if program_id is None and "programIdIndex" in instr:
+            index = instr["programIdIndex"]
+            program_id = keys.program(index) if isinstance(keys, _WireKeys) else keys[index]
+        if program_id not in WATCHED_PROGRAMS:
+            continue
+        indices = instr.get("accounts", [])
+        # Les comptes ne sont résolus (et encodés en base58 en mode lean) qu'au besoin
+        account = lambda i: keys[indices[i]] if isinstance(indices[i], int) else indices[i]
+        if program_id in DEX_PROGRAMS:
+            records.append({
+                "type": "dex", "program": DEX_PROGRAMS[program_id], "instruction": _dex_instruction(program_id, instr),
+                "accounts": [account(i) for i in range(len(indices))],
+                "slot": slot, "signature": signature, "signer": keys[0] if len(keys) else None,
+            })
+            continue
+        try:
+            data = _decode_data(instr.get("data"))
+        except ValueError:
+            continue
+        if not data or not indices:
+            continue
+        instruction_type = data[0]
+        if instruction_type in (SPL_INITIALIZE_MINT, SPL_INITIALIZE_MINT2):
+            records.append({
+                "type": "mint_init", "mint": account(0), "creator": keys[0] if len(keys) else None,
+                "slot": slot, "signature": signature,
+            })
+        elif instruction_type in (SPL_TRANSFER, SPL_TRANSFER_CHECKED) and len(data) >= 9:
+            # transferChecked : source, mint, destination, owner ; transfer : source, destination, owner
+            destination_index = 2 if instruction_type == SPL_TRANSFER_CHECKED else 1
+            if len(indices) <= destination_index:
+                continue
+            records.append({
+                "type": "transfer", "source": account(0), "destination": account(destination_index),
+                "mint": account(1) if instruction_type == SPL_TRANSFER_CHECKED else None,
+                "amount": int.from_bytes(data[1:9], "little"),
+                "slot": slot, "signature": signature,
+            })
+    return records
+
+
+def _dex_instruction(program_id: str, instr: Dict[str, Any]) -> Optional[str]:
+    """swap, pool_init, deposit ou withdraw d'après le tag de l'instruction ; None si non reconnue."""
+    try:
+        data = _decode_data(instr.get("data"))
+    except ValueError:
+        return None
+    if program_id == RAYDIUM_AMM_PROGRAM_ID:
+        return RAYDIUM_INSTRUCTIONS.get(data[0]) if data else None
+    return WHIRLPOOL_INSTRUCTIONS.get(data[:8])
+
+
+def _json_transaction_records(tx: Dict[str, Any], slot: int) -> List[Dict[str, Any]]:
+    keys = _account_keys(tx)
+    # Préfiltre : aucun programme surveillé dans la table de comptes, aucune instruction à lire
+    if WATCHED_PROGRAMS.isdisjoint(keys):
+        return []
+    signature = (tx["transaction"].get("signatures") or [None])[0]
+    instructions = itertools.chain(tx["transaction"]["message"].get("instructions", []), _inner_instructions(tx))
+    return _instruction_records(keys, signature, instructions, slot)
+
+
+def _wire_transaction_records(tx: Dict[str, Any], slot: int) -> List[Dict[str, Any]]:
+    raw = base64.b64decode(tx["transaction"][0])
+    loaded = _loaded_addresses(tx)
+    # Préfiltre sur les octets bruts avant tout décodage (un faux positif est écarté plus loin)
+    if not any(key in raw for key in WATCHED_PROGRAM_KEYS) and WATCHED_PROGRAMS.isdisjoint(loaded):
+        return []
+    signature, static_keys, instructions = parse_wire_transaction(raw)
+    keys = _WireKeys(static_keys, loaded)
+    instructions = itertools.chain(instructions, _inner_instructions(tx))
+    records = _instruction_records(keys, None, instructions, slot)
+    if records:
+        encoded_signature = b58encode(signature)
+        for record in records:
+            record["signature"] = encoded_signature
+    return records
+
+
+def extract_records(block: Dict[str, Any], slot: int) -> List[Dict[str, Any]]:
+    """
+    Réduit un bloc aux enregistrements utiles : créations de mint, transferts SPL et
+    instructions Raydium/Orca (type "dex", `instruction` : swap, pool_init, deposit, withdraw
+    ou None), avec slot et signature.
+
+    Accepte les blocs en encodage "json" comme "base64" (mode lean) ; dans les deux cas les
+    transactions qui ne référencent aucun programme surveillé sont écartées avant le décodage
+    des instructions.
+    """
+    records = []
+    for tx in block.get("transactions") or []:
+        if (tx.get("meta") or {}).get("err"):
+            continue
+        if isinstance(tx["transaction"], list):
+            records.extend(_wire_transaction_records(tx, slot))
+        else:
+            records.extend(_json_transaction_records(tx, slot))
+    return records
+
+
+def decode_block_response(raw: bytes, slot: int) -> Tuple[Optional[dict], Optional[List[Dict[str, Any]]]]:
+    """
+    Parse une réponse getBlock brute (exécuté dans un process worker).
+
+    Retourne (erreur JSON-RPC éventuelle, enregistrements). Un résultat null (slot sans bloc)
+    donne (None, None).
+    """
+    response = json.loads(raw)
+    if response.get("error"):
+        return response["error"], None
+    block = response.get("result")
+    if block is None:
+        return None, None
+    return None, extract_records(block, slot)
+
+
+class BlockDecoder:
+    """
+    Étape de décodage des blocs.
+
+    Avec `workers` > 0, les réponses brutes sont parsées dans un ProcessPoolExecutor et seuls
+    les enregistrements compacts reviennent dans la boucle asyncio ; sinon le décodage est fait
+    sur place.
+    """
+
+    def __init__(self, workers: int = None):
+        self.workers = settings.BLOCK_DECODE_WORKERS if workers is None else workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        if self.workers > 0:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            logger.info(f"Décodage des blocs dans {self.workers} process workers.")
+
+    @property
+    def uses_pool(self) -> bool:
+        return self._executor is not None
+
+    async def decode_raw(self, raw: bytes, slot: int) -> Tuple[Optional[dict], Optional[List[Dict[str, Any]]]]:
+        if self._executor is None:
+            return decode_block_response(raw, slot)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, decode_block_response, raw, slot)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
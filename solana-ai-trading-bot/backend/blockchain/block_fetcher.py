@@ -0,0 +1,155 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+from ..config.settings import settings
+from ..utils.metrics import metrics
+from .block_decoder import BlockDecoder, extract_records
+from .rpc_client import call_solana_rpc, RPCError
+from .rpc_limiter import RPCPriority
+
+# Slot sauté par le leader / absent du stockage long terme : il n'y aura jamais de bloc
+SKIPPED_SLOT_ERROR_CODES = {-32007, -32009}
+
+BLOCK_OK = "ok"
+BLOCK_SKIPPED = "skipped"
+BLOCK_FAILED = "failed"
+
+DEFAULT_BLOCK_PARAMS = {
+    "encoding": "json",
+    "transactionDetails": "full",
+    "rewards": False,
+    "maxSupportedTransactionVersion": 0,
+}
+# Mode lean : transactions sérialisées en base64, bien plus compactes que leur rendu JSON.
+# ("accounts" serait plus léger encore mais n'inclut pas les données d'instruction.)
+LEAN_BLOCK_PARAMS = {
+    "encoding": "base64",
+    "transactionDetails": "full",
+    "rewards": False,
+    "maxSupportedTransactionVersion": 0,
+}
+BLOCK_MODES = {"full": DEFAULT_BLOCK_PARAMS, "lean": LEAN_BLOCK_PARAMS}
+
+metrics.describe("block_fetch_total", "Slots traités par le pipeline getBlock, par statut")
+
+BlockRecords = List[Dict[str, Any]]
+
+
+class BlockFetcher:
+    """
+    Pipeline getBlock à concurrence bornée.
+
+    Garde jusqu'à `concurrency` requêtes en vol, traite chaque bloc dès son arrivée et ne fait
+    avancer le curseur que sur le préfixe contigu de slots terminés. Les slots sautés (pas de
+    bloc) comptent comme terminés ; les échecs sont réessayés puis bloquent le curseur pour que
+    le slot soit repris au passage suivant. Avec `max_slot_passes`, un slot en échec sur autant
+    de passages est abandonné (`on_give_up`, par exemple pour le confier au backfill) et compte
+    comme terminé : un slot irrécupérable ne fige pas le curseur.
+
+    Chaque bloc est réduit par le BlockDecoder aux enregistrements utiles (mints, transferts,
+    swaps) : `on_block` reçoit cette liste, jamais le bloc complet. Avec un pool de process, la
+    réponse est récupérée en octets et parsée hors de la boucle asyncio.
+    """
+
+    def __init__(self, rpc_url: str, concurrency: int = None, max_retries: int = None,
+                 block_params: dict = None, priority: int = RPCPriority.DETECTION,
+                 decoder: BlockDecoder = None, commitment: str = None, max_slot_passes: int = 0):
+        self.rpc_url = rpc_url
+        self.concurrency = max(1, concurrency or settings.SCAN_FETCH_CONCURRENCY)
+        self.max_retries = settings.SCAN_FETCH_MAX_RETRIES if max_retries is None else max_retries
+        self.block_params = dict(block_params or BLOCK_MODES.get(settings.SCAN_BLOCK_MODE, LEAN_BLOCK_PARAMS))
+        if commitment:
+            self.block_params["commitment"] = commitment
+        self.priority = priority
+        self.decoder = decoder
+        self.max_slot_passes = max_slot_passes  # 0 : un slot en échec est repris indéfiniment
+        self._failed_passes: Dict[int, int] = {}  # slot -> passages en échec consécutifs
+
+    async def _get_block(self, slot: int) -> Tuple[Optional[dict], Optional[BlockRecords]]:
+        """Un appel getBlock ; retourne (erreur JSON-RPC, enregistrements ou None si pas de bloc)."""
+        if self.decoder is not None and self.decoder.uses_pool:
+            raw = await call_solana_rpc(
+                self.rpc_url, "getBlock", [slot, self.block_params], priority=self.priority, strict=True, raw=True
+            )
+            return await self.decoder.decode_raw(raw, slot)
+        response = await call_solana_rpc(
+            self.rpc_url, "getBlock", [slot, self.block_params], priority=self.priority, strict=True
+        )
+        block = response.get("result")
+        return response.get("error"), None if block is None else extract_records(block, slot)
+
+    async def fetch(self, slot: int) -> Tuple[str, Optional[BlockRecords]]:
+        """Récupère et décode un bloc ; retourne (statut, enregistrements)."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                error, records = await self._get_block(slot)
+            except (RPCError, ValueError) as e:
+                logger.debug(f"getBlock {slot} tentative {attempt + 1} en échec : {e}")
+                await asyncio.sleep(min(1.0, 0.05 * (2 ** attempt)))
+                continue
+            if error:
+                if error.get("code") in SKIPPED_SLOT_ERROR_CODES:
+                    return BLOCK_SKIPPED, None
+                # Bloc pas encore disponible (-32004) ou autre erreur du nœud : on réessaie
+                await asyncio.sleep(min(1.0, 0.05 * (2 ** attempt)))
+                continue
+            if records is None:
+                return BLOCK_SKIPPED, None
+            return BLOCK_OK, records
+        return BLOCK_FAILED, None
+
+    async def _fetch_and_process(self, slot: int, on_block: Callable[[int, BlockRecords], Awaitable[None]]) -> str:
+        status, records = await self.fetch(slot)
+        metrics.inc("block_fetch_total", metrics.labels(status=status))
+        if status == BLOCK_OK:
+            try:
+                await on_block(slot, records)
+            except Exception as e:
+                logger.error(f"Erreur lors du traitement du bloc {slot} : {e}")
+        return status
+
+    async def run(self, start_slot: int, end_slot: int,
+                  on_block: Callable[[int, BlockRecords], Awaitable[None]],
+                  on_give_up: Callable[[int], None] = None) -> int:
+        """
+        Récupère et traite les slots [start_slot, end_slot].
+
+        Retourne le dernier slot du préfixe contigu terminé (start_slot - 1 si aucun).
+        """
+        frontier = start_slot - 1
+        next_slot = start_slot
+        finished = set()
+        in_flight: Dict[asyncio.Task, int] = {}
+        failed = False
+        try:
+            while in_flight or (next_slot <= end_slot and not failed):
+                while not failed and next_slot <= end_slot and len(in_flight) < self.concurrency:
+                    task = asyncio.create_task(self._fetch_and_process(next_slot, on_block))
+                    in_flight[task] = next_slot
+                    next_slot += 1
+                done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    slot = in_flight.pop(task)
+                    if task.result() != BLOCK_FAILED:
+                        self._failed_passes.pop(slot, None)
+                        finished.add(slot)
+                        continue
+                    passes = self._failed_passes.get(slot, 0) + 1
+                    if self.max_slot_passes and passes >= self.max_slot_passes:
+                        self._failed_passes.pop(slot, None)
+                        logger.warning(f"Slot {slot} abandonné après {passes} passages en échec.")
+                        if on_give_up is not None:
+                            on_give_up(slot)
+                        finished.add(slot)
+                    else:
+                        # On n'en lance plus : le curseur ne pourra pas dépasser ce slot
+                        self._failed_passes[slot] = passes
+                        logger.warning(f"Slot {slot} en échec après {self.max_retries + 1} tentatives, repris au prochain passage.")
+                        failed = True
+                while frontier + 1 in finished:
+                    frontier += 1
+                    finished.discard(frontier)
+        finally:
+            for task in in_flight:
+                task.cancel()
+        return frontier
@@ -1,67 +1,705 @@
 import asyncio
+import inspect
 import time
-from typing import Any, Dict, Optional
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Union
 from functools import wraps
-from cachetools import TTLCache
+from loguru import logger
+from ..config.settings import settings
+from ..utils.metrics import metrics
+from .disk_cache import DiskCache
+from .pool_index import PoolIndex
+from .rpc_client import call_solana_rpc, call_solana_rpc_batch
+from .rpc_limiter import RPCPriority
+
+_SCALARS = (str, int, float, bool, bytes, type(None))
+_SCALAR_TYPES = frozenset(_SCALARS)
+
+
+def _freeze(value: Any) -> Any:
+    """Équivalent hashable d'un argument : listes -> tuples, dicts -> tuples triés."""
+    if isinstance(value, _SCALARS):
+        return value
+    if isinstance(value, dict):
+        return tuple(sorted((name, _freeze(item)) for name, item in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(item) for item in value)
+    if isinstance(value, set):
+        return frozenset(value)
+    return value
+
+
+class CacheKey:
+    """
+    Clés de cache d'une fonction : tuple (nom qualifié, arguments normalisés), sans chaîne formatée.
+
+    La signature est lue une fois : un argument passé par position, par nom ou laissé à sa
+    valeur par défaut donne la même clé. `exclude` retire des paramètres de la clé ;
+    `slot_bucket` arrondit le paramètre `slot` au multiple inférieur (un résultat par tranche).
+    """
+
+    def __init__(self, func: Callable, exclude: Iterable[str] = (), slot_bucket: int = None,
+                 bound: bool = False):
+        self.name = func.__qualname__
+        parameters = list(inspect.signature(func).parameters.values())[1 if bound else 0:]
+        self.variadic = any(p.kind in (p.VAR_POSITIONAL, p.VAR_KEYWORD) for p in parameters)
+        self.names = [p.name for p in parameters if p.kind not in (p.VAR_POSITIONAL, p.VAR_KEYWORD)]
+        self.check(exclude, "exclus")
+        self.index = {name: i for i, name in enumerate(self.names)}
+        self.defaults = tuple(p.default for p in parameters if p.kind not in (p.VAR_POSITIONAL, p.VAR_KEYWORD))
+        self.keep = None if not exclude else [i for i, name in enumerate(self.names) if name not in exclude]
+        self.slot_index = self.index.get("slot") if slot_bucket else None
+        self.slot_bucket = slot_bucket
+        # Cas courant (arguments par position, rien à retirer ni arrondir) : args + valeurs par défaut restantes
+        self.direct = not self.variadic and self.slot_index is None and self.keep is None
+
+    def check(self, names: Iterable[str], role: str):
+        unknown = set(names) - set(self.names)
+        if unknown:
+            raise ValueError(f"{self.name} : paramètres {role} inconnus {sorted(unknown)}")
+
+    def arguments(self, args: tuple, kwargs: dict, names: Iterable[str]) -> tuple:
+        """Valeurs non vides des paramètres `names` pour cet appel (par position, par nom ou par défaut)."""
+        values = []
+        for name in names:
+            index = self.index[name]
+            value = kwargs[name] if name in kwargs else args[index] if index < len(args) else self.defaults[index]
+            if value:
+                values.append(value)
+        return tuple(values)
+
+    def __call__(self, args: tuple, kwargs: dict) -> tuple:
+        if self.variadic:
+            return (self.name, *map(_freeze, args), *sorted((name, _freeze(value)) for name, value in kwargs.items()))
+        if self.direct and not kwargs:
+            key = (self.name, *args, *self.defaults[len(args):])
+        else:
+            values = [*args, *self.defaults[len(args):]]
+            for name, value in kwargs.items():
+                index = self.index.get(name)
+                if index is None:
+                    raise TypeError(f"{self.name}() : argument inattendu '{name}'")
+                # Les options RPC passent souvent par nom sous forme de dict : normalisées ici
+                values[index] = value if type(value) in _SCALAR_TYPES else _freeze(value)
+            if self.slot_index is not None and isinstance(values[self.slot_index], int):
+                values[self.slot_index] -= values[self.slot_index] % self.slot_bucket
+            key = (self.name, *(values if self.keep is None else [values[i] for i in self.keep]))
+        try:
+            hash(key)
+            return key
+        except TypeError:  # dict/list passé par position : normalisé
+            return tuple(map(_freeze, key))
+
+
+class _Entry(NamedTuple):
+    value: Any
+    fresh_until: float   # servi tel quel jusqu'ici
+    stale_until: float   # puis servi périmé (et rechargé en fond) jusqu'ici
+    slot: int = 0        # slot des données : contexte de la réponse RPC, sinon dernier slot connu au chargement
+    exact_slot: bool = False            # slot lu dans la réponse, pas estimé
+    accounts: tuple = ()                # comptes dont dépend la valeur
+    expires_slot: Optional[int] = None  # plus fraîche à partir de ce slot
+    updater: Optional[Callable[[Any, Dict[str, Any]], Any]] = None  # (valeur, compte notifié) -> nouvelle valeur
+
+
+class _Tags(NamedTuple):
+    """Dépendances d'une entrée vis-à-vis de la chaîne (voir BlockchainCache.get_or_load)."""
+    accounts: tuple
+    slot_ttl: Optional[int]
+    updater: Optional[Callable[[Any, Dict[str, Any]], Any]]
+
+
+class _EntryCache:
+    """
+    LRU borné d'entrées à durée de vie propre (OrderedDict : une lecture coûte un accès dict et
+    un move_to_end). Une entrée expirée est retirée à la lecture ou quand elle arrive en tête
+    d'éviction ; seules les entrées encore valides évincées faute de place sont comptées.
+    `on_remove` est appelé pour toute entrée retirée qui dépend de comptes.
+    """
+
+    def __init__(self, maxsize: int, on_remove: Callable[[Any, _Entry], None] = None):
+        self.maxsize = maxsize
+        self.evictions = 0
+        self.on_remove = on_remove
+        self._data: "OrderedDict[Any, _Entry]" = OrderedDict()
+
+    def _removed(self, key: Any, entry: _Entry):
+        if entry.accounts and self.on_remove is not None:
+            self.on_remove(key, entry)
+
+    def get(self, key: Any, now: float) -> Optional[_Entry]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        if now >= entry.stale_until:
+            del self._data[key]
+            self._removed(key, entry)
+            return None
+        self._data.move_to_end(key)
+        return entry
+
+    def peek(self, key: Any) -> Optional[_Entry]:
+        """Entrée sans effet sur l'ordre LRU ni l'expiration."""
+        return self._data.get(key)
+
+    def replace(self, key: Any, entry: _Entry):
+        """Remplace une entrée présente sans toucher à l'ordre LRU (mêmes comptes)."""
+        self._data[key] = entry
+
+    def __setitem__(self, key: Any, entry: _Entry):
+        previous = self._data.get(key)
+        self._data[key] = entry
+        self._data.move_to_end(key)
+        if previous is not None:
+            self._removed(key, previous)
+        if len(self._data) > self.maxsize:
+            evicted_key, evicted = self._data.popitem(last=False)
+            self._removed(evicted_key, evicted)
+            if evicted.stale_until > time.monotonic():
+                self.evictions += 1
+
+    def __contains__(self, key: Any) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def pop(self, key: Any, default=None):
+        entry = self._data.pop(key, None)
+        if entry is None:
+            return default
+        self._removed(key, entry)
+        return entry
+
+    def clear(self):
+        self._data.clear()
+
+
+def _context_slot(value: Any) -> Optional[int]:
+    """Slot de contexte d'une réponse RPC (`context.slot`, éventuellement sous `result`), sinon None."""
+    if not isinstance(value, dict):
+        return None
+    result = value.get("result")
+    context = value.get("context") or (result.get("context") if isinstance(result, dict) else None)
+    slot = context.get("slot") if isinstance(context, dict) else None
+    return slot if isinstance(slot, int) else None
+
 
 class BlockchainCache:
-    def __init__(self, maxsize: int = 1000, ttl: int = 60):
+    _instances: List["BlockchainCache"] = []
+
+    def __init__(self, maxsize: int = 1000, ttl: int = 60, name: str = "default", disk: DiskCache = None,
+                 pool_index: PoolIndex = None):
         """
         Cache manager pour les appels blockchain.
-        
+
         Args:
             maxsize: Nombre maximum d'éléments dans le cache
-            ttl: Temps de vie des éléments en secondes
+            ttl: Temps de vie par défaut des éléments en secondes
+            name: Libellé du cache dans les métriques
+            disk: Second niveau persistant pour les résultats immuables (voir `persist`)
+            pool_index: Index des pools par mint, servi par get_liquidity
+        """
+        self.name = name
+        self.ttl = ttl
+        self.cache = _EntryCache(maxsize, self._untag)
+        self.disk = disk
+        self.pool_index = pool_index
+        # Chargements en cours : un seul loader par clé, les autres appelants attendent son résultat
+        self._loading: Dict[Any, asyncio.Future] = {}
+        self._loading_slots: Dict[Any, int] = {}
+        # Suivi de la chaîne : dernier slot vu, entrées par compte dont elles dépendent
+        self.latest_slot = 0
+        self._by_account: Dict[str, Set[Any]] = {}
+        self._account_notified: Dict[str, float] = {}  # dernière notification par compte (instant monotone)
+        self._subscriptions = None  # SubscriptionManager une fois watch() appelé
+        self._slot_handle = None
+        self._account_handles: Dict[str, Any] = {}  # None tant que l'abonnement est en cours
+        self._pruned_at = 0
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.load_errors = 0
+        self.disk_hits = 0
+        self.invalidations = 0
+        self.account_updates = 0
+        BlockchainCache._instances.append(self)
+
+    async def get_or_load(self, key: Any, loader: Callable[[], Awaitable[Any]], ttl: float = None,
+                          stale_ttl: float = 0.0, cache_if: Callable[[Any], bool] = None,
+                          persist: Union[bool, Callable[[Any], bool]] = False, accounts: Iterable[str] = (),
+                          min_slot: int = None, slot_ttl: int = None,
+                          on_account: Callable[[Any, Dict[str, Any]], Any] = None) -> Any:
+        """
+        Valeur en cache pour `key`, sinon résultat de `loader()` mis en cache pour `ttl` secondes.
+
+        Des appels concurrents sur une même clé absente partagent un seul chargement. Avec
+        `stale_ttl`, une entrée expirée depuis moins de `stale_ttl` secondes est servie
+        immédiatement pendant qu'un rechargement part en fond. Une erreur du loader n'est
+        jamais mise en cache, ni un résultat refusé par `cache_if`.
+
+        `persist` (booléen ou prédicat sur le résultat) marque un résultat immuable : il est
+        cherché sur le disque avant le loader et y est écrit après. Les autres restent en mémoire.
+
+        Fraîcheur liée à la chaîne :
+        - `accounts` : comptes dont dépend la valeur ; une notification de l'un d'eux (voir watch)
+          invalide l'entrée, ou la met à jour via `on_account(valeur, compte)` si fourni ;
+        - `slot_ttl` : l'entrée n'est plus fraîche `slot_ttl` slots après ses données ;
+        - `min_slot` : une entrée plus ancienne que ce slot est rechargée (le loader doit alors
+          passer `minContextSlot` au RPC pour que la réponse le respecte).
+        """
+        if min_slot is not None and min_slot > self.latest_slot:
+            self.latest_slot = min_slot
+        now = time.monotonic()
+        entry = self.cache.get(key, now)
+        tags = _Tags(tuple(accounts), slot_ttl, on_account) if accounts or slot_ttl else None
+        if entry is not None and (min_slot is None or entry.slot >= min_slot):
+            if now < entry.fresh_until and (entry.expires_slot is None or self.latest_slot < entry.expires_slot):
+                self.hits += 1
+                return entry.value
+            self.stale_hits += 1
+            if key not in self._loading:
+                self._start_load(key, loader, ttl, stale_ttl, cache_if, persist, tags).add_done_callback(self._log_refresh_error)
+            return entry.value
+        task = self._loading.get(key)
+        if task is None or (min_slot is not None and self._loading_slots[key] < min_slot):
+            self.misses += 1
+            task = self._start_load(key, loader, ttl, stale_ttl, cache_if, persist, tags)
+        else:
+            self.coalesced += 1
+        # shield : l'annulation d'un appelant n'annule pas le chargement partagé avec les autres
+        return await asyncio.shield(task)
+
+    def _start_load(self, key: Any, loader, ttl: Optional[float], stale_ttl: float, cache_if,
+                    persist, tags: Optional[_Tags] = None) -> asyncio.Future:
+        slot, started = self.latest_slot, time.monotonic()
+
+        async def load():
+            if persist and self.disk is not None:
+                value = await self.disk.aget(key)
+                if value is not None:
+                    self.disk_hits += 1
+                    self._store(key, value, ttl, stale_ttl, slot=slot, tags=tags, started=started)
+                    return value
+            try:
+                value = await loader()
+            except Exception:
+                self.load_errors += 1
+                raise
+            if self._store(key, value, ttl, stale_ttl, cache_if, persist, slot, tags, started):
+                self.disk.set_later([(key, value)])
+            return value
+
+        task = asyncio.ensure_future(load())
+        self._loading[key] = task
+        self._loading_slots[key] = slot
+        task.add_done_callback(lambda done: self._forget(key, done))
+        return task
+
+    def _store(self, key: Any, value: Any, ttl: Optional[float], stale_ttl: float, cache_if=None, persist=False,
+               slot: int = None, tags: Optional[_Tags] = None, started: float = None) -> bool:
+        """Met `value` en mémoire ; retourne True si elle doit aussi être écrite sur disque (à l'appelant de le faire)."""
+        if cache_if is not None and not cache_if(value):
+            return False
+        context_slot = _context_slot(value)
+        exact = context_slot is not None
+        slot = context_slot if exact else (self.latest_slot if slot is None else slot)
+        current = self.cache.peek(key)
+        if current is not None and current.exact_slot == exact and current.slot > slot:
+            return False  # chargement dépassé par un plus récent (min_slot) : on garde le plus récent
+        fresh_until = time.monotonic() + (self.ttl if ttl is None else ttl)
+        if tags is None:
+            self.cache[key] = _Entry(value, fresh_until, fresh_until + stale_ttl, slot, exact)
+        else:
+            # Un compte notifié pendant le chargement a peut-être changé après la lecture : pas de mise en cache
+            if started is not None and any(self._account_notified.get(account, 0.0) > started for account in tags.accounts):
+                return False
+            expires_slot = None if tags.slot_ttl is None else slot + tags.slot_ttl
+            self.cache[key] = _Entry(value, fresh_until, fresh_until + stale_ttl, slot, exact, tags.accounts,
+                                     expires_slot, tags.updater)
+            self._tag(key, tags.accounts)
+        return bool(persist) and self.disk is not None and (persist is True or persist(value))
+
+    def _tag(self, key: Any, accounts: tuple):
+        for account in accounts:
+            keys = self._by_account.get(account)
+            if keys is None:
+                keys = self._by_account[account] = set()
+                if self._subscriptions is not None:
+                    self._watch_account(account)
+            keys.add(key)
+
+    def _untag(self, key: Any, entry: _Entry):
+        for account in entry.accounts:
+            keys = self._by_account.get(account)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    # L'abonnement éventuel est rendu au prochain élagage (voir on_slot)
+                    del self._by_account[account]
+
+    async def get_many_or_load(self, keys: List[Any], loader: Callable[[List[Any]], Awaitable[List[Any]]],
+                               ttl: float = None, cache_if: Callable[[Any], bool] = None,
+                               persist: Union[bool, Callable[[Any], bool]] = False) -> List[Any]:
+        """
+        Variante par lot de get_or_load (appels RPC batch) : `loader(clés manquantes)` retourne
+        les résultats dans le même ordre. Les clés déjà en mémoire ou sur disque ne sont pas
+        rechargées ; pas de mutualisation avec les chargements unitaires en cours. Le disque
+        est lu en un aller-retour et les résultats à persister y sont écrits en un seul lot.
+        """
+        now = time.monotonic()
+        results: List[Any] = [None] * len(keys)
+        missing = []
+        for index, key in enumerate(keys):
+            entry = self.cache.get(key, now)
+            if entry is not None:
+                self.hits += 1
+                results[index] = entry.value
+                continue
+            missing.append(index)
+        if missing and persist and self.disk is not None:
+            on_disk = await self.disk.aget_many([keys[index] for index in missing])
+            still_missing = []
+            for index, value in zip(missing, on_disk):
+                if value is None:
+                    still_missing.append(index)
+                    continue
+                self.disk_hits += 1
+                self._store(keys[index], value, ttl, 0.0)
+                results[index] = value
+            missing = still_missing
+        self.misses += len(missing)
+        if missing:
+            slot = self.latest_slot
+            try:
+                loaded = await loader([keys[index] for index in missing])
+            except Exception:
+                self.load_errors += 1
+                raise
+            to_persist = []
+            for index, value in zip(missing, loaded):
+                results[index] = value
+                if self._store(keys[index], value, ttl, 0.0, cache_if, persist, slot):
+                    to_persist.append((keys[index], value))
+            if to_persist:
+                self.disk.set_later(to_persist)
+        return results
+
+    def _forget(self, key: Any, task: asyncio.Future):
+        if self._loading.get(key) is task:
+            del self._loading[key]
+            del self._loading_slots[key]
+
+    def _log_refresh_error(self, task: asyncio.Future):
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning(f"Rechargement en fond du cache {self.name} en échec, valeur périmée conservée : {task.exception()}")
+
+    def on_slot(self, notification: Union[int, Dict[str, Any]]):
+        """Notification slotSubscribe (ou numéro de slot) : avance le slot courant."""
+        slot = notification.get("slot") if isinstance(notification, dict) else notification
+        if not isinstance(slot, int) or slot <= self.latest_slot:
+            return
+        self.latest_slot = slot
+        if self._subscriptions is not None and slot - self._pruned_at >= settings.CACHE_WATCH_PRUNE_SLOTS:
+            self._pruned_at = slot
+            asyncio.ensure_future(self._prune_accounts())
+
+    def on_account_update(self, account: str, notification: Dict[str, Any]):
+        """
+        Notification accountSubscribe (`{"context": {"slot"}, "value": compte}`) : les entrées
+        dépendant de `account` sont mises à jour par leur `on_account`, sinon invalidées. Une
+        notification plus ancienne que le slot exact d'une entrée est ignorée pour celle-ci.
+        """
+        slot = _context_slot(notification)
+        if slot is not None and slot > self.latest_slot:
+            self.latest_slot = slot
+        keys = self._by_account.get(account)
+        if account in self._account_handles or keys:
+            self._account_notified[account] = time.monotonic()
+        if not keys:
+            return
+        account_value = (notification or {}).get("value")
+        for key in list(keys):
+            entry = self.cache.peek(key)
+            if entry is None:
+                continue
+            if slot is not None and entry.exact_slot and slot <= entry.slot:
+                continue
+            if entry.updater is not None and account_value is not None:
+                try:
+                    value = entry.updater(entry.value, account_value)
+                except Exception as e:
+                    logger.debug(f"Mise à jour de {key} depuis {account} impossible, entrée invalidée : {e}")
+                else:
+                    new_slot = entry.slot if slot is None else slot
+                    expires_slot = None if entry.expires_slot is None else new_slot + entry.expires_slot - entry.slot
+                    self.cache.replace(key, entry._replace(value=value, slot=new_slot, exact_slot=slot is not None,
+                                                           expires_slot=expires_slot))
+                    self.account_updates += 1
+                    continue
+            self.cache.pop(key)
+            self.invalidations += 1
+
+    async def watch(self, subscription_manager):
+        """
+        Abonne le cache aux slots et aux comptes de ses entrées (au plus CACHE_MAX_WATCHED_ACCOUNTS,
+        les autres entrées restent bornées par leur TTL). Une notification perdue (file de
+        callbacks pleine, reconnexion) n'est rattrapée que par le TTL.
+        """
+        if self._subscriptions is not None:
+            return
+        self._subscriptions = subscription_manager
+        self._slot_handle = await subscription_manager.slot_subscribe(self.on_slot)
+        for account in list(self._by_account):
+            self._watch_account(account)
+        logger.info(f"Cache {self.name} : invalidation par notifications ({len(self._by_account)} comptes).")
+
+    def _watch_account(self, account: str):
+        if account in self._account_handles or len(self._account_handles) >= settings.CACHE_MAX_WATCHED_ACCOUNTS:
+            return
+        self._account_handles[account] = None
+        asyncio.ensure_future(self._subscribe_account(account))
+
+    async def _subscribe_account(self, account: str):
+        subscriptions = self._subscriptions
+        try:
+            handle = await subscriptions.account_subscribe(account, lambda result: self.on_account_update(account, result))
+        except Exception as e:
+            logger.warning(f"Cache {self.name} : abonnement au compte {account} impossible, TTL seul : {e}")
+            self._account_handles.pop(account, None)
+            return
+        if self._subscriptions is subscriptions and account in self._account_handles:
+            self._account_handles[account] = handle
+        else:  # unwatch() pendant l'abonnement
+            await subscriptions.unsubscribe(handle)
+
+    async def _prune_accounts(self):
+        """Rend les abonnements des comptes dont plus aucune entrée ne dépend."""
+        unused = [account for account, handle in self._account_handles.items()
+                  if handle is not None and account not in self._by_account]
+        for account in unused:
+            handle = self._account_handles.pop(account)
+            self._account_notified.pop(account, None)
+            await self._subscriptions.unsubscribe(handle)
+        # Comptes en attente de place sous la limite
+        for account in list(self._by_account):
+            if len(self._account_handles) >= settings.CACHE_MAX_WATCHED_ACCOUNTS:
+                break
+            self._watch_account(account)
+
+    async def unwatch(self):
+        subscriptions, self._subscriptions = self._subscriptions, None
+        if subscriptions is None:
+            return
+        handles = [handle for handle in self._account_handles.values() if handle is not None]
+        self._account_handles.clear()
+        self._account_notified.clear()
+        for handle in [self._slot_handle, *handles]:
+            await subscriptions.unsubscribe(handle)
+        self._slot_handle = None
+
+    async def get_liquidity(self, mint_address: str) -> Optional[Dict[str, Any]]:
+        """État de liquidité d'un mint (voir PoolIndex.get_liquidity), None sans index des pools."""
+        if self.pool_index is None:
+            return None
+        return await self.pool_index.get_liquidity(mint_address)
+
+    def invalidate(self, key: Any):
+        self.cache.pop(key, None)
+
+    def clear(self):
+        self.cache.clear()
+        self._by_account.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self.cache), "hits": self.hits, "stale_hits": self.stale_hits, "misses": self.misses,
+            "coalesced": self.coalesced, "load_errors": self.load_errors, "evictions": self.cache.evictions,
+            "loading": len(self._loading), "disk_hits": self.disk_hits, "invalidations": self.invalidations,
+            "account_updates": self.account_updates, "watched_accounts": len(self._account_handles),
+            "latest_slot": self.latest_slot,
+        }
+
+    def cache_rpc_call(self, func=None, *, ttl: float = None, stale_ttl: float = 0.0, cache_if=None,
+                       persist=False, exclude: Iterable[str] = (), slot_bucket: int = None,
+                       account_args: Iterable[str] = (), slot_ttl: int = None, on_account=None):
         """
-        self.cache = TTLCache(maxsize=maxsize, ttl=ttl)
-        
-    def cache_rpc_call(self, func):
-        """Décorateur pour mettre en cache les appels RPC."""
-        @wraps(func)
-        async def wrapper(*args, **kwargs):
-            key = self._generate_cache_key(func.__name__, args, kwargs)
-            if key in self.cache:
-                return self.cache[key]
-            
-            result = await func(*args, **kwargs)
-            self.cache[key] = result
-            return result
-        
-        return wrapper
-    
-    def _generate_cache_key(self, func_name: str, args: tuple, kwargs: dict) -> str:
-        return f"{func_name}_{str(args)}_{str(kwargs)}"
+        Décorateur pour mettre en cache les appels RPC d'une fonction dans ce cache.
+        `account_args` nomme les paramètres contenant les comptes dont dépend le résultat ;
+        l'appelant peut exiger des données d'au moins un slot avec `cache_min_slot=`.
+        """
+        def decorate(func):
+            make_key = CacheKey(func, exclude, slot_bucket)
+            make_key.check(account_args, "comptes")
+
+            @wraps(func)
+            async def wrapper(*args, cache_min_slot: int = None, **kwargs):
+                key = make_key(args, kwargs)
+                accounts = make_key.arguments(args, kwargs, account_args) if account_args else ()
+                return await self.get_or_load(key, lambda: func(*args, **kwargs), ttl, stale_ttl, cache_if, persist,
+                                              accounts, cache_min_slot, slot_ttl, on_account)
+            return wrapper
+
+        return decorate(func) if func is not None else decorate
+
+    @staticmethod
+    def cached_method(ttl: float = None, stale_ttl: float = 0.0, cache_if=None, persist=False,
+                      cache_attr: str = "cache", exclude: Iterable[str] = (), slot_bucket: int = None,
+                      account_args: Iterable[str] = (), slot_ttl: int = None, on_account=None):
+        """
+        Décorateur de méthode : le cache est celui de l'instance (attribut `cache_attr`), résolu
+        à chaque appel. L'instance ne fait pas partie de la clé (voir CacheKey). Mêmes options
+        de fraîcheur que cache_rpc_call.
+        """
+        def decorate(func):
+            make_key = CacheKey(func, exclude, slot_bucket, bound=True)
+            make_key.check(account_args, "comptes")
+
+            @wraps(func)
+            async def wrapper(instance, *args, cache_min_slot: int = None, **kwargs):
+                cache: BlockchainCache = getattr(instance, cache_attr)
+                key = make_key(args, kwargs)
+                accounts = make_key.arguments(args, kwargs, account_args) if account_args else ()
+                return await cache.get_or_load(
+                    key, lambda: func(instance, *args, **kwargs), ttl, stale_ttl, cache_if, persist,
+                    accounts, cache_min_slot, slot_ttl, on_account
+                )
+            return wrapper
+
+        return decorate
+
+
+def _cache_metric(field: str):
+    return lambda: {metrics.labels(cache=cache.name): cache.stats()[field] for cache in BlockchainCache._instances}
+
+
+for _field, _help in (("hits", "Lectures servies fraîches"), ("stale_hits", "Lectures servies périmées (rechargement en fond)"),
+                      ("misses", "Lectures sans entrée, chargées"), ("coalesced", "Lectures jointes à un chargement en cours"),
+                      ("evictions", "Entrées évincées faute de place"), ("load_errors", "Chargements en erreur"),
+                      ("disk_hits", "Lectures servies par le cache disque"),
+                      ("invalidations", "Entrées invalidées par une notification de compte"),
+                      ("account_updates", "Entrées mises à jour depuis une notification de compte")):
+    metrics.register_callback(f"blockchain_cache_{_field}_total", _cache_metric(_field), "counter", _help)
+metrics.register_callback("blockchain_cache_size", _cache_metric("size"), help_text="Entrées en cache")
+metrics.register_callback("blockchain_cache_watched_accounts", _cache_metric("watched_accounts"),
+                          help_text="Comptes suivis par accountSubscribe pour l'invalidation")
+
+
+def _has_result(response: Optional[Dict[str, Any]]) -> bool:
+    return bool(response and response.get("result"))
+
+
+async def fetch_transactions(cache: BlockchainCache, rpc_url: str, signatures: List[str], encoding: str = "json",
+                             priority: int = RPCPriority.ANALYTICS) -> List[Optional[Dict[str, Any]]]:
+    """
+    Réponses getTransaction (commitment par défaut : finalized) alignées sur `signatures`. Seules
+    les signatures absentes du cache partent en batch RPC ; une transaction finalisée ne change
+    plus, elle est donc persistée sur le disque.
+    """
+    keys = [("getTransaction", signature, encoding) for signature in signatures]
+    return await cache.get_many_or_load(
+        keys,
+        lambda missing: call_solana_rpc_batch(
+            rpc_url, [("getTransaction", [key[1], {"encoding": encoding}]) for key in missing], priority=priority
+        ),
+        ttl=3600, cache_if=_has_result, persist=True,
+    )
+
+
+def _parsed_account_info(info: Dict[str, Any], account: Dict[str, Any]) -> Dict[str, Any]:
+    """Nouvelles infos d'un compte depuis sa notification jsonParsed (erreur : l'entrée est invalidée)."""
+    data = account.get("data")
+    if not isinstance(data, dict):
+        raise ValueError("compte non parsé")
+    return data.get("parsed", {}).get("info", {})
+
+
+def _is_frozen_mint(info: Dict[str, Any]) -> bool:
+    """Mint sans autorité de mint ni de gel : ses autorités ne peuvent plus changer (sa supply si, par brûlage)."""
+    return bool(info) and info.get("mintAuthority") is None and info.get("freezeAuthority") is None
+
+
+# Champs du compte mint qui ne changent plus une fois le mint figé (la supply, elle, baisse à chaque brûlage)
+_MINT_STATIC_FIELDS = ("decimals", "isInitialized", "mintAuthority", "freezeAuthority")
+
+
+def _mint_metadata(info: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: info[field] for field in _MINT_STATIC_FIELDS if field in info}
+
+
+def _parsed_mint_metadata(metadata: Dict[str, Any], account: Dict[str, Any]) -> Dict[str, Any]:
+    return _mint_metadata(_parsed_account_info(metadata, account))
+
+
+def _parsed_mint_supply(supply: Optional[str], account: Dict[str, Any]) -> str:
+    info = _parsed_account_info(supply, account)
+    if "supply" not in info:
+        raise ValueError("supply absente")
+    return info["supply"]
+
 
 class TokenAnalyzer:
     def __init__(self, rpc_url: str, cache_manager: BlockchainCache):
         self.rpc_url = rpc_url
         self.cache = cache_manager
-        
+
     async def analyze_token(self, mint_address: str) -> Dict[str, Any]:
-        token_info = await self._get_token_info(mint_address)
-        liquidity = await self._get_liquidity_info(mint_address)
-        volume = await self._get_volume_info(mint_address)
-        
+        token_info, liquidity, volume = await asyncio.gather(
+            self._get_token_info(mint_address),
+            self._get_liquidity_info(mint_address),
+            self._get_volume_info(mint_address),
+        )
+
         return {
             "token_info": token_info,
             "liquidity": liquidity,
             "volume": volume,
             "analysis_timestamp": time.time()
         }
-    
-    @BlockchainCache.cache_rpc_call
-    async def _get_token_info(self, mint_address: str) -> Dict[str, Any]:
-        """Récupère les informations de base du token."""
-        # Implémentation existante
-        pass
-    
-    @BlockchainCache.cache_rpc_call
-    async def _get_liquidity_info(self, mint_address: str) -> Dict[str, Any]:
-        """Analyse la liquidité du token."""
-        # Nouvelle implémentation
-        pass
-    
-    @BlockchainCache.cache_rpc_call
+
+    async def _get_token_info(self, mint_address: str, cache_min_slot: int = None) -> Dict[str, Any]:
+        """Récupère les informations de base du token (compte mint : supply, décimales, autorités)."""
+        metadata, supply = await asyncio.gather(
+            self._get_mint_metadata(mint_address, cache_min_slot=cache_min_slot),
+            self._get_token_supply(mint_address, cache_min_slot=cache_min_slot),
+        )
+        if not metadata:
+            return {}
+        return {**metadata, "supply": supply} if supply is not None else dict(metadata)
+
+    # Un mint trop récent pour le nœud (compte absent) n'est pas mis en cache. Seuls les champs
+    # immuables d'un mint figé sont persistés ; la supply reste en mémoire. Une notification du
+    # compte mint met les deux entrées à jour sans nouvel appel RPC.
+    @BlockchainCache.cached_method(ttl=300, stale_ttl=300, cache_if=bool, persist=_is_frozen_mint,
+                                   account_args=("mint_address",), on_account=_parsed_mint_metadata)
+    async def _get_mint_metadata(self, mint_address: str) -> Dict[str, Any]:
+        """Décimales et autorités du mint."""
+        response = await call_solana_rpc(
+            self.rpc_url, "getAccountInfo", [mint_address, {"encoding": "jsonParsed", "commitment": "confirmed"}],
+            priority=RPCPriority.ANALYTICS
+        )
+        value = ((response or {}).get("result") or {}).get("value") or {}
+        data = value.get("data")
+        if not isinstance(data, dict):
+            return {}
+        return _mint_metadata(data.get("parsed", {}).get("info", {}))
+
+    @BlockchainCache.cached_method(ttl=300, stale_ttl=300, cache_if=lambda supply: supply is not None,
+                                   account_args=("mint_address",), on_account=_parsed_mint_supply)
+    async def _get_token_supply(self, mint_address: str) -> Optional[str]:
+        """Supply brute du mint (unités de base, chaîne comme dans le compte parsé)."""
+        response = await call_solana_rpc(
+            self.rpc_url, "getTokenSupply", [mint_address, {"commitment": "confirmed"}],
+            priority=RPCPriority.ANALYTICS
+        )
+        return (((response or {}).get("result") or {}).get("value") or {}).get("amount")
+
+    async def _get_liquidity_info(self, mint_address: str) -> Optional[Dict[str, Any]]:
+        """Analyse la liquidité du token : lecture de l'index des pools, tenu à jour par notifications."""
+        return await self.cache.get_liquidity(mint_address)
+
+    @BlockchainCache.cached_method(ttl=30, stale_ttl=30)
     async def _get_volume_info(self, mint_address: str) -> Dict[str, Any]:
         """Analyse le volume de trading."""
         # Nouvelle implémentation
@@ -0,0 +1,147 @@
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+from ..config.settings import settings
+from ..utils.metrics import metrics
+from .rpc_client import call_solana_rpc
+from .rpc_limiter import RPCPriority
+
+COMMITMENT_LEVELS = {"processed": 0, "confirmed": 1, "finalized": 2}
+
+GATE_CONFIRMED = "confirmed"
+GATE_DROPPED = "dropped"    # slot abandonné sur un fork : la transaction n'existe plus
+GATE_FAILED = "failed"      # transaction incluse mais en erreur
+GATE_TIMEOUT = "timeout"
+
+metrics.describe("commitment_gate_resolved_total", "Transactions suivies par la porte de commitment, par issue")
+metrics.describe("commitment_gate_wait_ms", "Attente entre la notification et la commitment demandée (ms)")
+
+
+def commitment_rank(level: str) -> int:
+    return COMMITMENT_LEVELS.get(level, COMMITMENT_LEVELS["finalized"])
+
+
+class CommitmentGate:
+    """
+    Attend qu'une transaction vue à `processed` atteigne une commitment donnée.
+
+    Toutes les signatures en attente sont vérifiées ensemble par un seul getSignatureStatuses
+    à chaque tick (voie TRADING). Une transaction encore inconnue alors que la chaîne a atteint
+    la commitment demandée au-delà de son slot est considérée comme perdue sur un fork.
+    """
+
+    def __init__(self, rpc_url: str, poll_interval: float = None, timeout: float = None,
+                 fork_margin: int = None, max_pending: int = None):
+        self.rpc_url = rpc_url
+        self.poll_interval = poll_interval or settings.COMMITMENT_GATE_POLL_INTERVAL
+        self.timeout = timeout or settings.COMMITMENT_GATE_TIMEOUT
+        self.fork_margin = settings.COMMITMENT_GATE_FORK_MARGIN if fork_margin is None else fork_margin
+        self.max_pending = max_pending or settings.COMMITMENT_GATE_MAX_PENDING
+        # (signature, commitment) -> (slot, instant d'entrée, future)
+        self._pending: Dict[Tuple[str, str], Tuple[int, float, asyncio.Future]] = {}
+        self._poller: Optional[asyncio.Task] = None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def watch(self, signature: str, slot: int, level: str) -> asyncio.Future:
+        """Future résolue à True quand la transaction atteint `level`, False si elle est perdue."""
+        loop = asyncio.get_running_loop()
+        key = (signature, level)
+        if key in self._pending:
+            return self._pending[key][2]
+        future = loop.create_future()
+        if commitment_rank(level) <= COMMITMENT_LEVELS["processed"]:
+            future.set_result(True)
+            return future
+        if len(self._pending) >= self.max_pending:
+            logger.warning(f"Porte de commitment saturée ({self.max_pending}), {signature} non suivie.")
+            self._record(level, GATE_TIMEOUT, 0.0)
+            future.set_result(False)
+            return future
+        self._pending[key] = (slot, time.monotonic(), future)
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.create_task(self._poll())
+        return future
+
+    def _record(self, level: str, outcome: str, waited: float):
+        metrics.inc("commitment_gate_resolved_total", metrics.labels(level=level, outcome=outcome))
+        metrics.observe("commitment_gate_wait_ms", waited * 1000, metrics.labels(level=level))
+
+    def _resolve(self, key: Tuple[str, str], outcome: str):
+        slot, started, future = self._pending.pop(key)
+        self._record(key[1], outcome, time.monotonic() - started)
+        if outcome != GATE_CONFIRMED:
+            logger.info(f"Transaction {key[0]} (slot {slot}) non retenue à {key[1]} : {outcome}.")
+        if not future.done():
+            future.set_result(outcome == GATE_CONFIRMED)
+
+    async def _poll(self):
+        while self._pending:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self._tick()
+            except Exception as e:
+                logger.warning(f"Erreur de la porte de commitment : {e}")
+
+    async def _tick(self):
+        keys = list(self._pending)
+        signatures = list(dict.fromkeys(signature for signature, _ in keys))
+        statuses: Dict[str, Optional[dict]] = {}
+        for i in range(0, len(signatures), 256):  # limite de getSignatureStatuses
+            chunk = signatures[i:i + 256]
+            resp = await call_solana_rpc(
+                self.rpc_url, "getSignatureStatuses", [chunk, {"searchTransactionHistory": False}],
+                priority=RPCPriority.TRADING
+            )
+            values = ((resp or {}).get("result") or {}).get("value") or [None] * len(chunk)
+            statuses.update(zip(chunk, values))
+        heads: Dict[str, Optional[int]] = {}
+        now = time.monotonic()
+        for key in keys:
+            if key not in self._pending:
+                continue
+            signature, level = key
+            slot, started, _ = self._pending[key]
+            status = statuses.get(signature)
+            if status is not None and status.get("err"):
+                self._resolve(key, GATE_FAILED)
+            elif status is not None and \
+                    commitment_rank(status.get("confirmationStatus") or "processed") >= commitment_rank(level):
+                self._resolve(key, GATE_CONFIRMED)
+            elif status is None and await self._head_passed(level, slot, heads):
+                self._resolve(key, GATE_DROPPED)
+            elif now - started >= self.timeout:
+                self._resolve(key, GATE_TIMEOUT)
+
+    async def _head_passed(self, level: str, slot: int, heads: Dict[str, Optional[int]]) -> bool:
+        """Vrai si la chaîne a atteint `level` nettement au-delà de `slot` (un getSlot par tick et par niveau)."""
+        if level not in heads:
+            resp = await call_solana_rpc(self.rpc_url, "getSlot", [{"commitment": level}],
+                                         priority=RPCPriority.TRADING)
+            heads[level] = (resp or {}).get("result")
+        return heads[level] is not None and heads[level] > slot + self.fork_margin
+
+    async def stop(self):
+        if self._poller is not None:
+            self._poller.cancel()
+        for key in list(self._pending):
+            self._resolve(key, GATE_TIMEOUT)
+
+
+_gates: List[CommitmentGate] = []
+
+
+def get_commitment_gate(rpc_url: str) -> CommitmentGate:
+    for gate in _gates:
+        if gate.rpc_url == rpc_url:
+            return gate
+    gate = CommitmentGate(rpc_url)
+    _gates.append(gate)
+    return gate
+
+
+metrics.register_callback("commitment_gate_pending", lambda: sum(gate.pending for gate in _gates),
+                          help_text="Transactions en attente de commitment")
@@ -1,47 +1,74 @@
 import asyncio
 from loguru import logger
-from typing import Dict, Set, Optional
-from ..database.db import DatabaseManager, Token, Creator, Investment
+from typing import Any, Dict, Set, Optional
+from ..database.db import DatabaseManager, Token, Creator
+from .subscription_manager import SubscriptionHandle, SubscriptionManager, get_subscription_manager
 
 class CreatorMonitor:
-    def __init__(self, database_url: str, rpc_url: str):
-        self.db_manager = DatabaseManager(database_url)
+    def __init__(self, database_url: str, rpc_url: str, subscription_manager: Optional[SubscriptionManager] = None,
+                 db_manager: Optional[DatabaseManager] = None):
+        self.db_manager = db_manager or DatabaseManager(database_url)
         self.rpc_url = rpc_url
+        self.subscription_manager = subscription_manager or get_subscription_manager()
         self.watched_creators: Dict[str, Set[str]] = {}  # {creator_address: {associated_addresses}}
-        self._monitor_task = None
+        self.invested_tokens: Set[str] = set()  # alimenté par on_trade (hook du module de décision)
+        self._subscriptions: Dict[str, SubscriptionHandle] = {}  # {adresse surveillée: abonnement logs}
+        self._update_lock: Optional[asyncio.Lock] = None
+        self._update_tasks: Set[asyncio.Task] = set()  # mises à jour lancées par on_trade, gardées jusqu'à leur fin
         
-    async def start_monitoring(self, interval: int = 30):
-        """Démarre la surveillance des créateurs."""
-        if self._monitor_task is None or self._monitor_task.done():
-            self._monitor_task = asyncio.create_task(self._monitor_loop(interval))
-            logger.info("Monitoring des créateurs démarré.")
-            
-    async def _monitor_loop(self, interval: int):
-        """Boucle principale de surveillance."""
-        while True:
-            try:
-                await self._update_watched_creators()
-                await self._monitor_transactions()
-                await asyncio.sleep(interval)
-            except Exception as e:
-                logger.error(f"Erreur lors de la surveillance: {e}")
-                await asyncio.sleep(interval)
+    async def start_monitoring(self):
+        """Démarre la surveillance des créateurs (abonnements logsSubscribe, sans polling)."""
+        await self._update_watched_creators()
+        logger.info("Monitoring des créateurs démarré.")
+
+    async def stop_monitoring(self):
+        """Résilie tous les abonnements de surveillance."""
+        for task in list(self._update_tasks):
+            task.cancel()
+        for handle in self._subscriptions.values():
+            await self.subscription_manager.unsubscribe(handle)
+        self._subscriptions.clear()
+
+    def on_trade(self, action: str, token_mint_address: str, price: float):
+        """Hook du module de décision : les créateurs des tokens détenus sont surveillés."""
+        if action == "buy":
+            self.invested_tokens.add(token_mint_address)
+        elif action == "sell":
+            self.invested_tokens.discard(token_mint_address)
+        else:
+            return
+        task = asyncio.create_task(self._update_watched_creators())
+        self._update_tasks.add(task)
+        task.add_done_callback(self._update_done)
+
+    def _update_done(self, task: asyncio.Task):
+        self._update_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Erreur de mise à jour des créateurs surveillés : {task.exception()}")
     
     async def _update_watched_creators(self):
-        """Met à jour la liste des créateurs à surveiller."""
-        with self.db_manager.SessionLocal() as db:
-            # Récupérer tous les créateurs associés aux tokens sur lesquels nous avons investi
-            investments = db.query(Investment).all()
-            token_addresses = {i.token_address for i in investments}
-            
-            # Récupérer les créateurs associés à ces tokens
-            creators = db.query(Creator).join(Token).filter(Token.mint_address.in_(token_addresses)).all()
-            
+        """Met à jour la liste des créateurs à surveiller et les abonnements correspondants."""
+        if self._update_lock is None:
+            self._update_lock = asyncio.Lock()
+        async with self._update_lock:
+            with self.db_manager.SessionLocal() as db:
+                # Récupérer les créateurs associés aux tokens sur lesquels nous avons investi
+                creators = db.query(Creator).join(Token).filter(Token.mint_address.in_(self.invested_tokens)).all() \
+                    if self.invested_tokens else []
+                creator_addresses = [creator.address for creator in creators]
+
             # Mettre à jour la liste des créateurs surveillés
             self.watched_creators = {
-                creator.address: await self._get_associated_addresses(creator.address)
-                for creator in creators
+                address: await self._get_associated_addresses(address)
+                for address in creator_addresses
             }
+            addresses = set().union(*self.watched_creators.values()) if self.watched_creators else set()
+            for address in addresses - self._subscriptions.keys():
+                self._subscriptions[address] = await self.subscription_manager.logs_subscribe(
+                    address, lambda notification, address=address: self._check_creator_activity(address, notification)
+                )
+            for address in self._subscriptions.keys() - addresses:
+                await self.subscription_manager.unsubscribe(self._subscriptions.pop(address))
     
     async def _get_associated_addresses(self, creator_address: str) -> Set[str]:
         """Récupère les adresses associées à un créateur."""
@@ -49,17 +76,12 @@ class CreatorMonitor:
         # Par exemple, en analysant les transactions récentes
         return {creator_address}  # À implémenter
     
-    async def _monitor_transactions(self):
-        """Surveille les transactions des créateurs surveillés."""
-        for creator_address, associated_addresses in self.watched_creators.items():
-            for address in associated_addresses:
-                await self._check_creator_activity(address)
-    
-    async def _check_creator_activity(self, address: str):
-        """Vérifie l'activité d'une adresse créateur."""
-        # Implémenter la logique de surveillance des transactions
-        # Par exemple, en utilisant RPC pour récupérer les transactions récentes
-        pass
+    async def _check_creator_activity(self, address: str, notification: Dict[str, Any]):
+        """Traite une transaction mentionnant une adresse créateur (notification logsSubscribe)."""
+        value = (notification or {}).get("value") or {}
+        if value.get("err"):
+            return
+        logger.info(f"Activité du créateur surveillé {address} : transaction {value.get('signature')}")
     
     async def analyze_creator_behavior(self, creator_address: str) -> Dict[str, Any]:
         """Analyse le comportement d'un créateur."""
@@ -1,25 +1,33 @@
 import asyncio
 from loguru import logger
 from ..database.db import DatabaseManager, LinkedAccount, Creator, Transaction
+from .cache_manager import BlockchainCache, fetch_transactions
+from .disk_cache import get_disk_cache
 from .rpc_client import call_solana_rpc
+from .rpc_limiter import RPCPriority
 
 class CreatorTracker:
-    def __init__(self, database_url: str, rpc_url: str):
-        self.db_manager = DatabaseManager(database_url)
+    def __init__(self, database_url: str, rpc_url: str, cache: BlockchainCache = None,
+                 db_manager: DatabaseManager = None):
+        self.db_manager = db_manager or DatabaseManager(database_url)
         self.rpc_url = rpc_url
+        # Transactions finalisées : immuables, persistées sur disque entre deux redémarrages
+        self.cache = cache or BlockchainCache(maxsize=5000, ttl=3600, name="creator_tracker", disk=get_disk_cache())
 
     async def track(self, creator_address: str, mint_address: str):
         logger.info(f"Tracking les transactions du créateur {creator_address} pour le token {mint_address}")
         # Récupérer les signatures de transactions du créateur
-        resp = await call_solana_rpc(self.rpc_url, "getSignaturesForAddress", [creator_address, {"limit": 100}])
+        resp = await call_solana_rpc(self.rpc_url, "getSignaturesForAddress", [creator_address, {"limit": 100}], priority=RPCPriority.ANALYTICS)
         if not resp or not resp.get("result"):
             logger.warning(f"Aucune transaction trouvée pour {creator_address}")
             return
         signatures = [tx['signature'] for tx in resp['result']]
         linked_accounts = set()
-        for signature in signatures:
-            tx_resp = await call_solana_rpc(self.rpc_url, "getTransaction", [signature, {"encoding": "json"}])
+        tx_responses = await fetch_transactions(self.cache, self.rpc_url, signatures, priority=RPCPriority.ANALYTICS)
+        for signature, tx_resp in zip(signatures, tx_responses):
             if not tx_resp or not tx_resp.get("result"):
+                if tx_resp and tx_resp.get("error"):
+                    logger.warning(f"getTransaction {signature} en échec : {tx_resp['error']}")
                 continue
             tx = tx_resp["result"]
             # Parcourir les instructions pour détecter des transferts
@@ -0,0 +1,195 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from loguru import logger
+from ..config.settings import settings
+from ..utils.metrics import metrics
+
+# Une lecture ne réécrit la date d'accès (ordre d'éviction) que si elle date de plus que ça
+TOUCH_INTERVAL = 3600.0
+
+
+class DiskCache:
+    """
+    Second niveau de BlockchainCache : SQLite local (WAL) pour les résultats immuables
+    (transactions finalisées, mints sans autorité...), qui survivent aux redémarrages.
+
+    Clés et valeurs sont stockées en JSON ; une valeur non sérialisable n'est simplement pas
+    persistée. Quand le fichier dépasse `max_bytes` de données, les entrées les moins récemment
+    lues sont supprimées jusqu'à revenir à 90 % de la limite.
+
+    Depuis la boucle asyncio, SQLite n'est touché que dans un thread dédié : `aget`/`aget_many`
+    attendent la lecture, `set_later` soumet un lot d'écritures (une transaction) sans
+    l'attendre. Le thread est unique, les opérations s'exécutent donc dans l'ordre de soumission.
+    """
+
+    def __init__(self, path: str, max_bytes: int = None):
+        self.path = path
+        self.max_bytes = max_bytes or settings.CACHE_DISK_MAX_MB * 1024 * 1024
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "size INTEGER NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        self.total_bytes, self.entries = self._db.execute("SELECT COALESCE(SUM(size), 0), COUNT(*) FROM entries").fetchone()
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="disk-cache")
+        logger.info(f"Cache disque {path} : {self.entries} entrées, {self.total_bytes / 1e6:.1f} Mo.")
+
+    @staticmethod
+    def _encode_key(key: Any) -> Optional[str]:
+        try:
+            return json.dumps(key, separators=(",", ":"))
+        except (TypeError, ValueError):
+            return None
+
+    def get(self, key: Any) -> Optional[Any]:
+        """Valeur persistée pour `key`, None si absente (None n'est jamais persisté)."""
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: List[Any]) -> List[Optional[Any]]:
+        """Valeurs persistées, dans l'ordre de `keys` ; les dates d'accès sont rafraîchies en une transaction."""
+        now = time.time()
+        values: List[Optional[Any]] = []
+        touched = []
+        for key in keys:
+            encoded = self._encode_key(key)
+            row = self._db.execute("SELECT value, accessed FROM entries WHERE key = ?", (encoded,)).fetchone() \
+                if encoded is not None else None
+            if row is None:
+                self.misses += 1
+                values.append(None)
+                continue
+            self.hits += 1
+            if now - row[1] > TOUCH_INTERVAL:
+                touched.append((now, encoded))
+            values.append(json.loads(row[0]))
+        if touched:
+            with self._db:
+                self._db.executemany("UPDATE entries SET accessed = ? WHERE key = ?", touched)
+        return values
+
+    def set(self, key: Any, value: Any):
+        self.set_many([(key, value)])
+
+    def set_many(self, items: Iterable[Tuple[Any, Any]]):
+        """Écrit un lot d'entrées en une seule transaction (valeurs None ou non sérialisables ignorées)."""
+        rows = []
+        for key, value in items:
+            if value is None:
+                continue
+            encoded = self._encode_key(key)
+            if encoded is None:
+                continue
+            try:
+                payload = json.dumps(value, separators=(",", ":"))
+            except (TypeError, ValueError):
+                logger.debug(f"Valeur non sérialisable pour {encoded}, non persistée.")
+                continue
+            rows.append((encoded, payload, len(encoded) + len(payload)))
+        if not rows:
+            return
+        now = time.time()
+        with self._db:
+            for encoded, payload, size in rows:
+                previous = self._db.execute("SELECT size FROM entries WHERE key = ?", (encoded,)).fetchone()
+                self._db.execute("INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                                 (encoded, payload, size, now))
+                if previous is None:
+                    self.entries += 1
+                self.total_bytes += size - (previous[0] if previous else 0)
+                self.writes += 1
+        if self.total_bytes > self.max_bytes:
+            self._evict(self.total_bytes - int(self.max_bytes * 0.9))
+
+    async def aget(self, key: Any) -> Optional[Any]:
+        return (await self.aget_many([key]))[0]
+
+    async def aget_many(self, keys: List[Any]) -> List[Optional[Any]]:
+        """get_many dans le thread du cache disque ; une erreur SQLite compte comme une absence."""
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, self.get_many, keys)
+        except sqlite3.Error as e:
+            logger.warning(f"Lecture du cache disque en échec : {e}")
+            return [None] * len(keys)
+
+    def set_later(self, items: List[Tuple[Any, Any]]) -> Optional[Future]:
+        """Soumet un lot d'écritures au thread du cache disque, sans attendre."""
+        if not items:
+            return None
+        future = self._executor.submit(self.set_many, items)
+        future.add_done_callback(self._log_write_error)
+        return future
+
+    @staticmethod
+    def _log_write_error(future: Future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.warning(f"Écriture du cache disque en échec : {future.exception()}")
+
+    def _evict(self, excess: int):
+        freed = count = 0
+        keys = []
+        for key, size in self._db.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            keys.append((key,))
+            freed += size
+            count += 1
+            if freed >= excess:
+                break
+        with self._db:
+            self._db.executemany("DELETE FROM entries WHERE key = ?", keys)
+        self.total_bytes -= freed
+        self.entries -= count
+        self.evictions += count
+        logger.info(f"Cache disque plein : {count} entrées supprimées ({freed / 1e6:.1f} Mo).")
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": self.entries, "bytes": self.total_bytes, "hits": self.hits, "misses": self.misses,
+                "writes": self.writes, "evictions": self.evictions}
+
+    def close(self):
+        # Les écritures déjà soumises sont terminées avant la fermeture
+        self._executor.shutdown(wait=True)
+        self._db.close()
+
+
+_disk_cache: Optional[DiskCache] = None
+
+
+def get_disk_cache() -> Optional[DiskCache]:
+    """Cache disque partagé, None si CACHE_DISK_PATH est vide."""
+    global _disk_cache
+    if _disk_cache is None and settings.CACHE_DISK_PATH:
+        try:
+            _disk_cache = DiskCache(settings.CACHE_DISK_PATH)
+        except sqlite3.Error as e:
+            logger.error(f"Cache disque {settings.CACHE_DISK_PATH} inutilisable, mémoire seule : {e}")
+            settings.CACHE_DISK_PATH = ""
+    return _disk_cache
+
+
+def close_disk_cache():
+    global _disk_cache
+    if _disk_cache is not None:
+        _disk_cache.close()
+        _disk_cache = None
+
+
+metrics.register_callback("blockchain_disk_cache_bytes", lambda: _disk_cache.total_bytes if _disk_cache else 0,
+                          help_text="Données stockées dans le cache disque")
+metrics.register_callback("blockchain_disk_cache_hits_total", lambda: _disk_cache.hits if _disk_cache else 0,
+                          "counter", "Lectures servies par le cache disque")
+metrics.register_callback("blockchain_disk_cache_evictions_total", lambda: _disk_cache.evictions if _disk_cache else 0,
+                          "counter", "Entrées supprimées du cache disque faute de place")
@@ -0,0 +1,174 @@
+import abc
+import asyncio
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from loguru import logger
+from ..config.settings import settings
+from ..utils.metrics import metrics
+from .block_decoder import BlockDecoder
+from .block_fetcher import BlockFetcher
+from .rpc_client import call_solana_rpc
+
+metrics.describe("ingest_events_total", "Événements de transaction par source d'ingestion et issue (first, duplicate, upgrade)")
+metrics.describe("ingest_source_lag_ms", "Retard d'une source sur la première source ayant vu la même signature")
+
+TransactionEvent = Dict[str, Any]
+EmitFn = Callable[[TransactionEvent], Awaitable[None]]
+
+
+def transaction_event(source: str, signature: str, slot: Optional[int], commitment: str,
+                      mint: Optional[str] = None, creator: Optional[str] = None) -> TransactionEvent:
+    """Événement normalisé, identique quelle que soit la source (logs WebSocket, blocs, shreds)."""
+    return {
+        "source": source, "signature": signature, "slot": slot, "commitment": commitment,
+        "mint": mint, "creator": creator, "received_at": asyncio.get_event_loop().time(),
+    }
+
+
+class IngestSource(abc.ABC):
+    """
+    Source d'ingestion : `run(emit)` tourne jusqu'à annulation et appelle `emit` pour chaque
+    transaction pertinente (création de mint). Chaque source gère ses propres reconnexions.
+    """
+
+    name = "source"
+    commitment = "processed"  # niveau des transactions émises
+
+    @abc.abstractmethod
+    async def run(self, emit: EmitFn):
+        ...
+
+
+class WebSocketLogsSource(IngestSource):
+    """logsSubscribe du WebSocketListener (connexion supervisée, rattrapage après coupure)."""
+
+    name = "websocket"
+
+    def __init__(self, listener):
+        self.listener = listener
+        self.commitment = listener.subscribe_commitment
+
+    async def run(self, emit: EmitFn):
+        self.listener.emit = emit
+        await self.listener._listen_for_notifications()
+
+
+class BlockPollingSource(IngestSource):
+    """Suit la tête de chaîne par getSlot + getBlock (confirmed) et émet les InitializeMint des blocs."""
+
+    name = "blocks"
+    commitment = "confirmed"
+
+    def __init__(self, rpc_url: str, decoder: BlockDecoder = None, interval: float = None):
+        self.rpc_url = rpc_url
+        self.interval = settings.INGEST_BLOCK_POLL_INTERVAL if interval is None else interval
+        self.fetcher = BlockFetcher(rpc_url, decoder=decoder, commitment=self.commitment)
+        self.last_slot: Optional[int] = None
+
+    async def _head(self) -> Optional[int]:
+        resp = await call_solana_rpc(self.rpc_url, "getSlot", [{"commitment": self.commitment}])
+        return resp.get("result") if resp else None
+
+    async def run(self, emit: EmitFn):
+        async def on_block(slot: int, records: List[Dict[str, Any]]):
+            for record in records:
+                if record["type"] == "mint_init":
+                    await emit(transaction_event(self.name, record["signature"], slot, self.commitment,
+                                                 mint=record["mint"], creator=record["creator"]))
+
+        while True:
+            try:
+                head = await self._head()
+                if head is not None:
+                    if self.last_slot is None:
+                        self.last_slot = head - 1
+                    elif head - self.last_slot > settings.WS_GAP_FILL_MAX_SLOTS:
+                        logger.warning(f"Source blocs : {head - self.last_slot} slots de retard, reprise au slot "
+                                       f"{head - settings.WS_GAP_FILL_MAX_SLOTS + 1}.")
+                        self.last_slot = head - settings.WS_GAP_FILL_MAX_SLOTS
+                    if head > self.last_slot:
+                        self.last_slot = await self.fetcher.run(self.last_slot + 1, head, on_block)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erreur de la source blocs : {e}")
+            await asyncio.sleep(self.interval)
+
+
+class IngestHub:
+    """
+    Fusionne plusieurs sources empilées : une signature n'est transmise qu'une fois au handler,
+    par la source la plus rapide. Exception : si le premier événement n'avait pas de mint (ligne
+    de log sans adresse), le premier qui en apporte un passe aussi, marqué `upgrade`.
+    """
+
+    def __init__(self, handler: EmitFn, dedup_size: int = None):
+        self.handler = handler
+        self.dedup_size = settings.INGEST_DEDUP_SIZE if dedup_size is None else dedup_size
+        self.sources: List[IngestSource] = []
+        self._seen: "OrderedDict[str, tuple]" = OrderedDict()  # signature -> (source, reçu à, mint connu)
+        self._tasks: List[asyncio.Task] = []
+
+    def add_source(self, source: IngestSource):
+        self.sources.append(source)
+
+    async def emit(self, event: TransactionEvent):
+        signature = event["signature"]
+        seen = self._seen.get(signature)
+        if seen is None:
+            self._seen[signature] = (event["source"], event["received_at"], event["mint"] is not None)
+            if len(self._seen) > self.dedup_size:
+                self._seen.popitem(last=False)
+            metrics.inc("ingest_events_total", metrics.labels(source=event["source"], outcome="first"))
+            await self.handler(event)
+            return
+        first_source, first_at, had_mint = seen
+        if event["source"] != first_source:
+            metrics.observe("ingest_source_lag_ms", (event["received_at"] - first_at) * 1000,
+                            metrics.labels(source=event["source"]))
+        if had_mint or event["mint"] is None:
+            metrics.inc("ingest_events_total", metrics.labels(source=event["source"], outcome="duplicate"))
+            return
+        self._seen[signature] = (first_source, first_at, True)
+        metrics.inc("ingest_events_total", metrics.labels(source=event["source"], outcome="upgrade"))
+        await self.handler({**event, "upgrade": True})
+
+    async def _run_source(self, source: IngestSource):
+        attempt = 0
+        while True:
+            try:
+                await source.run(self.emit)
+                logger.warning(f"Source d'ingestion {source.name} arrêtée.")
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                delay = min(settings.WS_RECONNECT_MAX_DELAY, settings.WS_RECONNECT_BASE_DELAY * (2 ** attempt))
+                attempt += 1
+                logger.error(f"Source d'ingestion {source.name} en erreur ({e}), relance dans {delay:.1f}s.")
+                await asyncio.sleep(delay)
+
+    async def run(self):
+        logger.info(f"Sources d'ingestion : {', '.join(source.name for source in self.sources)}.")
+        self._tasks = [asyncio.create_task(self._run_source(source)) for source in self.sources]
+        try:
+            await asyncio.gather(*self._tasks)
+        finally:
+            for task in self._tasks:
+                task.cancel()
+
+
+def build_ingest_sources(listener) -> List[IngestSource]:
+    """Sources listées dans INGEST_SOURCES (websocket, blocks, shredstream), dans cet ordre."""
+    sources = []
+    for name in (part.strip() for part in settings.INGEST_SOURCES.split(",")):
+        if name == "websocket":
+            sources.append(WebSocketLogsSource(listener))
+        elif name == "blocks":
+            sources.append(BlockPollingSource(listener.rpc_url, decoder=listener.block_decoder))
+        elif name == "shredstream":
+            from .shredstream import ShredstreamSource
+            sources.append(ShredstreamSource())
+        elif name:
+            logger.error(f"Source d'ingestion inconnue ignorée : {name}")
+    return sources
@@ -3,8 +3,8 @@ from loguru import logger
 from ..database.db import DatabaseManager, LinkedAccount, Creator, Transaction, Alert
 
 class LinkedAccountDetector:
-    def __init__(self, database_url: str):
-        self.db_manager = DatabaseManager(database_url)
+    def __init__(self, database_url: str, db_manager: DatabaseManager = None):
+        self.db_manager = db_manager or DatabaseManager(database_url)
 
     def detect_clusters(self, creator_address: str):
         logger.info(f"Détection de clusters d'adresses liés à {creator_address}")
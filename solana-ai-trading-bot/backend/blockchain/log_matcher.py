@@ -0,0 +1,98 @@
+import base64
+import hashlib
+import re
+from typing import Any, Dict, List, Optional
+from .block_decoder import b58encode, ORCA_PROGRAM_ID, RAYDIUM_AMM_PROGRAM_ID, TOKEN_PROGRAM_ID
+
+PUMP_FUN_PROGRAM_ID = "6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P"
+KNOWN_PROGRAMS = frozenset({TOKEN_PROGRAM_ID, RAYDIUM_AMM_PROGRAM_ID, ORCA_PROGRAM_ID, PUMP_FUN_PROGRAM_ID})
+
+# Discriminant Anchor de l'événement CreateEvent émis par pump.fun ("Program data: ...")
+PUMP_CREATE_EVENT = hashlib.sha256(b"event:CreateEvent").digest()[:8]
+
+_ADDRESS = r"[1-9A-HJ-NP-Za-km-z]{32,44}"
+BASE58_ADDRESS_RE = re.compile(rf"\b{_ADDRESS}\b")
+
+# Une seule expression compilée, appliquée en une passe (finditer) sur toutes les lignes d'une
+# notification : seules les lignes porteuses d'un événement remontent en Python. Le préfixe
+# littéral "Program " permet au moteur de sauter directement d'une occurrence à la suivante.
+LOG_EVENT_RE = re.compile(
+    r"Program (?:"
+    r"log: (?:Instruction: (?P<instruction>[Ii]nitialize[Mm]int2?)\b(?P<rest>.*)"
+    r"|initialize2: InitializeInstruction2 \{(?P<pool>[^}]*)\})"
+    r"|data: (?P<data>[A-Za-z0-9+/]+=*)"
+    r")"
+)
+
+
+def _mint_in(text: str) -> Optional[str]:
+    """Dernière adresse base58 du texte (hors programmes connus), None sinon."""
+    candidates = [address for address in BASE58_ADDRESS_RE.findall(text) if address not in KNOWN_PROGRAMS]
+    return candidates[-1] if candidates else None
+
+
+def _pool_fields(text: str) -> Dict[str, int]:
+    """"nonce: 254, open_time: 0, init_pc_amount: ..." -> dict d'entiers."""
+    fields = {}
+    for part in text.split(","):
+        name, _, value = part.partition(":")
+        value = value.strip()
+        if value.isdigit():
+            fields[name.strip()] = int(value)
+    return fields
+
+
+def _read_string(data: bytes, offset: int):
+    length = int.from_bytes(data[offset:offset + 4], "little")
+    offset += 4
+    return data[offset:offset + length].decode("utf-8", "replace"), offset + length
+
+
+def decode_pump_create(data: bytes) -> Optional[Dict[str, Any]]:
+    """Champs d'un CreateEvent pump.fun (name, symbol, uri, mint, bonding_curve, creator), None si ce n'en est pas un."""
+    if data[:8] != PUMP_CREATE_EVENT:
+        return None
+    try:
+        name, offset = _read_string(data, 8)
+        symbol, offset = _read_string(data, offset)
+        uri, offset = _read_string(data, offset)
+        keys = data[offset:offset + 96]
+        if len(keys) < 96:
+            return None
+    except (UnicodeDecodeError, ValueError):
+        return None
+    return {
+        "name": name, "symbol": symbol, "uri": uri,
+        "mint": b58encode(keys[:32]), "bonding_curve": b58encode(keys[32:64]), "creator": b58encode(keys[64:96]),
+    }
+
+
+def classify_logs(logs: List[str]) -> List[Dict[str, Any]]:
+    """
+    Classe en une passe les lignes de log d'une transaction en événements typés :
+    - mint_init : InitializeMint / InitializeMint2 (programme Token) ; `mint` si la ligne contient une adresse
+    - pool_init : création de pool Raydium (initialize2) avec nonce, open_time, init_pc_amount, init_coin_amount
+    - pump_create : lancement pump.fun, champs du CreateEvent (mint, bonding_curve, creator, name, symbol, uri)
+    """
+    text = "\n".join(logs)
+    events = []
+    pump = None  # `PUMP_FUN_PROGRAM_ID in text`, évalué au premier "Program data"
+    for match in LOG_EVENT_RE.finditer(text):
+        kind = match.lastgroup
+        if kind == "rest":  # groupe `instruction` suivi de `rest`
+            events.append({"type": "mint_init", "instruction": match.group("instruction"),
+                           "mint": _mint_in(match.group("rest"))})
+        elif kind == "pool":
+            events.append({"type": "pool_init", "program": RAYDIUM_AMM_PROGRAM_ID, **_pool_fields(match.group("pool"))})
+        elif kind == "data":
+            if pump is None:
+                pump = PUMP_FUN_PROGRAM_ID in text
+            if not pump:
+                continue
+            try:
+                fields = decode_pump_create(base64.b64decode(match.group("data")))
+            except ValueError:
+                fields = None
+            if fields is not None:
+                events.append({"type": "pump_create", "program": PUMP_FUN_PROGRAM_ID, **fields})
+    return events
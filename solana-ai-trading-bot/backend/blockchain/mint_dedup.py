@@ -0,0 +1,277 @@
+import asyncio
+import hashlib
+import math
+import os
+import struct
+import time
+from collections import OrderedDict
+from typing import Optional
+from loguru import logger
+from ..config.settings import settings
+from ..utils.metrics import metrics
+
+metrics.describe("mint_dedup_hits_total", "Mints déjà vus, par niveau de l'index (lru ou bloom)")
+metrics.describe("mint_dedup_memory_bytes", "Mémoire occupée par l'index de déduplication des mints")
+
+
+class BloomFilter:
+    """Filtre de Bloom de taille fixe (double hachage sur blake2b)."""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    @property
+    def is_full(self) -> bool:
+        return self.count >= self.capacity
+
+
+class MintDedup:
+    """
+    Index borné des mints déjà traités, partagé par le scanner de blocs et le listener WebSocket.
+
+    Les mints récents (moins de `window` secondes, au plus `lru_size`) sont gardés dans un LRU
+    exact ; en sortant du LRU, un mint passe dans un filtre de Bloom à deux générations qui
+    couvre l'historique plus ancien. Quand la génération courante est pleine, la précédente est
+    oubliée : la mémoire reste constante. Un faux positif du filtre (taux `error_rate`) fait
+    ignorer un mint réellement nouveau. Tant qu'il est dans le LRU, un mint peut être retiré
+    (`discard`), par exemple quand la file qui devait l'analyser l'a évincé.
+
+    La persistance tourne dans une tâche de fond (`start`/`stop`) : toutes les `flush_interval`
+    secondes, l'index est copié sur la boucle puis écrit dans un thread, au format binaire
+    (octets bruts des filtres + LRU empaqueté). `add` ne touche jamais au disque.
+    """
+
+    def __init__(self, window: float = None, lru_size: int = None, bloom_capacity: int = None,
+                 error_rate: float = None, path: str = None, flush_interval: float = None):
+        self.window = settings.MINT_DEDUP_WINDOW if window is None else window
+        self.lru_size = max(1, lru_size or settings.MINT_DEDUP_LRU_SIZE)
+        self.bloom_capacity = bloom_capacity or settings.MINT_DEDUP_BLOOM_CAPACITY
+        self.error_rate = error_rate or settings.MINT_DEDUP_ERROR_RATE
+        self.path = settings.MINT_DEDUP_PATH if path is None else path
+        self.flush_interval = flush_interval or settings.MINT_DEDUP_FLUSH_INTERVAL
+        self._recent: "OrderedDict[str, float]" = OrderedDict()
+        self._current = BloomFilter(self.bloom_capacity, self.error_rate)
+        self._previous: Optional[BloomFilter] = None
+        self._dirty = False
+        self._flush_task: Optional[asyncio.Task] = None
+        self._users = 0
+        if self.path:
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def _expire(self, now: float):
+        while self._recent:
+            seen_at = next(iter(self._recent.values()))
+            if now - seen_at < self.window and len(self._recent) <= self.lru_size:
+                break
+            mint, _ = self._recent.popitem(last=False)
+            self._add_to_bloom(mint)
+
+    def _add_to_bloom(self, mint: str):
+        if self._current.is_full:
+            self._previous = self._current
+            self._current = BloomFilter(self.bloom_capacity, self.error_rate)
+            logger.info(f"Index des mints : nouvelle génération du filtre de Bloom ({self.bloom_capacity} mints).")
+        self._current.add(mint)
+
+    def seen(self, mint: str) -> bool:
+        """Vrai si le mint a déjà été enregistré (exact dans la fenêtre, probabiliste au-delà)."""
+        now = time.time()
+        self._expire(now)
+        if mint in self._recent:
+            metrics.inc("mint_dedup_hits_total", metrics.labels(tier="lru"))
+            return True
+        if mint in self._current or (self._previous is not None and mint in self._previous):
+            metrics.inc("mint_dedup_hits_total", metrics.labels(tier="bloom"))
+            return True
+        return False
+
+    def add(self, mint: str):
+        now = time.time()
+        self._recent[mint] = now
+        self._recent.move_to_end(mint)
+        self._expire(now)
+        self._dirty = True
+
+    def discard(self, mint: str) -> bool:
+        """Oublie un mint encore dans le LRU (traitement abandonné) ; False s'il est déjà dans le filtre."""
+        if self._recent.pop(mint, None) is None:
+            return False
+        self._dirty = True
+        return True
+
+    def check_and_add(self, mint: str) -> bool:
+        """Enregistre le mint ; retourne True s'il était nouveau (à traiter), False sinon."""
+        if self.seen(mint):
+            return False
+        self.add(mint)
+        return True
+
+    def memory_bytes(self) -> int:
+        bloom = len(self._current.bits) + (len(self._previous.bits) if self._previous else 0)
+        # ~ clé de 44 caractères + float + entrée de l'OrderedDict
+        return bloom + len(self._recent) * 200
+
+    def start(self):
+        """Démarre l'écriture périodique (un appel par utilisateur : scanner, listener)."""
+        self._users += 1
+        if self.path and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """Arrête l'écriture périodique quand le dernier utilisateur s'arrête, puis écrit l'index."""
+        self._users = max(0, self._users - 1)
+        if self._users == 0 and self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        await self.flush_async()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush_async()
+            except Exception as e:
+                logger.error(f"Écriture périodique de l'index des mints en échec : {e}")
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+            capacity, error_rate, current_count, previous_count, bits_length, recent_count = \
+                _HEADER.unpack_from(data, 0)
+            if capacity != self.bloom_capacity or error_rate != self.error_rate:
+                logger.warning("Index des mints persisté avec d'autres paramètres, ignoré.")
+                return
+            offset = _HEADER.size
+            current = self._restore_filter(data[offset:offset + bits_length], current_count)
+            offset += bits_length
+            previous = None
+            if previous_count >= 0:
+                previous = self._restore_filter(data[offset:offset + bits_length], previous_count)
+                offset += bits_length
+            now = time.time()
+            recent = OrderedDict()
+            for _ in range(recent_count):
+                length = data[offset]
+                mint = data[offset + 1:offset + 1 + length].decode()
+                (seen_at,) = _SEEN_AT.unpack_from(data, offset + 1 + length)
+                offset += 1 + length + _SEEN_AT.size
+                recent[mint] = seen_at
+            self._current, self._previous, self._recent = current, previous, recent
+            # Les mints sortis de la fenêtre pendant l'arrêt passent dans le filtre
+            self._expire(now)
+            logger.info(f"Index des mints rechargé ({len(self._recent)} récents, {self._current.count} dans le filtre).")
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Index des mints illisible ({self.path}) : {e}")
+
+    def _restore_filter(self, bits: bytes, count: int) -> BloomFilter:
+        bloom = BloomFilter(self.bloom_capacity, self.error_rate)
+        if len(bits) != len(bloom.bits):
+            raise ValueError("taille de filtre inattendue")
+        bloom.bits = bytearray(bits)
+        bloom.count = count
+        return bloom
+
+    def _snapshot(self):
+        """Copie de l'état à écrire : prise sur la boucle, l'écriture se fait ailleurs."""
+        previous = self._previous
+        return (self._current.count, bytes(self._current.bits),
+                previous.count if previous else -1, bytes(previous.bits) if previous else b"",
+                list(self._recent.items()))
+
+    def flush(self):
+        """Écrit l'index sur disque de façon synchrone (arrêt, outils hors boucle)."""
+        if not self.path or not self._dirty:
+            return
+        self._dirty = False
+        if not self._write(self._snapshot()):
+            self._dirty = True
+
+    async def flush_async(self):
+        """Écrit l'index dans un thread : seule la copie de l'état reste sur la boucle."""
+        if not self.path or not self._dirty:
+            return
+        self._dirty = False
+        if not await asyncio.to_thread(self._write, self._snapshot()):
+            self._dirty = True
+
+    def _write(self, snapshot) -> bool:
+        """Écriture atomique (comme le checkpoint de scan) d'un instantané de l'index."""
+        current_count, current_bits, previous_count, previous_bits, recent = snapshot
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        packed = bytearray()
+        packed_count = 0
+        for mint, seen_at in recent:
+            encoded = mint.encode()
+            if len(encoded) > 255:
+                continue
+            packed.append(len(encoded))
+            packed += encoded
+            packed += _SEEN_AT.pack(seen_at)
+            packed_count += 1
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(_HEADER.pack(self.bloom_capacity, self.error_rate, current_count, previous_count,
+                                     len(current_bits), packed_count))
+                f.write(current_bits)
+                f.write(previous_bits)
+                f.write(packed)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Écriture de l'index des mints impossible ({self.path}) : {e}")
+            return False
+        return True
+
+
+# capacité, taux d'erreur, compteurs des deux générations (-1 : pas de précédente), taille des filtres, taille du LRU
+_HEADER = struct.Struct("<Qdqqqq")
+_SEEN_AT = struct.Struct("<d")
+
+
+_mint_dedup: Optional[MintDedup] = None
+
+
+def get_mint_dedup() -> MintDedup:
+    """Index partagé par tous les chemins de détection."""
+    global _mint_dedup
+    if _mint_dedup is None:
+        _mint_dedup = MintDedup()
+    return _mint_dedup
+
+
+metrics.register_callback("mint_dedup_memory_bytes", lambda: _mint_dedup.memory_bytes() if _mint_dedup else 0)
+metrics.register_callback("mint_dedup_recent", lambda: len(_mint_dedup) if _mint_dedup else 0,
+                          help_text="Mints dans le LRU exact de l'index de déduplication")
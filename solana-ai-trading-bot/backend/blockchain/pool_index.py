@@ -0,0 +1,488 @@
+import asyncio
+import base64
+import struct
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from loguru import logger
+from ..config.settings import settings
+from ..utils.metrics import metrics
+from .block_decoder import b58encode, ORCA_PROGRAM_ID, RAYDIUM_AMM_PROGRAM_ID, TOKEN_PROGRAM_ID
+from .rpc_client import call_solana_rpc, call_solana_rpc_batch
+from .rpc_limiter import RPCPriority
+from .subscription_manager import SubscriptionHandle, SubscriptionManager, get_subscription_manager
+
+WSOL_MINT = "So11111111111111111111111111111111111111112"
+LAMPORTS_PER_SOL = 1_000_000_000
+
+# Comptes de pool : taille et décalages (mint, coffre) de chaque côté
+RAYDIUM_POOL_SIZE = 752
+RAYDIUM_BASE_VAULT, RAYDIUM_QUOTE_VAULT, RAYDIUM_BASE_MINT, RAYDIUM_QUOTE_MINT = 336, 368, 400, 432
+RAYDIUM_LP_MINT, RAYDIUM_LP_RESERVE = 464, 720
+WHIRLPOOL_SIZE = 653
+WHIRLPOOL_MINT_A, WHIRLPOOL_VAULT_A, WHIRLPOOL_MINT_B, WHIRLPOOL_VAULT_B = 101, 133, 181, 213
+# Comptes SPL Token : montant d'un compte de tokens, supply et autorités d'un mint
+TOKEN_ACCOUNT_SIZE = 165
+TOKEN_ACCOUNT_AMOUNT = 64
+MINT_SUPPLY, MINT_DECIMALS, MINT_FREEZE_AUTHORITY = 36, 44, 46
+
+metrics.describe("pool_index_updates_total", "Notifications de compte appliquées à l'index des pools, par rôle")
+metrics.describe("pool_index_bootstrap_ms", "Durée d'amorçage d'un mint dans l'index des pools")
+metrics.describe("pool_index_holders_timeouts_total", "Comptages de holders abandonnés (POOL_INDEX_HOLDERS_TIMEOUT)")
+
+
+def _key(data: bytes, offset: int) -> str:
+    return b58encode(data[offset:offset + 32])
+
+
+def _u64(data: bytes, offset: int) -> int:
+    return struct.unpack_from("<Q", data, offset)[0]
+
+
+def _account_data(account: Optional[Dict[str, Any]]) -> Optional[bytes]:
+    """Octets d'un compte encodé en base64 (getAccountInfo, getMultipleAccounts, accountSubscribe)."""
+    data = (account or {}).get("data")
+    if isinstance(data, list) and data and data[-1] == "base64":
+        return base64.b64decode(data[0])
+    return None
+
+
+def _optional_key(data: bytes, offset: int) -> Optional[str]:
+    """COption<Pubkey> : étiquette u32 puis clé."""
+    return _key(data, offset + 4) if struct.unpack_from("<I", data, offset)[0] else None
+
+
+def _result(response: Optional[Dict[str, Any]]) -> Any:
+    return (response or {}).get("result")
+
+
+class Pool:
+    """Pool d'un mint : comptes, réserves (unités brutes) et état du LP, au slot de la dernière mise à jour."""
+
+    __slots__ = ("address", "dex", "mint", "quote_mint", "mint_vault", "quote_vault", "lp_mint", "lp_reserve",
+                 "lp_supply", "mint_reserve", "quote_reserve", "slot", "slots")
+
+    def __init__(self, address: str, dex: str, mint: str, quote_mint: str, mint_vault: str, quote_vault: str,
+                 lp_mint: str = None, lp_reserve: int = None):
+        self.address = address
+        self.dex = dex
+        self.mint = mint
+        self.quote_mint = quote_mint
+        self.mint_vault = mint_vault
+        self.quote_vault = quote_vault
+        self.lp_mint = lp_mint
+        self.lp_reserve = lp_reserve
+        self.lp_supply: Optional[int] = None
+        self.mint_reserve: Optional[int] = None
+        self.quote_reserve: Optional[int] = None
+        self.slot = 0
+        self.slots: Dict[str, int] = {}  # slot de la dernière mise à jour, par rôle de compte
+
+    @classmethod
+    def decode(cls, address: str, program: str, data: bytes, mint: str) -> Optional["Pool"]:
+        """Pool Raydium AMM v4 ou Orca Whirlpool dont un côté est `mint`, None sinon."""
+        if program == RAYDIUM_AMM_PROGRAM_ID and len(data) >= RAYDIUM_POOL_SIZE:
+            sides = ((_key(data, RAYDIUM_BASE_MINT), _key(data, RAYDIUM_BASE_VAULT)),
+                     (_key(data, RAYDIUM_QUOTE_MINT), _key(data, RAYDIUM_QUOTE_VAULT)))
+            lp_mint, lp_reserve, dex = _key(data, RAYDIUM_LP_MINT), _u64(data, RAYDIUM_LP_RESERVE), "raydium"
+        elif program == ORCA_PROGRAM_ID and len(data) >= WHIRLPOOL_SIZE:
+            # Whirlpool : liquidité concentrée, positions en NFT, pas de mint LP
+            sides = ((_key(data, WHIRLPOOL_MINT_A), _key(data, WHIRLPOOL_VAULT_A)),
+                     (_key(data, WHIRLPOOL_MINT_B), _key(data, WHIRLPOOL_VAULT_B)))
+            lp_mint, lp_reserve, dex = None, None, "orca"
+        else:
+            return None
+        if sides[1][0] == mint:
+            sides = sides[::-1]
+        if sides[0][0] != mint:
+            return None
+        (_, mint_vault), (quote_mint, quote_vault) = sides
+        return cls(address, dex, mint, quote_mint, mint_vault, quote_vault, lp_mint, lp_reserve)
+
+    @property
+    def lp_burned_pct(self) -> Optional[float]:
+        """Part des LP émis qui a été brûlée (Raydium : supply du mint LP rapportée à lp_reserve)."""
+        if not self.lp_reserve or self.lp_supply is None:
+            return None
+        return max(0.0, 1.0 - self.lp_supply / self.lp_reserve)
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "address": self.address, "dex": self.dex, "quote_mint": self.quote_mint,
+            "mint_reserve": self.mint_reserve, "quote_reserve": self.quote_reserve,
+            "lp_mint": self.lp_mint, "lp_burned_pct": self.lp_burned_pct, "slot": self.slot,
+        }
+
+
+class _MintState:
+    def __init__(self, mint: str):
+        self.mint = mint
+        self.pools: List[Pool] = []
+        self.supply: Optional[int] = None
+        self.decimals: Optional[int] = None
+        self.mint_authority: Optional[str] = None
+        self.freeze_authority: Optional[str] = None
+        self.holders: Optional[int] = None
+        self.centralization: Optional[float] = None
+        self.discovered_at = 0.0
+        self.holders_at = 0.0
+        self.refreshing = False
+        self.slot = 0
+
+    def price(self) -> Optional[float]:
+        """
+        Prix en SOL tiré des réserves du pool WSOL le plus profond (approché pour un Whirlpool,
+        dont la liquidité est concentrée), None tant qu'aucun pool coté en SOL n'est connu.
+        """
+        pools = [pool for pool in self.pools
+                 if pool.quote_mint == WSOL_MINT and pool.mint_reserve and pool.quote_reserve]
+        if not pools or self.decimals is None:
+            return None
+        pool = max(pools, key=lambda pool: pool.quote_reserve)
+        return (pool.quote_reserve / LAMPORTS_PER_SOL) / (pool.mint_reserve / 10 ** self.decimals)
+
+    def summary(self) -> Dict[str, Any]:
+        sol = sum(pool.quote_reserve or 0 for pool in self.pools if pool.quote_mint == WSOL_MINT) / LAMPORTS_PER_SOL
+        burned = [pool.lp_burned_pct for pool in self.pools if pool.lp_burned_pct is not None]
+        return {
+            "mint": self.mint,
+            "sol": sol,
+            "price": self.price(),
+            "pools": [pool.summary() for pool in self.pools],
+            "lp_burned_pct": min(burned) if burned else None,
+            # Retrait impossible seulement si tout le LP de chaque pool Raydium est brûlé (les lockers ne sont pas suivis)
+            "lp_locked": bool(burned) and min(burned) >= settings.POOL_LP_BURNED_MIN_PCT,
+            # Autorité de gel : les comptes des acheteurs peuvent être gelés, la vente bloquée
+            "honeypot": self.freeze_authority is not None,
+            # Autorité de mint : la supply peut encore être gonflée
+            "blacklisted": self.mint_authority is not None,
+            "holders": self.holders or 0,
+            "centralization": 1.0 if self.centralization is None else self.centralization,
+            "slot": max([self.slot, *(pool.slot for pool in self.pools)]),
+        }
+
+
+class PoolIndex:
+    """
+    Index en mémoire, par mint, des pools Raydium AMM v4 et Orca Whirlpool : comptes, réserves,
+    LP brûlé, holders et slot de la dernière mise à jour.
+
+    Un mint est amorcé une fois (découverte des pools, compte mint, coffres et mint LP en deux
+    allers-retours batch), puis ses coffres et son mint LP sont suivis par accountSubscribe :
+    une vérification de liquidité est ensuite une lecture en mémoire. Le nombre de holders
+    (getProgramAccounts, sans borne côté RPC) est compté en fond, hors de ce chemin, avec un
+    délai maximal et un nombre limité de comptages simultanés ; il vaut 0 tant qu'il n'est pas
+    connu. Au plus
+    POOL_INDEX_MAX_MINTS mints sont suivis (LRU) ; un mint sans pool est redécouvert à la
+    création d'un pool ou à la lecture, au plus une fois par POOL_INDEX_REDISCOVERY_INTERVAL.
+    `watch_price` prévient un abonné à chaque mise à jour des réserves d'un mint indexé.
+    """
+
+    def __init__(self, rpc_url: str, subscription_manager: Optional[SubscriptionManager] = None,
+                 max_mints: int = None):
+        self.rpc_url = rpc_url
+        self.subscription_manager = subscription_manager or get_subscription_manager()
+        self.max_mints = max_mints or settings.POOL_INDEX_MAX_MINTS
+        self._mints: "OrderedDict[str, _MintState]" = OrderedDict()
+        self._bootstrapping: Dict[str, asyncio.Future] = {}
+        # Compte suivi -> (pool, rôle) ; un coffre ou un mint LP n'appartient qu'à un pool
+        self._accounts: Dict[str, Tuple[Pool, str]] = {}
+        self._handles: Dict[str, SubscriptionHandle] = {}
+        self._rediscovery_task: Optional[asyncio.Task] = None
+        self._rediscovered_at = 0.0
+        self._holder_tasks = set()
+        self._holder_slots = asyncio.Semaphore(settings.POOL_INDEX_HOLDERS_CONCURRENCY)
+        self._price_watchers: Dict[str, List[Callable[[float], None]]] = {}
+        self.updates = 0
+        _indexes.append(self)
+
+    async def get_liquidity(self, mint: str) -> Dict[str, Any]:
+        """État de liquidité de `mint` (voir _MintState.summary), amorcé au premier appel."""
+        state = self._mints.get(mint)
+        if state is None:
+            task = self._bootstrapping.get(mint)
+            if task is None:
+                task = self._bootstrapping[mint] = asyncio.ensure_future(self._bootstrap(mint))
+                task.add_done_callback(lambda done: self._bootstrapping.pop(mint, None))
+            state = await asyncio.shield(task)
+            if state is None:
+                return {}
+        else:
+            self._mints.move_to_end(mint)
+            now = time.monotonic()
+            if not state.pools and now - state.discovered_at >= settings.POOL_INDEX_REDISCOVERY_INTERVAL:
+                self.on_pool_created()
+            if not state.refreshing and now - state.holders_at >= settings.POOL_INDEX_HOLDERS_TTL:
+                state.refreshing = True
+                asyncio.ensure_future(self._refresh_token(state))
+        return state.summary()
+
+    def get_cached(self, mint: str) -> Optional[Dict[str, Any]]:
+        """État déjà indexé, sans amorçage ni RPC."""
+        state = self._mints.get(mint)
+        return state.summary() if state is not None else None
+
+    def watch_price(self, mint: str, callback: Callable[[float], None]):
+        """Appelle `callback(prix)` à chaque notification d'un coffre de `mint` (voir _MintState.price)."""
+        self._price_watchers.setdefault(mint, []).append(callback)
+
+    def unwatch_price(self, mint: str, callback: Callable[[float], None]):
+        watchers = self._price_watchers.get(mint, [])
+        if callback in watchers:
+            watchers.remove(callback)
+        if not watchers:
+            self._price_watchers.pop(mint, None)
+
+    def _notify_price(self, mint: str):
+        watchers = self._price_watchers.get(mint)
+        state = self._mints.get(mint)
+        price = state.price() if watchers and state is not None else None
+        if price is None:
+            return
+        for callback in list(watchers):
+            try:
+                callback(price)
+            except Exception as e:
+                logger.warning(f"Index des pools : erreur d'un abonné au prix de {mint} : {e}")
+
+    @staticmethod
+    def _discovery_calls(mint: str) -> List[Tuple[str, list]]:
+        calls = []
+        for program, size, offsets in ((RAYDIUM_AMM_PROGRAM_ID, RAYDIUM_POOL_SIZE, (RAYDIUM_BASE_MINT, RAYDIUM_QUOTE_MINT)),
+                                       (ORCA_PROGRAM_ID, WHIRLPOOL_SIZE, (WHIRLPOOL_MINT_A, WHIRLPOOL_MINT_B))):
+            for offset in offsets:
+                calls.append(("getProgramAccounts", [program, {
+                    "encoding": "base64", "commitment": "confirmed",
+                    "filters": [{"dataSize": size}, {"memcmp": {"offset": offset, "bytes": mint}}],
+                }]))
+        return calls
+
+    @staticmethod
+    def _token_calls(mint: str) -> List[Tuple[str, list]]:
+        return [
+            ("getAccountInfo", [mint, {"encoding": "base64", "commitment": "confirmed"}]),
+            ("getTokenLargestAccounts", [mint, {"commitment": "confirmed"}]),
+        ]
+
+    @staticmethod
+    def _holders_params(mint: str) -> list:
+        # Comptes de tokens du mint, sans leurs données : seul le nombre compte
+        return [TOKEN_PROGRAM_ID, {
+            "encoding": "base64", "commitment": "confirmed", "dataSlice": {"offset": 0, "length": 0},
+            "filters": [{"dataSize": TOKEN_ACCOUNT_SIZE}, {"memcmp": {"offset": 0, "bytes": mint}}],
+        }]
+
+    @staticmethod
+    def _decode_pools(mint: str, responses: List[Optional[Dict[str, Any]]]) -> Optional[List[Pool]]:
+        """Pools trouvés par les appels de _discovery_calls, None si un appel a échoué."""
+        pools: Dict[str, Pool] = {}
+        for program, response in zip((RAYDIUM_AMM_PROGRAM_ID,) * 2 + (ORCA_PROGRAM_ID,) * 2, responses):
+            result = _result(response)
+            if result is None:
+                return None
+            for item in result:
+                data = _account_data(item.get("account"))
+                pool = Pool.decode(item.get("pubkey"), program, data, mint) if data else None
+                if pool is not None:
+                    pools[pool.address] = pool
+        return list(pools.values())
+
+    async def _bootstrap(self, mint: str) -> Optional[_MintState]:
+        started = time.monotonic()
+        calls = self._discovery_calls(mint) + self._token_calls(mint)
+        responses = await call_solana_rpc_batch(self.rpc_url, calls, priority=RPCPriority.ANALYTICS)
+        pools = self._decode_pools(mint, responses[:4])
+        if pools is None:
+            logger.warning(f"Découverte des pools de {mint} en échec, mint non indexé.")
+            return None
+        state = _MintState(mint)
+        state.discovered_at = started
+        await self._add_pools(state, pools)
+        self._apply_token(state, responses[4:])
+        self._count_holders_later(state)
+        self._mints[mint] = state
+        while len(self._mints) > self.max_mints:
+            _, evicted = self._mints.popitem(last=False)
+            self._release(evicted.pools)
+        metrics.observe("pool_index_bootstrap_ms", (time.monotonic() - started) * 1000)
+        logger.debug(f"Index des pools : {mint} amorcé, {len(pools)} pool(s), {state.summary()['sol']:.2f} SOL.")
+        return state
+
+    def _apply_token(self, state: _MintState, responses: List[Optional[Dict[str, Any]]]):
+        """Supply et autorités (compte mint) et centralisation (top 10 hors coffres)."""
+        mint_response, largest_response = responses
+        mint_result = _result(mint_response)
+        data = _account_data((mint_result or {}).get("value"))
+        if data is not None and len(data) >= MINT_FREEZE_AUTHORITY + 36:
+            state.supply = _u64(data, MINT_SUPPLY)
+            state.decimals = data[MINT_DECIMALS]
+            state.mint_authority = _optional_key(data, 0)
+            state.freeze_authority = _optional_key(data, MINT_FREEZE_AUTHORITY)
+            state.slot = max(state.slot, (mint_result.get("context") or {}).get("slot") or 0)
+        largest = (_result(largest_response) or {}).get("value")
+        if largest is not None and state.supply:
+            vaults = {pool.mint_vault for pool in state.pools}
+            amounts = [int(account["amount"]) for account in largest if account.get("address") not in vaults]
+            state.centralization = sum(amounts[:10]) / state.supply
+        state.holders_at = time.monotonic()
+
+    def _count_holders_later(self, state: _MintState):
+        task = asyncio.ensure_future(self._count_holders(state))
+        self._holder_tasks.add(task)
+        task.add_done_callback(self._holder_tasks.discard)
+
+    async def _count_holders(self, state: _MintState):
+        """Nombre de comptes de tokens du mint (hors coffres de pool) ; l'ancienne valeur reste en cas d'échec."""
+        async with self._holder_slots:
+            try:
+                response = await asyncio.wait_for(
+                    call_solana_rpc(self.rpc_url, "getProgramAccounts", self._holders_params(state.mint),
+                                    priority=RPCPriority.ANALYTICS),
+                    settings.POOL_INDEX_HOLDERS_TIMEOUT,
+                )
+            except asyncio.TimeoutError:
+                metrics.inc("pool_index_holders_timeouts_total")
+                logger.debug(f"Comptage des holders de {state.mint} abandonné (POOL_INDEX_HOLDERS_TIMEOUT).")
+                return
+        holders = _result(response)
+        if holders is not None:
+            state.holders = max(0, len(holders) - len(state.pools))
+
+    async def _refresh_token(self, state: _MintState):
+        try:
+            responses = await call_solana_rpc_batch(self.rpc_url, self._token_calls(state.mint), priority=RPCPriority.ANALYTICS)
+            self._apply_token(state, responses)
+            await self._count_holders(state)
+        except Exception as e:
+            logger.warning(f"Rafraîchissement des holders de {state.mint} en échec : {e}")
+        finally:
+            state.refreshing = False
+
+    async def _add_pools(self, state: _MintState, pools: List[Pool]):
+        """Lit coffres et mint LP des nouveaux pools (getMultipleAccounts) puis s'y abonne."""
+        known = {pool.address for pool in state.pools}
+        pools = [pool for pool in pools if pool.address not in known]
+        if not pools:
+            return
+        accounts = []
+        for pool in pools:
+            accounts += [(pool.mint_vault, pool, "mint_vault"), (pool.quote_vault, pool, "quote_vault")]
+            if pool.lp_mint:
+                accounts.append((pool.lp_mint, pool, "lp_mint"))
+        keys = [address for address, _, _ in accounts]
+        calls = [("getMultipleAccounts", [keys[i:i + 100], {"encoding": "base64", "commitment": "confirmed"}])
+                 for i in range(0, len(keys), 100)]
+        responses = await call_solana_rpc_batch(self.rpc_url, calls, priority=RPCPriority.ANALYTICS)
+        values: List[Optional[Dict[str, Any]]] = []
+        for response in responses:
+            result = _result(response) or {}
+            slot = (result.get("context") or {}).get("slot") or 0
+            values += [(value, slot) for value in result.get("value") or []]
+        for (address, pool, role), (value, slot) in zip(accounts, values):
+            self._apply(pool, role, _account_data(value), slot)
+        state.pools += pools
+        for address, pool, role in accounts:
+            self._accounts[address] = (pool, role)
+            asyncio.ensure_future(self._subscribe(address))
+
+    @staticmethod
+    def _apply(pool: Pool, role: str, data: Optional[bytes], slot: int) -> bool:
+        if data is None or slot < pool.slots.get(role, 0):
+            return False
+        if role == "lp_mint":
+            if len(data) < MINT_SUPPLY + 8:
+                return False
+            pool.lp_supply = _u64(data, MINT_SUPPLY)
+        else:
+            if len(data) < TOKEN_ACCOUNT_AMOUNT + 8:
+                return False
+            setattr(pool, "mint_reserve" if role == "mint_vault" else "quote_reserve", _u64(data, TOKEN_ACCOUNT_AMOUNT))
+        pool.slots[role] = slot
+        pool.slot = max(pool.slot, slot)
+        return True
+
+    async def _subscribe(self, address: str):
+        if address in self._handles:
+            return
+        try:
+            handle = await self.subscription_manager.account_subscribe(
+                address, lambda result: self.on_account_update(address, result), encoding="base64"
+            )
+        except Exception as e:
+            logger.warning(f"Index des pools : abonnement au compte {address} impossible : {e}")
+            return
+        if address in self._accounts:
+            self._handles[address] = handle
+        else:  # pool évincé pendant l'abonnement
+            await self.subscription_manager.unsubscribe(handle)
+
+    def _release(self, pools: List[Pool]):
+        for pool in pools:
+            for address in (pool.mint_vault, pool.quote_vault, pool.lp_mint):
+                if address and self._accounts.pop(address, None) is not None:
+                    handle = self._handles.pop(address, None)
+                    if handle is not None:
+                        asyncio.ensure_future(self.subscription_manager.unsubscribe(handle))
+
+    def on_account_update(self, address: str, notification: Dict[str, Any]):
+        """Notification accountSubscribe (base64) d'un coffre ou d'un mint LP suivi."""
+        entry = self._accounts.get(address)
+        if entry is None:
+            return
+        pool, role = entry
+        slot = ((notification or {}).get("context") or {}).get("slot") or pool.slot
+        if self._apply(pool, role, _account_data((notification or {}).get("value")), slot):
+            self.updates += 1
+            metrics.inc("pool_index_updates_total", metrics.labels(role=role))
+            if role != "lp_mint":
+                self._notify_price(pool.mint)
+
+    def on_pool_created(self):
+        """Un pool vient d'être créé (log initialize2, sans mint) : redécouverte des mints encore sans pool."""
+        if self._rediscovery_task is not None and not self._rediscovery_task.done():
+            return
+        if time.monotonic() - self._rediscovered_at < settings.POOL_INDEX_REDISCOVERY_INTERVAL:
+            return
+        if any(not state.pools for state in self._mints.values()):
+            self._rediscovery_task = asyncio.ensure_future(self._rediscover())
+
+    async def _rediscover(self):
+        self._rediscovered_at = time.monotonic()
+        states = [state for state in self._mints.values() if not state.pools]
+        calls = [call for state in states for call in self._discovery_calls(state.mint)]
+        try:
+            responses = await call_solana_rpc_batch(self.rpc_url, calls, priority=RPCPriority.ANALYTICS)
+            for index, state in enumerate(states):
+                pools = self._decode_pools(state.mint, responses[index * 4:index * 4 + 4])
+                if pools is None:
+                    continue
+                state.discovered_at = self._rediscovered_at
+                if pools and state.mint in self._mints:
+                    await self._add_pools(state, pools)
+                    logger.info(f"Index des pools : {len(pools)} pool(s) découvert(s) pour {state.mint}.")
+        except Exception as e:
+            logger.warning(f"Redécouverte des pools en échec : {e}")
+
+    async def stop(self):
+        for handle in list(self._handles.values()):
+            await self.subscription_manager.unsubscribe(handle)
+        self._handles.clear()
+        self._accounts.clear()
+        self._price_watchers.clear()
+        for task in list(self._holder_tasks):
+            task.cancel()
+        self._mints.clear()
+        if self._rediscovery_task is not None:
+            self._rediscovery_task.cancel()
+
+    def stats(self) -> Dict[str, int]:
+        return {"mints": len(self._mints), "pools": sum(len(state.pools) for state in self._mints.values()),
+                "watched_accounts": len(self._handles), "updates": self.updates}
+
+
+_indexes: List[PoolIndex] = []
+
+metrics.register_callback("pool_index_mints", lambda: sum(index.stats()["mints"] for index in _indexes),
+                          help_text="Mints suivis par l'index des pools")
+metrics.register_callback("pool_index_watched_accounts", lambda: sum(len(index._handles) for index in _indexes),
+                          help_text="Coffres et mints LP suivis par accountSubscribe")
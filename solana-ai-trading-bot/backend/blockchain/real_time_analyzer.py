@@ -1,37 +1,54 @@
 import asyncio
 from loguru import logger
-from typing import Dict, Any, Set, List
+from typing import Dict, Any, Set, List, Optional
+from ..config.settings import settings
 from ..database.db import DatabaseManager, Token, Creator, Transaction
 from .cache_manager import BlockchainCache
 from .creator_monitor import CreatorMonitor
+from .subscription_manager import SubscriptionManager, get_subscription_manager
 
 class RealTimeAnalyzer:
-    def __init__(self, database_url: str, rpc_url: str, cache_manager: BlockchainCache):
-        self.db_manager = DatabaseManager(database_url)
+    def __init__(self, database_url: str, rpc_url: str, cache_manager: BlockchainCache,
+                 subscription_manager: Optional[SubscriptionManager] = None,
+                 db_manager: Optional[DatabaseManager] = None, creator_monitor: Optional[CreatorMonitor] = None):
+        self.db_manager = db_manager or DatabaseManager(database_url)
         self.rpc_url = rpc_url
         self.cache = cache_manager
-        self.creator_monitor = CreatorMonitor(database_url, rpc_url)
+        self.subscription_manager = subscription_manager or get_subscription_manager()
+        # Partagé avec le listener quand il est injecté : une seule liste de créateurs surveillés
+        self.creator_monitor = creator_monitor or CreatorMonitor(database_url, rpc_url, self.subscription_manager,
+                                                                 self.db_manager)
+        self._slot_subscription = None
         self._analysis_task = None
         self._transaction_cache: Dict[str, Dict[str, Any]] = {}
         self._suspicious_patterns: Set[str] = set()
         
     async def start_analysis(self):
-        """Démarrage de l'analyse en temps réel."""
-        if self._analysis_task is None or self._analysis_task.done():
-            self._analysis_task = asyncio.create_task(self._analysis_loop())
+        """Démarrage de l'analyse en temps réel : une passe par nouveau slot (slotSubscribe)."""
+        if self._slot_subscription is None:
+            self._slot_subscription = await self.subscription_manager.slot_subscribe(self._on_slot)
             logger.info("Analyse en temps réel démarrée.")
+
+    async def stop_analysis(self):
+        if self._slot_subscription is not None:
+            await self.subscription_manager.unsubscribe(self._slot_subscription)
+            self._slot_subscription = None
+        if self._analysis_task is not None:
+            self._analysis_task.cancel()
+
+    def _on_slot(self, notification: Dict[str, Any]):
+        """Lance une passe d'analyse ; les slots reçus pendant une passe en cours sont ignorés."""
+        if self._analysis_task is None or self._analysis_task.done():
+            self._analysis_task = asyncio.create_task(self._analysis_pass())
             
-    async def _analysis_loop(self):
-        """Boucle principale d'analyse."""
-        while True:
-            try:
-                await self._analyze_transactions()
-                await self._detect_patterns()
-                await self._update_suspicious_patterns()
-                await asyncio.sleep(0.5)  # Analyse toutes les 0.5 secondes (ultra-rapide)
-            except Exception as e:
-                logger.error(f"Erreur lors de l'analyse: {e}")
-                await asyncio.sleep(2)
+    async def _analysis_pass(self):
+        """Passe d'analyse déclenchée par un slot."""
+        try:
+            await self._analyze_transactions()
+            await self._detect_patterns()
+            await self._update_suspicious_patterns()
+        except Exception as e:
+            logger.error(f"Erreur lors de l'analyse: {e}")
     
     async def _analyze_transactions(self):
         """Analyse les transactions récentes."""
@@ -65,8 +82,8 @@ class RealTimeAnalyzer:
                 mint_address = instr.get('accounts', [None])[0]
                 if mint_address:
                     # Vérifie la liquidité
-                    liquidity = await self.cache.get_liquidity(mint_address)
-                    liquidity_ok = liquidity.get('sol', 0) >= 3.0
+                    liquidity = await self.cache.get_liquidity(mint_address) or {}
+                    liquidity_ok = liquidity.get('sol', 0) >= settings.MIN_LIQUIDITY_POOL_SOL
                     # Anti-honeypot
                     honeypot_safe = not liquidity.get('honeypot', False)
                     # Analyse smart contract
@@ -113,9 +130,9 @@ class RealTimeAnalyzer:
         # Analyser les différents types de programmes
         if program_id == "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA":
             await self._analyze_token_instruction(instruction, tx_id)
-        elif program_id == "9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin":  # Raydium
+        elif program_id == "675kPX9MHTjS2zt1qfr1NYHuzeLXfQM9H24wFSUt1Mp8":  # Raydium AMM v4
             await self._analyze_raydium_instruction(instruction, tx_id)
-        elif program_id == "Orca11111111111111111111111111111111111111111":  # Orca
+        elif program_id == "whirLbMiicVdio4qvUfM5KAg6Ct8VwpYzGff3uctyCc":  # Orca
             await self._analyze_orca_instruction(instruction, tx_id)
     
     async def _analyze_token_instruction(self, instruction: Dict[str, Any], tx_id: str):
@@ -1,26 +1,355 @@
+import asyncio
 import httpx
 import json
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from loguru import logger
+from ..config.settings import settings
+from ..utils.metrics import metrics
+from ..utils.traffic_recorder import get_traffic_recorder
+from .rpc_limiter import PriorityTokenBucket, RPCPriority
 
-async def call_solana_rpc(url: str, method: str, params: list = None):
-    import time
-    headers = {'Content-Type': 'application/json'}
-    payload = {
-        "jsonrpc": "2.0",
-        "id": 1,
-        "method": method,
-        "params": params if params else []
-    }
-    start = time.time()
-    async with httpx.AsyncClient(timeout=0.8) as client:
+metrics.describe("rpc_latency_ms", "Latence des requêtes RPC par méthode et endpoint (ms)")
+metrics.describe("rpc_errors_total", "Erreurs RPC par méthode, endpoint et type")
+metrics.describe("rpc_timeouts_total", "Timeouts RPC par méthode et endpoint")
+
+
+class RPCError(Exception):
+    """Erreur RPC de base (transport, HTTP ou nœud)."""
+
+    def __init__(self, message: str, url: str = None, method: str = None):
+        super().__init__(message)
+        self.url = url
+        self.method = method
+
+
+class RPCRateLimitError(RPCError):
+    """Le fournisseur a refusé la requête (HTTP 429)."""
+
+    def __init__(self, message: str, retry_after: float = None, **kwargs):
+        super().__init__(message, **kwargs)
+        self.retry_after = retry_after
+
+
+class RPCTimeoutError(RPCError):
+    """Délai de connexion ou de lecture dépassé."""
+
+
+class RPCHTTPError(RPCError):
+    """Réponse HTTP en erreur (hors 429)."""
+
+    def __init__(self, message: str, status_code: int = None, **kwargs):
+        super().__init__(message, **kwargs)
+        self.status_code = status_code
+
+
+class RPCTransportError(RPCError):
+    """Erreur réseau (connexion refusée, coupée...)."""
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+class RPCClient:
+    """Client RPC persistant pour un endpoint (keep-alive, HTTP/2, pool de connexions)."""
+
+    def __init__(self, url: str, http2: bool = None, max_connections: int = None,
+                 max_keepalive_connections: int = None, keepalive_expiry: float = None,
+                 connect_timeout: float = None, read_timeout: float = None):
+        self.url = url
+        self.name = url.split("?")[0]  # sans la clé d'API éventuelle, pour les métriques
+        limits = httpx.Limits(
+            max_connections=max_connections or settings.RPC_MAX_CONNECTIONS,
+            max_keepalive_connections=max_keepalive_connections or settings.RPC_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=keepalive_expiry or settings.RPC_KEEPALIVE_EXPIRY,
+        )
+        read_timeout = read_timeout or settings.RPC_READ_TIMEOUT
+        timeout = httpx.Timeout(
+            connect=connect_timeout or settings.RPC_CONNECT_TIMEOUT,
+            read=read_timeout,
+            write=read_timeout,
+            pool=read_timeout,
+        )
+        self._client = httpx.AsyncClient(
+            http2=settings.RPC_HTTP2 if http2 is None else http2,
+            limits=limits,
+            timeout=timeout,
+            headers={'Content-Type': 'application/json'},
+        )
+        self._request_id = 0
+        self.limiter = PriorityTokenBucket(
+            settings.RPC_RATE_LIMIT_RPS, settings.RPC_RATE_LIMIT_BURST, settings.RPC_RATE_LIMIT_RESERVE
+        )
+
+    def _next_id(self) -> int:
+        self._request_id += 1
+        return self._request_id
+
+    async def _post(self, payload, method: str, priority: int, cost: float = 1.0, raw: bool = False):
+        await self.limiter.acquire(priority, cost)
+        start = time.perf_counter()
+        try:
+            body = await self._send(payload, method, raw)
+        except RPCError as exc:
+            labels = metrics.labels(method=method, endpoint=self.name, type=type(exc).__name__)
+            metrics.inc("rpc_errors_total", labels)
+            if isinstance(exc, RPCTimeoutError):
+                metrics.inc("rpc_timeouts_total", metrics.labels(method=method, endpoint=self.name))
+            raise
+        metrics.observe("rpc_latency_ms", (time.perf_counter() - start) * 1000,
+                        metrics.labels(method=method, endpoint=self.name))
+        return body
+
+    async def _send(self, payload, method: str, raw: bool = False):
+        started = time.perf_counter()
+        try:
+            response = await self._client.post(self.url, content=json.dumps(payload))
+        except httpx.TimeoutException as exc:
+            raise RPCTimeoutError(f"{method}: timeout ({type(exc).__name__})", url=self.url, method=method) from exc
+        except httpx.TransportError as exc:
+            raise RPCTransportError(f"{method}: {exc}", url=self.url, method=method) from exc
+        if response.status_code == 429:
+            retry_after = _parse_retry_after(response.headers.get("Retry-After"))
+            self.limiter.penalize(retry_after)
+            raise RPCRateLimitError(f"{method}: HTTP 429", retry_after=retry_after, url=self.url, method=method)
+        if response.status_code >= 400:
+            raise RPCHTTPError(f"{method}: HTTP {response.status_code}", status_code=response.status_code,
+                               url=self.url, method=method)
+        recorder = get_traffic_recorder()
+        if recorder is not None:
+            self._record(recorder, payload, response.content, (time.perf_counter() - started) * 1000)
+        if raw:
+            # Corps brut non décodé (parsé ailleurs, par exemple dans un process worker)
+            self.limiter.reward()
+            return response.content
+        try:
+            body = response.json()
+        except ValueError as exc:
+            raise RPCError(f"{method}: réponse JSON invalide", url=self.url, method=method) from exc
+        error = body.get("error") if isinstance(body, dict) else None
+        if isinstance(error, dict) and error.get("code") == 429:
+            self.limiter.penalize()
+            raise RPCRateLimitError(f"{method}: {error.get('message')}", url=self.url, method=method)
+        self.limiter.reward()
+        return body
+
+    @staticmethod
+    def _record(recorder, payload, content: bytes, latency_ms: float):
+        """Enregistre la paire requête/réponse ; un batch est éclaté en paires individuelles."""
+        if isinstance(payload, dict):
+            recorder.record_rpc(payload["method"], payload["params"], content, latency_ms)
+            return
         try:
-            response = await client.post(url, headers=headers, content=json.dumps(payload))
-            response.raise_for_status()
-            latency = (time.time() - start) * 1000
-            print(f"RPC {method} latency: {latency:.1f}ms")
-            return response.json()
-        except Exception as exc:
-            print(f"RPC {method} error: {exc}")
-            return None
+            items = {item.get("id"): item for item in json.loads(content)}
+        except (ValueError, TypeError, AttributeError):
+            return
+        for call in payload:
+            if call["id"] in items:
+                recorder.record_rpc(call["method"], call["params"], json.dumps(items[call["id"]]).encode(), latency_ms)
+
+    async def request(self, method: str, params: list = None, priority: int = RPCPriority.DETECTION,
+                      raw: bool = False):
+        """
+        Envoie une requête JSON-RPC et retourne la réponse décodée, ou les octets bruts si
+        `raw=True` (lève une RPCError en cas d'échec).
+        """
+        payload = {
+            "jsonrpc": "2.0",
+            "id": self._next_id(),
+            "method": method,
+            "params": params if params else []
+        }
+        return await self._post(payload, method, priority, raw=raw)
+
+    async def request_batch(self, calls: List[Tuple[str, list]],
+                            priority: int = RPCPriority.DETECTION) -> List[Optional[dict]]:
+        """Envoie un tableau JSON-RPC (batch) et retourne les réponses dans l'ordre des appels."""
+        ids = [self._next_id() for _ in calls]
+        payload = [
+            {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params if params else []}
+            for request_id, (method, params) in zip(ids, calls)
+        ]
+        body = await self._post(payload, f"{calls[0][0]}[batch]", priority, cost=len(calls))
+        if isinstance(body, dict):
+            # Certains fournisseurs répondent par une erreur unique pour tout le batch
+            return [body] * len(calls)
+        by_id = {item.get("id"): item for item in body}
+        return [by_id.get(request_id) for request_id in ids]
+
+    @property
+    def is_closed(self) -> bool:
+        return self._client.is_closed
+
+    async def close(self):
+        await self._client.aclose()
+
+
+class SingleFlight:
+    """Mutualise les requêtes identiques en cours : un seul appel réseau, un résultat partagé."""
+
+    def __init__(self):
+        self._inflight: Dict[tuple, Tuple[asyncio.Future, int]] = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    @staticmethod
+    def make_key(url: str, method: str, params: list = None, raw: bool = False) -> tuple:
+        # La commitment fait partie des params : deux commitments différentes ne sont pas fusionnées
+        return (url, method, json.dumps(params or [], sort_keys=True, separators=(",", ":")), raw)
+
+    async def do(self, key: tuple, loader, priority: int = RPCPriority.DETECTION):
+        entry = self._inflight.get(key)
+        # On ne rejoint une requête en cours que si elle est au moins aussi prioritaire,
+        # sinon un appel TRADING pourrait attendre derrière une requête ANALYTICS.
+        if entry is None or entry[1] > priority:
+            self.calls += 1
+            task = asyncio.ensure_future(loader())
+            self._inflight[key] = (task, priority)
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            task = entry[0]
+            self.coalesced += 1
+        # shield : l'annulation d'un appelant n'annule pas la requête partagée avec les autres
+        return await asyncio.shield(task)
+
+    def _forget(self, key: tuple, task: asyncio.Future):
+        entry = self._inflight.get(key)
+        if entry is not None and entry[0] is task:
+            del self._inflight[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"calls": self.calls, "coalesced": self.coalesced, "in_flight": len(self._inflight)}
+
+
+# Méthodes à effet de bord : jamais mutualisées
+NON_COALESCABLE_METHODS = {"sendTransaction", "requestAirdrop"}
+
+_clients: Dict[str, RPCClient] = {}
+_routers: Dict[str, Any] = {}
+_single_flight = SingleFlight()
+
+metrics.register_callback("rpc_single_flight_calls_total", lambda: _single_flight.calls, "counter",
+                          "Appels RPC réellement envoyés par la couche single-flight")
+metrics.register_callback("rpc_single_flight_coalesced_total", lambda: _single_flight.coalesced, "counter",
+                          "Appels RPC économisés par mutualisation")
+metrics.register_callback(
+    "rpc_limiter_rate", lambda: {metrics.labels(endpoint=c.name): c.limiter.rate for c in _clients.values()}
+)
+metrics.register_callback(
+    "rpc_limiter_waiting",
+    lambda: {metrics.labels(endpoint=c.name): c.limiter.waiting for c in _clients.values()}
+)
+
+
+def get_rpc_client(url: str) -> RPCClient:
+    """Retourne le client persistant associé à l'endpoint (créé au premier appel)."""
+    client = _clients.get(url)
+    if client is None or client.is_closed:
+        client = RPCClient(url)
+        _clients[url] = client
+    return client
+
+
+def register_rpc_router(router):
+    """Fait passer les appels adressés à l'URL principale du routeur par ce routeur."""
+    _routers[router.primary_url] = router
+
+
+def get_rpc_router(url: str):
+    return _routers.get(url)
+
+
+def get_single_flight_stats() -> Dict[str, int]:
+    """Compteurs de mutualisation : appels réseau réels et appels économisés."""
+    return _single_flight.stats()
+
+
+async def close_rpc_clients():
+    """Ferme proprement toutes les connexions RPC (appelé à l'arrêt de l'application)."""
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.close()
+
+
+async def _send_rpc(url: str, method: str, params: list = None, priority: int = RPCPriority.DETECTION,
+                    raw: bool = False):
+    router = _routers.get(url)
+    if router is not None:
+        return await router.request(method, params, priority, raw)
+    return await get_rpc_client(url).request(method, params, priority, raw)
+
+
+async def _send_with_retry(url: str, method: str, params: list = None, priority: int = RPCPriority.DETECTION,
+                           raw: bool = False):
+    """Réessaie sur 429 avec un backoff exponentiel à gigue (le Retry-After est appliqué par le limiteur)."""
+    attempt = 0
+    while True:
+        try:
+            return await _send_rpc(url, method, params, priority, raw)
+        except RPCRateLimitError as exc:
+            if attempt >= settings.RPC_MAX_RETRIES:
+                raise
+            backoff = min(settings.RPC_BACKOFF_MAX, settings.RPC_BACKOFF_BASE * (2 ** attempt))
+            await asyncio.sleep(max(backoff * random.uniform(0.5, 1.5), exc.retry_after or 0.0))
+            attempt += 1
+
+
+async def call_solana_rpc(url: str, method: str, params: list = None,
+                          priority: int = RPCPriority.DETECTION, strict: bool = False, raw: bool = False):
+    """
+    Appel JSON-RPC via le client persistant (routeur, limiteur et mutualisation inclus).
+
+    Par défaut retourne None en cas d'échec ; avec `strict=True` l'erreur typée (RPCError,
+    RPCRateLimitError, RPCTimeoutError...) est levée pour que l'appelant distingue un échec
+    d'une absence de données. Avec `raw=True` le corps de la réponse est retourné en octets,
+    sans décodage JSON.
+    """
+    try:
+        if settings.RPC_SINGLE_FLIGHT and method not in NON_COALESCABLE_METHODS:
+            key = SingleFlight.make_key(url, method, params, raw)
+            return await _single_flight.do(key, lambda: _send_with_retry(url, method, params, priority, raw), priority)
+        return await _send_with_retry(url, method, params, priority, raw)
+    except RPCError as exc:
+        logger.warning(f"RPC {method} error: {exc}")
+        if strict:
+            raise
+        return None
+
+
+async def call_solana_rpc_batch(url: str, calls: List[Tuple[str, list]], batch_size: int = None,
+                                max_concurrency: int = None,
+                                priority: int = RPCPriority.DETECTION) -> List[Optional[dict]]:
+    """
+    Envoie plusieurs appels RPC sous forme de batchs JSON-RPC concurrents.
+
+    Les appels sont découpés en paquets de `batch_size` envoyés en parallèle (au plus
+    `max_concurrency` à la fois). Le résultat est aligné sur `calls` : chaque élément est la
+    réponse JSON-RPC de l'appel (avec `result` ou `error`), ou None si son paquet a échoué.
+    """
+    if not calls:
+        return []
+    batch_size = batch_size or settings.RPC_BATCH_SIZE
+    semaphore = asyncio.Semaphore(max_concurrency or settings.RPC_BATCH_CONCURRENCY)
+    router = _routers.get(url)
+    client = get_rpc_client(router.ranked()[0].url if router is not None else url)
+    chunks = [calls[i:i + batch_size] for i in range(0, len(calls), batch_size)]
+
+    async def send_chunk(chunk):
+        async with semaphore:
+            try:
+                return await client.request_batch(chunk, priority)
+            except RPCError as exc:
+                logger.warning(f"RPC batch[{len(chunk)}] {chunk[0][0]} error: {exc}")
+                return [None] * len(chunk)
+
+    results = await asyncio.gather(*(send_chunk(chunk) for chunk in chunks))
+    return [response for chunk_responses in results for response in chunk_responses]
 
 async def get_latest_blockhash(rpc_url: str):
     response = await call_solana_rpc(rpc_url, "getRecentBlockhash")
@@ -0,0 +1,105 @@
+import asyncio
+import heapq
+import itertools
+import time
+from enum import IntEnum
+
+
+class RPCPriority(IntEnum):
+    """Voies de priorité RPC : plus petit = plus prioritaire."""
+    TRADING = 0    # achats/ventes, quotes
+    DETECTION = 1  # détection de nouveaux tokens
+    ANALYTICS = 2  # analyses de fond, backfill
+
+
+class PriorityTokenBucket:
+    """
+    Token bucket par endpoint avec files d'attente prioritaires.
+
+    Les requêtes en attente sont servies strictement par priorité puis par ordre d'arrivée.
+    Une réserve de jetons n'est accessible qu'à la voie TRADING pour que le trafic de fond ne
+    vide jamais le bucket juste avant un achat. Le débit s'adapte (AIMD) : divisé par deux sur
+    un 429, puis remonté progressivement à chaque succès.
+    """
+
+    def __init__(self, rate: float, burst: float, reserve: float = 0.2, min_rate: float = 1.0):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min(min_rate, rate)
+        self.capacity = max(1.0, burst)
+        self.reserve = self.capacity * reserve
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._drainer = None
+        self.throttled = 0
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _required(self, priority: int, cost: float) -> float:
+        cost = min(cost, self.capacity)
+        if priority > RPCPriority.TRADING:
+            return min(self.capacity, cost + self.reserve)
+        return cost
+
+    async def acquire(self, priority: int = RPCPriority.DETECTION, cost: float = 1.0):
+        """Attend qu'un jeton soit disponible pour la voie donnée."""
+        self._refill()
+        if not self._waiters and time.monotonic() >= self.paused_until \
+                and self.tokens >= self._required(priority, cost):
+            self.tokens -= min(cost, self.capacity)
+            return
+        self.throttled += 1
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (int(priority), next(self._sequence), cost, future))
+        if self._drainer is None or self._drainer.done():
+            self._drainer = asyncio.create_task(self._drain())
+        await future
+
+    async def _drain(self):
+        while self._waiters:
+            priority, _, cost, future = self._waiters[0]
+            if future.done():  # appelant annulé
+                heapq.heappop(self._waiters)
+                continue
+            now = time.monotonic()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            self._refill()
+            required = self._required(priority, cost)
+            if self.tokens < required:
+                await asyncio.sleep((required - self.tokens) / self.rate)
+                continue
+            heapq.heappop(self._waiters)
+            self.tokens -= min(cost, self.capacity)
+            future.set_result(None)
+
+    def penalize(self, retry_after: float = None):
+        """Réaction à un 429 : pause jusqu'au Retry-After et réduction multiplicative du débit."""
+        self.rate = max(self.min_rate, self.rate / 2)
+        if retry_after:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+        self.tokens = min(self.tokens, 0.0)
+
+    def reward(self):
+        """Succès : remontée additive du débit vers le maximum configuré."""
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate * 0.02)
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def stats(self) -> dict:
+        return {
+            "rate": round(self.rate, 2),
+            "tokens": round(self.tokens, 2),
+            "waiting": self.waiting,
+            "throttled": self.throttled,
+        }
@@ -0,0 +1,199 @@
+import asyncio
+import time
+from collections import deque
+from typing import Dict, List, Optional
+from loguru import logger
+from ..config.settings import settings
+from ..utils.metrics import metrics
+from .rpc_client import RPCError, get_rpc_client
+from .rpc_limiter import RPCPriority
+
+# Codes JSON-RPC indiquant un nœud en mauvaise santé (et non une absence de données)
+UNHEALTHY_NODE_ERROR_CODES = {-32005}
+
+
+class EndpointStats:
+    """Latence glissante et score d'erreur d'un endpoint RPC."""
+
+    def __init__(self, url: str, window: int = 200):
+        self.url = url
+        self.name = url.split("?")[0]  # sans la clé d'API éventuelle, pour les logs
+        self.latencies = deque(maxlen=window)
+        self.error_rate = 0.0  # moyenne mobile exponentielle des échecs
+        self.consecutive_errors = 0
+        self.last_error_at = 0.0
+        self.requests = 0
+        self.errors = 0
+
+    def record_success(self, latency_ms: float):
+        self.requests += 1
+        self.latencies.append(latency_ms)
+        self.error_rate *= 0.9
+        self.consecutive_errors = 0
+
+    def record_error(self):
+        self.requests += 1
+        self.errors += 1
+        self.error_rate = self.error_rate * 0.9 + 0.1
+        self.consecutive_errors += 1
+        self.last_error_at = time.monotonic()
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        index = min(len(ordered) - 1, int(round(p / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+
+    def is_healthy(self, max_consecutive_errors: int, cooldown: float) -> bool:
+        if self.consecutive_errors < max_consecutive_errors:
+            return True
+        # Après la période de refroidissement, l'endpoint est de nouveau essayé
+        return time.monotonic() - self.last_error_at >= cooldown
+
+    @property
+    def score(self) -> float:
+        """Plus petit = meilleur : latence médiane pénalisée par le taux d'erreur."""
+        median = self.percentile(50)
+        if median is None:
+            median = 0.0  # endpoint jamais mesuré : on l'essaie en priorité
+        return median * (1.0 + 4.0 * self.error_rate)
+
+    def snapshot(self) -> Dict[str, float]:
+        return {
+            "url": self.name,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "error_rate": round(self.error_rate, 4),
+            "consecutive_errors": self.consecutive_errors,
+            "requests": self.requests,
+            "errors": self.errors,
+        }
+
+
+class RPCRouter:
+    """
+    Routeur RPC multi-endpoints.
+
+    Chaque méthode est envoyée à l'endpoint sain le plus rapide ; en cas d'échec on bascule
+    sur le suivant. Pour les méthodes critiques en latence, une requête doublée est envoyée au
+    deuxième endpoint si le premier n'a pas répondu après son percentile de latence.
+    """
+
+    def __init__(self, urls: List[str], hedge_methods: List[str] = None, hedge_enabled: bool = None,
+                 hedge_percentile: float = None, hedge_min_delay_ms: float = None, window: int = None,
+                 max_consecutive_errors: int = None, cooldown: float = None):
+        if not urls:
+            raise ValueError("RPCRouter requiert au moins un endpoint.")
+        window = window or settings.RPC_ROUTER_WINDOW
+        self.endpoints = [EndpointStats(url, window) for url in dict.fromkeys(urls)]
+        self.hedge_methods = set(settings.RPC_HEDGE_METHODS if hedge_methods is None else hedge_methods)
+        self.hedge_enabled = settings.RPC_HEDGE_ENABLED if hedge_enabled is None else hedge_enabled
+        self.hedge_percentile = hedge_percentile or settings.RPC_HEDGE_PERCENTILE
+        self.hedge_min_delay = (hedge_min_delay_ms or settings.RPC_HEDGE_MIN_DELAY_MS) / 1000.0
+        self.max_consecutive_errors = max_consecutive_errors or settings.RPC_ROUTER_MAX_CONSECUTIVE_ERRORS
+        self.cooldown = cooldown or settings.RPC_ROUTER_COOLDOWN
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        metrics.register_callback("rpc_hedges_sent_total", lambda: self.hedges_sent, "counter",
+                                  "Requêtes RPC doublées sur un second endpoint")
+        metrics.register_callback("rpc_hedges_won_total", lambda: self.hedges_won, "counter",
+                                  "Requêtes doublées où le second endpoint a répondu en premier")
+        metrics.register_callback("rpc_endpoint_error_rate", lambda: {
+            metrics.labels(endpoint=e.name): e.error_rate for e in self.endpoints
+        })
+
+    @property
+    def primary_url(self) -> str:
+        return self.endpoints[0].url
+
+    def ranked(self) -> List[EndpointStats]:
+        """Endpoints triés du meilleur au moins bon, les endpoints sains en premier."""
+        healthy = [e for e in self.endpoints if e.is_healthy(self.max_consecutive_errors, self.cooldown)]
+        unhealthy = [e for e in self.endpoints if e not in healthy]
+        return sorted(healthy, key=lambda e: e.score) + sorted(unhealthy, key=lambda e: e.score)
+
+    async def _send(self, endpoint: EndpointStats, method: str, params: list = None,
+                    priority: int = RPCPriority.DETECTION, raw: bool = False):
+        start = time.perf_counter()
+        try:
+            response = await get_rpc_client(endpoint.url).request(method, params, priority, raw)
+        except RPCError:
+            endpoint.record_error()
+            raise
+        error = response.get("error") if isinstance(response, dict) else None
+        if error and error.get("code") in UNHEALTHY_NODE_ERROR_CODES:
+            endpoint.record_error()
+            raise RPCError(f"{endpoint.name}: {error.get('message')}", url=endpoint.url, method=method)
+        endpoint.record_success((time.perf_counter() - start) * 1000)
+        return response
+
+    def _hedge_delay(self, endpoint: EndpointStats) -> float:
+        latency = endpoint.percentile(self.hedge_percentile)
+        if latency is None:
+            return self.hedge_min_delay
+        return max(self.hedge_min_delay, latency / 1000.0)
+
+    async def request(self, method: str, params: list = None, priority: int = RPCPriority.DETECTION,
+                      raw: bool = False):
+        """Envoie la requête au meilleur endpoint (avec bascule et requête doublée si activée)."""
+        candidates = self.ranked()
+        if self.hedge_enabled and method in self.hedge_methods and len(candidates) > 1:
+            return await self._hedged_request(candidates, method, params, priority, raw)
+        last_exc = None
+        for endpoint in candidates:
+            try:
+                return await self._send(endpoint, method, params, priority, raw)
+            except RPCError as exc:
+                last_exc = exc
+                logger.warning(f"RPC {method} en échec sur {endpoint.name} : {exc}")
+        raise last_exc
+
+    async def _hedged_request(self, candidates: List[EndpointStats], method: str, params: list = None,
+                              priority: int = RPCPriority.DETECTION, raw: bool = False):
+        primary, secondary = candidates[0], candidates[1]
+        first = asyncio.create_task(self._send(primary, method, params, priority, raw))
+        tasks = [first]
+        try:
+            done, _ = await asyncio.wait({first}, timeout=self._hedge_delay(primary))
+            if done and first.exception() is None:
+                return first.result()
+            # Le premier endpoint est lent (ou a échoué) : on double la requête sur le second
+            self.hedges_sent += 1
+            second = asyncio.create_task(self._send(secondary, method, params, priority, raw))
+            tasks.append(second)
+            pending = {second} if done else {first, second}
+            last_exc = first.exception() if done else None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedges_won += 1
+                        return task.result()
+                    last_exc = task.exception()
+            raise last_exc
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def probe(self):
+        """Mesure la latence de chaque endpoint avec un getSlot (alimente les scores)."""
+        results = await asyncio.gather(
+            *(self._send(endpoint, "getSlot", priority=RPCPriority.ANALYTICS) for endpoint in self.endpoints),
+            return_exceptions=True
+        )
+        return dict(zip((e.name for e in self.endpoints), results))
+
+    def snapshot(self) -> List[Dict[str, float]]:
+        return [endpoint.snapshot() for endpoint in self.ranked()]
+
+
+def build_rpc_router() -> RPCRouter:
+    """Construit le routeur à partir de la configuration (SOLANA_RPC_URL, Helius, endpoints de secours)."""
+    urls = [settings.SOLANA_RPC_URL]
+    if settings.HELIUS_API_KEY:
+        urls.append(f"https://mainnet.helius-rpc.com/?api-key={settings.HELIUS_API_KEY}")
+    urls.extend(settings.SOLANA_RPC_FALLBACK_URLS)
+    return RPCRouter(urls)
@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import random
+import time
+from typing import Any, Dict, Iterator, List, Tuple
+import base58
+from loguru import logger
+from ..config.settings import settings
+from .block_decoder import (
+    _WireKeys, _instruction_records, b58encode, parse_wire_transaction_at, WATCHED_PROGRAM_KEYS
+)
+from .ingest import IngestSource, transaction_event
+from .log_matcher import PUMP_FUN_PROGRAM_ID
+
+try:
+    import grpc
+except ImportError:  # grpcio optionnel : seule la source shredstream en dépend
+    grpc = None
+
+# Service du proxy Jito ShredStream : SubscribeEntries(SubscribeEntriesRequest) -> stream Entry
+# avec Entry { uint64 slot = 1; bytes entries = 2; }, `entries` étant un Vec<Entry> bincode.
+SUBSCRIBE_ENTRIES_METHOD = "/shredstream.ShredstreamProxy/SubscribeEntries"
+
+PUMP_FUN_PROGRAM_KEY = base58.b58decode(PUMP_FUN_PROGRAM_ID)
+# Discriminant Anchor de l'instruction create de pump.fun (compte 0 : le mint)
+PUMP_CREATE_INSTRUCTION = hashlib.sha256(b"global:create").digest()[:8]
+_PREFILTER_KEYS = (*WATCHED_PROGRAM_KEYS, PUMP_FUN_PROGRAM_KEY)
+
+
+def _read_varint(data: bytes, offset: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return value, offset
+        shift += 7
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def decode_entry_message(data: bytes) -> Tuple[int, bytes]:
+    """Message protobuf Entry -> (slot, entries bincode), sans code généré."""
+    slot, entries, offset = 0, b"", 0
+    while offset < len(data):
+        key, offset = _read_varint(data, offset)
+        field, wire_type = key >> 3, key & 7
+        if wire_type == 0:
+            value, offset = _read_varint(data, offset)
+            if field == 1:
+                slot = value
+        elif wire_type == 2:
+            length, offset = _read_varint(data, offset)
+            if field == 2:
+                entries = data[offset:offset + length]
+            offset += length
+        elif wire_type == 1:
+            offset += 8
+        elif wire_type == 5:
+            offset += 4
+        else:
+            raise ValueError(f"type protobuf {wire_type} inattendu")
+    return slot, entries
+
+
+def encode_entry_message(slot: int, entries: bytes) -> bytes:
+    return b"\x08" + _varint(slot) + b"\x12" + _varint(len(entries)) + entries
+
+
+def encode_entries(batches: List[List[bytes]]) -> bytes:
+    """Vec<Entry> bincode : une entrée (num_hashes, hash, transactions) par lot de transactions sérialisées."""
+    out = bytearray(len(batches).to_bytes(8, "little"))
+    for transactions in batches:
+        out += (1).to_bytes(8, "little") + bytes(32) + len(transactions).to_bytes(8, "little")
+        for raw in transactions:
+            out += raw
+    return bytes(out)
+
+
+def iter_entry_transactions(entries: bytes) -> Iterator[Tuple[int, int]]:
+    """(début, fin) de chaque transaction d'un Vec<Entry> bincode ; les transactions y sont au format wire."""
+    count = int.from_bytes(entries[:8], "little")
+    offset = 8
+    for _ in range(count):
+        offset += 8 + 32  # num_hashes, hash
+        transaction_count = int.from_bytes(entries[offset:offset + 8], "little")
+        offset += 8
+        for _ in range(transaction_count):
+            end = parse_wire_transaction_at(entries, offset)[4]
+            yield offset, end
+            offset = end
+
+
+def shred_transaction_mints(raw: bytes, slot: int) -> List[Dict[str, Any]]:
+    """
+    Créations de mint d'une transaction vue dans les shreds (avant exécution : ni logs ni
+    instructions internes). Retient InitializeMint(2) de premier niveau et l'instruction
+    create de pump.fun, dont le mint est le premier compte.
+    """
+    if not any(key in raw for key in _PREFILTER_KEYS):
+        return []
+    signature, static_keys, instructions, loaded_count, _ = parse_wire_transaction_at(raw, 0)
+    # Adresses des lookup tables non résolues (pas de meta) : None
+    keys = _WireKeys(static_keys, [None] * loaded_count)
+    records = [record for record in _instruction_records(keys, None, instructions, slot)
+               if record["type"] == "mint_init"]
+    for instr in instructions:
+        index = instr["programIdIndex"]
+        if index < len(static_keys) and static_keys[index] == PUMP_FUN_PROGRAM_KEY \
+                and instr["data"][:8] == PUMP_CREATE_INSTRUCTION and instr["accounts"]:
+            records.append({"type": "mint_init", "mint": keys[instr["accounts"][0]], "creator": keys[0], "slot": slot})
+    if records:
+        encoded_signature = b58encode(signature)
+        for record in records:
+            record["signature"] = encoded_signature
+    return records
+
+
+class ShredstreamSource(IngestSource):
+    """
+    Flux d'entrées d'un proxy Jito ShredStream (gRPC) : les transactions sont vues avant même
+    d'être `processed`. Appels gRPC génériques (pas de stubs générés) ; grpcio est optionnel.
+    """
+
+    name = "shredstream"
+    commitment = "processed"
+
+    def __init__(self, url: str = None):
+        self.url = url or settings.JITO_SHREDSTREAM_GRPC_URL
+        self.entries_received = 0
+
+    def _channel(self):
+        if self.url.startswith("https://"):
+            return grpc.aio.secure_channel(self.url[len("https://"):], grpc.ssl_channel_credentials())
+        return grpc.aio.insecure_channel(self.url.replace("http://", ""))
+
+    async def run(self, emit):
+        if grpc is None:
+            logger.error("Source shredstream indisponible : grpcio n'est pas installé.")
+            return
+        attempt = 0
+        while True:
+            connected_at = time.monotonic()
+            try:
+                async with self._channel() as channel:
+                    subscribe = channel.unary_stream(
+                        SUBSCRIBE_ENTRIES_METHOD,
+                        request_serializer=lambda request: b"",
+                        response_deserializer=decode_entry_message,
+                    )
+                    logger.info(f"Abonné aux entrées ShredStream sur {self.url}.")
+                    async for slot, entries in subscribe(None):
+                        self.entries_received += 1
+                        await self._handle_entries(slot, entries, emit)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Flux ShredStream interrompu : {e}")
+            if time.monotonic() - connected_at >= settings.WS_STABLE_CONNECTION_SECONDS:
+                attempt = 0
+            await asyncio.sleep(random.uniform(0, min(settings.WS_RECONNECT_MAX_DELAY,
+                                                      settings.WS_RECONNECT_BASE_DELAY * (2 ** attempt))))
+            attempt += 1
+
+    async def _handle_entries(self, slot: int, entries: bytes, emit):
+        for start, end in iter_entry_transactions(entries):
+            for record in shred_transaction_mints(entries[start:end], slot):
+                await emit(transaction_event(self.name, record["signature"], slot, self.commitment,
+                                             mint=record["mint"], creator=record["creator"]))
@@ -0,0 +1,78 @@
+import json
+import os
+import time
+from typing import List, Optional, Tuple
+from loguru import logger
+from ..config.settings import settings
+
+
+class SlotCheckpoint:
+    """
+    Curseur de scan persisté dans un fichier JSON.
+
+    L'écriture est atomique (fichier temporaire + os.replace) et groupée : on ne réécrit le
+    fichier que tous les `flush_every_slots` slots ou toutes les `flush_interval` secondes.
+    Les plages de slots encore à rattraper (gaps) sont persistées avec le curseur pour qu'un
+    redémarrage pendant un backfill ne les perde pas.
+    """
+
+    def __init__(self, path: str = None, flush_every_slots: int = None, flush_interval: float = None):
+        self.path = path or settings.SCAN_CHECKPOINT_PATH
+        self.flush_every_slots = flush_every_slots or settings.SCAN_CHECKPOINT_FLUSH_SLOTS
+        self.flush_interval = flush_interval or settings.SCAN_CHECKPOINT_FLUSH_INTERVAL
+        self.slot: Optional[int] = None
+        self.gaps: List[List[int]] = []
+        self._persisted_slot: Optional[int] = None
+        self._last_flush = 0.0
+        self._dirty = False
+
+    def load(self) -> Tuple[Optional[int], List[List[int]]]:
+        """Retourne (dernier slot scanné, plages à rattraper) ou (None, []) sans checkpoint."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.slot = int(data["slot"])
+            self.gaps = [[int(start), int(end)] for start, end in data.get("gaps", []) if start <= end]
+            self._persisted_slot = self.slot
+        except FileNotFoundError:
+            return None, []
+        except Exception as e:
+            logger.warning(f"Checkpoint de scan illisible ({self.path}) : {e}")
+            return None, []
+        return self.slot, list(self.gaps)
+
+    def update(self, slot: int):
+        """Enregistre le nouveau curseur ; n'écrit sur disque que par lots."""
+        if self.slot is not None and slot <= self.slot:
+            return
+        self.slot = slot
+        self._dirty = True
+        if self._persisted_slot is None or slot - self._persisted_slot >= self.flush_every_slots \
+                or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def set_gaps(self, gaps: List[List[int]], flush: bool = False):
+        self.gaps = [list(gap) for gap in gaps if gap[0] <= gap[1]]
+        self._dirty = True
+        if flush:
+            self.flush()
+
+    def flush(self):
+        if not self._dirty or self.slot is None:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"slot": self.slot, "gaps": self.gaps, "updated_at": time.time()}, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error(f"Écriture du checkpoint de scan impossible ({self.path}) : {e}")
+            return
+        self._persisted_slot = self.slot
+        self._last_flush = time.monotonic()
+        self._dirty = False
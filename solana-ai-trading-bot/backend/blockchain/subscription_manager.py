@@ -0,0 +1,291 @@
+import asyncio
+import itertools
+import json
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+import websockets
+from loguru import logger
+from ..config.settings import settings
+from ..utils.metrics import metrics
+from .work_queue import WorkQueue, POLICY_DROP_OLDEST
+
+Callback = Callable[[Any], Union[None, Awaitable[None]]]
+
+metrics.describe("ws_subscription_notifications_total", "Notifications reçues par le gestionnaire d'abonnements, par méthode")
+metrics.describe("ws_subscription_reconnects_total", "Reconnexions des sockets du gestionnaire d'abonnements")
+
+
+class _Subscription:
+    """Abonnement serveur partagé par tous les intérêts identiques (méthode + paramètres)."""
+
+    def __init__(self, key: Tuple[str, str], method: str, params: list):
+        self.key = key
+        self.method = method
+        self.params = params
+        self.callbacks: List[Callback] = []
+        self.server_id: Optional[int] = None
+        self.connection: Optional["_Connection"] = None
+
+
+class SubscriptionHandle:
+    """Intérêt d'un composant ; à rendre via SubscriptionManager.unsubscribe."""
+
+    def __init__(self, key: Tuple[str, str], callback: Callback):
+        self.key = key
+        self.callback = callback
+        self.active = True
+
+
+class _Connection:
+    """Une socket supervisée : reconnexion avec backoff à gigue et réabonnement complet."""
+
+    def __init__(self, manager: "SubscriptionManager", index: int):
+        self.manager = manager
+        self.index = index
+        self.ws = None
+        self.subscriptions: Dict[Tuple[str, str], _Subscription] = {}
+        self.by_server_id: Dict[int, _Subscription] = {}
+        self.requests: Dict[int, Tuple[str, _Subscription]] = {}  # id JSON-RPC -> (sub|unsub, abonnement)
+        self.task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        attempt = 0
+        while True:
+            connected_at = time.monotonic()
+            try:
+                async with websockets.connect(self.manager.websocket_url, ping_interval=5, close_timeout=1) as ws:
+                    self.ws = ws
+                    connected_at = time.monotonic()
+                    logger.info(f"Gestionnaire d'abonnements : socket {self.index} connectée, "
+                                f"{len(self.subscriptions)} abonnements à rétablir.")
+                    self.by_server_id.clear()
+                    self.requests.clear()
+                    for subscription in list(self.subscriptions.values()):
+                        subscription.server_id = None
+                        await self.send_subscribe(subscription)
+                    async for message in ws:
+                        self._handle(json.loads(message))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Gestionnaire d'abonnements : socket {self.index} en erreur : {e}")
+            finally:
+                self.ws = None
+            if time.monotonic() - connected_at >= settings.WS_STABLE_CONNECTION_SECONDS:
+                attempt = 0
+            delay = random.uniform(0, min(settings.WS_RECONNECT_MAX_DELAY,
+                                          settings.WS_RECONNECT_BASE_DELAY * (2 ** attempt)))
+            attempt += 1
+            metrics.inc("ws_subscription_reconnects_total")
+            await asyncio.sleep(delay)
+
+    async def _send(self, kind: str, subscription: _Subscription, method: str, params: list):
+        if self.ws is None:
+            return  # envoyé au (re)connect
+        request_id = next(self.manager._request_ids)
+        self.requests[request_id] = (kind, subscription)
+        try:
+            await self.ws.send(json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}))
+        except Exception as e:
+            self.requests.pop(request_id, None)
+            logger.warning(f"Envoi {method} impossible sur la socket {self.index} : {e}")
+
+    async def send_subscribe(self, subscription: _Subscription):
+        await self._send("sub", subscription, subscription.method, subscription.params)
+
+    async def send_unsubscribe(self, subscription: _Subscription):
+        if subscription.server_id is None:
+            return  # pas encore confirmé : désabonné à la réception de l'id
+        self.by_server_id.pop(subscription.server_id, None)
+        await self._send("unsub", subscription, subscription.method.replace("Subscribe", "Unsubscribe"),
+                         [subscription.server_id])
+
+    def _handle(self, data: Dict[str, Any]):
+        if "id" in data and data["id"] in self.requests:
+            kind, subscription = self.requests.pop(data["id"])
+            if kind != "sub":
+                return
+            if "error" in data:
+                logger.error(f"{subscription.method} {subscription.params} refusé : {data['error']}")
+                return
+            subscription.server_id = data["result"]
+            # Identité, pas seulement la clé : un réabonnement sur la même clé a pu remplacer cette demande
+            if self.subscriptions.get(subscription.key) is subscription:
+                self.by_server_id[subscription.server_id] = subscription
+            else:
+                # Plus aucun intérêt depuis l'envoi de la demande
+                asyncio.create_task(self.send_unsubscribe(subscription))
+            return
+        method = data.get("method", "")
+        if not method.endswith("Notification"):
+            return
+        params = data.get("params") or {}
+        subscription = self.by_server_id.get(params.get("subscription"))
+        if subscription is None:
+            return
+        metrics.inc("ws_subscription_notifications_total", metrics.labels(method=subscription.method))
+        for callback in list(subscription.callbacks):
+            self.manager._dispatch(callback, params.get("result"))
+        if method == "signatureNotification":
+            # Le serveur clôt lui-même un signatureSubscribe après la notification
+            self.by_server_id.pop(subscription.server_id, None)
+            self.manager._drop(subscription)
+
+
+class SubscriptionManager:
+    """
+    Abonnements WebSocket multiplexés (accountSubscribe, signatureSubscribe, slotSubscribe,
+    logsSubscribe) pour tous les composants.
+
+    Les intérêts identiques partagent un seul abonnement serveur, compté par référence : il est
+    résilié quand le dernier intérêt disparaît. Les abonnements sont répartis sur au plus
+    `max_connections` sockets de `max_per_connection` abonnements. Les callbacks (fonctions ou
+    coroutines) sont exécutés par une file de workers, jamais dans la boucle de réception.
+    """
+
+    def __init__(self, websocket_url: str, max_connections: int = None, max_per_connection: int = None):
+        self.websocket_url = websocket_url
+        self.max_connections = max(1, max_connections or settings.SUBSCRIPTION_MAX_CONNECTIONS)
+        self.max_per_connection = max(1, max_per_connection or settings.SUBSCRIPTION_MAX_PER_CONNECTION)
+        self._connections: List[_Connection] = []
+        self._subscriptions: Dict[Tuple[str, str], _Subscription] = {}
+        self._request_ids = itertools.count(1)
+        self._callback_ids = itertools.count()
+        self.callbacks = WorkQueue(
+            "ws_subscription_callbacks", self._run_callback, maxsize=settings.SUBSCRIPTION_CALLBACK_QUEUE_MAXSIZE,
+            workers=settings.SUBSCRIPTION_CALLBACK_WORKERS, policy=POLICY_DROP_OLDEST
+        )
+
+    @staticmethod
+    def _key(method: str, params: list) -> Tuple[str, str]:
+        return method, json.dumps(params, sort_keys=True, separators=(",", ":"))
+
+    def _connection_for_new(self) -> _Connection:
+        candidates = [c for c in self._connections if len(c.subscriptions) < self.max_per_connection]
+        if not candidates and len(self._connections) < self.max_connections:
+            connection = _Connection(self, len(self._connections))
+            self._connections.append(connection)
+            connection.start()
+            return connection
+        if not candidates:
+            logger.warning(f"Toutes les sockets d'abonnement sont pleines ({self.max_per_connection} abonnements chacune).")
+            candidates = self._connections
+        return min(candidates, key=lambda c: len(c.subscriptions))
+
+    async def subscribe(self, method: str, params: list, callback: Callback) -> SubscriptionHandle:
+        self.callbacks.start()
+        key = self._key(method, params)
+        subscription = self._subscriptions.get(key)
+        if subscription is None:
+            subscription = self._subscriptions[key] = _Subscription(key, method, params)
+            connection = self._connection_for_new()
+            subscription.connection = connection
+            connection.subscriptions[key] = subscription
+            await connection.send_subscribe(subscription)
+        subscription.callbacks.append(callback)
+        return SubscriptionHandle(key, callback)
+
+    async def unsubscribe(self, handle: SubscriptionHandle):
+        if not handle.active:
+            return
+        handle.active = False
+        subscription = self._subscriptions.get(handle.key)
+        if subscription is None:
+            return
+        if handle.callback in subscription.callbacks:
+            subscription.callbacks.remove(handle.callback)
+        if not subscription.callbacks:
+            self._drop(subscription)
+            await subscription.connection.send_unsubscribe(subscription)
+
+    def _drop(self, subscription: _Subscription):
+        self._subscriptions.pop(subscription.key, None)
+        subscription.connection.subscriptions.pop(subscription.key, None)
+
+    def _dispatch(self, callback: Callback, result: Any):
+        asyncio.create_task(self.callbacks.put((callback, result), key=next(self._callback_ids)))
+
+    async def _run_callback(self, item):
+        callback, result = item
+        outcome = callback(result)
+        if asyncio.iscoroutine(outcome):
+            await outcome
+
+    async def account_subscribe(self, pubkey: str, callback: Callback, commitment: str = "confirmed",
+                                encoding: str = "jsonParsed") -> SubscriptionHandle:
+        return await self.subscribe("accountSubscribe", [pubkey, {"commitment": commitment, "encoding": encoding}], callback)
+
+    async def signature_subscribe(self, signature: str, callback: Callback,
+                                  commitment: str = "confirmed") -> SubscriptionHandle:
+        return await self.subscribe("signatureSubscribe", [signature, {"commitment": commitment}], callback)
+
+    async def slot_subscribe(self, callback: Callback) -> SubscriptionHandle:
+        return await self.subscribe("slotSubscribe", [], callback)
+
+    async def logs_subscribe(self, mentions: str, callback: Callback, commitment: str = "confirmed") -> SubscriptionHandle:
+        return await self.subscribe("logsSubscribe", [{"mentions": [mentions]}, {"commitment": commitment}], callback)
+
+    async def wait_for_signature(self, signature: str, commitment: str = "confirmed", timeout: float = None) -> Optional[dict]:
+        """Attend la notification d'une signature ; retourne son résultat, None si délai dépassé."""
+        future = asyncio.get_running_loop().create_future()
+
+        def on_notification(result):
+            if not future.done():
+                future.set_result(result)
+
+        handle = await self.signature_subscribe(signature, on_notification, commitment)
+        try:
+            return await asyncio.wait_for(future, timeout or settings.COMMITMENT_GATE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            await self.unsubscribe(handle)
+
+    def stats(self) -> dict:
+        by_method: Dict[str, int] = {}
+        for subscription in self._subscriptions.values():
+            by_method[subscription.method] = by_method.get(subscription.method, 0) + 1
+        return {
+            "connections": len(self._connections),
+            "connected": sum(1 for c in self._connections if c.ws is not None),
+            "subscriptions": by_method,
+            "interests": sum(len(s.callbacks) for s in self._subscriptions.values()),
+        }
+
+    async def stop(self):
+        for connection in self._connections:
+            if connection.task is not None:
+                connection.task.cancel()
+        await asyncio.gather(*(c.task for c in self._connections if c.task), return_exceptions=True)
+        self._connections = []
+        self._subscriptions.clear()
+        await self.callbacks.stop()
+
+
+_managers: Dict[str, SubscriptionManager] = {}
+
+
+def get_subscription_manager(websocket_url: str = None) -> SubscriptionManager:
+    """Gestionnaire partagé par endpoint (SOLANA_WS_URL par défaut)."""
+    websocket_url = websocket_url or settings.SOLANA_WS_URL
+    if websocket_url not in _managers:
+        _managers[websocket_url] = SubscriptionManager(websocket_url)
+    return _managers[websocket_url]
+
+
+def _subscription_counts() -> Dict[str, int]:
+    counts: Dict[str, int] = {}
+    for manager in _managers.values():
+        for method, count in manager.stats()["subscriptions"].items():
+            counts[method] = counts.get(method, 0) + count
+    return counts
+
+
+metrics.register_callback("ws_subscriptions", lambda: {
+    metrics.labels(method=method): count for method, count in _subscription_counts().items()
+}, help_text="Abonnements serveur actifs, par méthode")
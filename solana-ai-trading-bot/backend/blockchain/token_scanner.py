@@ -1,21 +1,126 @@
 import asyncio
 from loguru import logger
 from ..blockchain.rpc_client import call_solana_rpc, get_token_supply, get_token_holders
+from ..blockchain.block_decoder import BlockDecoder
+from ..blockchain.block_fetcher import BlockFetcher
+from ..blockchain.mint_dedup import get_mint_dedup
+from ..blockchain.rpc_limiter import RPCPriority
+from ..blockchain.slot_checkpoint import SlotCheckpoint
+from ..blockchain.work_queue import WorkQueue
+from ..config.settings import settings
 from ..blockchain.cache_manager import BlockchainCache, TokenAnalyzer
-import base64
+from ..blockchain.disk_cache import get_disk_cache
 import json
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 class TokenScanner:
-    def __init__(self, rpc_url: str, gemini_analyzer, reputation_db_manager, reputation_threshold: float):
+    def __init__(self, rpc_url: str, gemini_analyzer, reputation_db_manager, reputation_threshold: float,
+                 cache_manager: BlockchainCache = None, block_decoder: BlockDecoder = None):
         self.rpc_url = rpc_url
         self.gemini_analyzer = gemini_analyzer
         self.reputation_db_manager = reputation_db_manager
         self.reputation_threshold = reputation_threshold
         self._scanning_task = None
-        self.known_mints = set()
-        self.cache_manager = BlockchainCache(maxsize=1000, ttl=60)
+        # Index partagé avec le listener WebSocket : un mint n'est analysé qu'une fois
+        self.mint_dedup = get_mint_dedup()
+        # Cache partagé du processus (main.py), sinon un cache propre au scanner
+        self.cache_manager = cache_manager or BlockchainCache(maxsize=1000, ttl=60, name="token_scanner", disk=get_disk_cache())
         self.token_analyzer = TokenAnalyzer(rpc_url, self.cache_manager)
+        # Parsing des blocs hors de la boucle asyncio quand BLOCK_DECODE_WORKERS > 0 ; pool partagé (main.py) si fourni
+        self._owns_block_decoder = block_decoder is None
+        self.block_decoder = block_decoder or BlockDecoder()
+        self.block_fetcher = BlockFetcher(
+            rpc_url, decoder=self.block_decoder, max_slot_passes=settings.SCAN_SLOT_MAX_PASSES
+        )
+        self.checkpoint = SlotCheckpoint()
+        self.backfill_fetcher = BlockFetcher(
+            rpc_url, concurrency=settings.SCAN_BACKFILL_CONCURRENCY, priority=RPCPriority.ANALYTICS,
+            decoder=self.block_decoder
+        )
+        self._backfill_task = None
+        # La détection pousse les candidats dans la file ; l'analyse tourne dans un pool de workers.
+        # Un mint évincé de la file sort de l'index pour pouvoir être redétecté.
+        self.mint_queue = WorkQueue(
+            "mint_analysis", self.analyze_and_decide, maxsize=settings.MINT_QUEUE_MAXSIZE,
+            workers=settings.MINT_QUEUE_WORKERS, policy=settings.MINT_QUEUE_POLICY,
+            on_evict=lambda mint_address, _: self.mint_dedup.discard(mint_address)
+        )
+
+    async def _init_cursor(self):
+        """Reprend le curseur persisté : le scan live démarre en tête de chaîne, le trou est rattrapé en fond."""
+        slot_resp = await call_solana_rpc(self.rpc_url, "getSlot", [])
+        current_slot = slot_resp.get("result")
+        saved_slot, gaps = self.checkpoint.load()
+        self.last_scanned_slot = current_slot - 5
+        if saved_slot is not None:
+            if saved_slot < self.last_scanned_slot:
+                gaps.append([saved_slot + 1, self.last_scanned_slot])
+            else:
+                self.last_scanned_slot = saved_slot
+        gaps = self._bound_gaps(gaps)
+        self.checkpoint.update(self.last_scanned_slot)
+        self.checkpoint.set_gaps(gaps, flush=True)
+        if gaps:
+            missing = sum(end - start + 1 for start, end in gaps)
+            logger.info(f"Reprise du scan au slot {self.last_scanned_slot + 1}, backfill de {missing} slots manqués en arrière-plan.")
+            self._backfill_task = asyncio.create_task(self._backfill_loop())
+
+    def _bound_gaps(self, gaps):
+        """Limite le backfill aux SCAN_BACKFILL_MAX_SLOTS slots les plus récents."""
+        budget = settings.SCAN_BACKFILL_MAX_SLOTS
+        bounded = []
+        for start, end in sorted(gaps, key=lambda gap: gap[1], reverse=True):
+            if budget <= 0:
+                logger.warning(f"Backfill abandonné pour les slots {start}-{end} (au-delà de SCAN_BACKFILL_MAX_SLOTS).")
+                continue
+            if end - start + 1 > budget:
+                logger.warning(f"Backfill abandonné pour les slots {start}-{end - budget} (au-delà de SCAN_BACKFILL_MAX_SLOTS).")
+                start = end - budget + 1
+            bounded.append([start, end])
+            budget -= end - start + 1
+        return sorted(bounded)
+
+    async def _backfill_loop(self):
+        """
+        Rejoue les plages manquées en basse priorité, par paquets, en persistant la progression.
+        Un slot qui bloque la plage SCAN_BACKFILL_SLOT_PASSES passages de suite est abandonné.
+        """
+        stuck_slot, passes = None, 0
+        while self.checkpoint.gaps:
+            gaps = [list(gap) for gap in self.checkpoint.gaps]
+            start, end = gaps[0]
+            chunk_end = min(end, start + settings.SCAN_BACKFILL_CHUNK - 1)
+            try:
+                frontier = await self.backfill_fetcher.run(start, chunk_end, self._process_block)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erreur du backfill sur les slots {start}-{chunk_end} : {e}")
+                frontier = start - 1
+            if frontier < start:
+                passes = passes + 1 if stuck_slot == start else 1
+                stuck_slot = start
+                if passes < settings.SCAN_BACKFILL_SLOT_PASSES:
+                    await asyncio.sleep(settings.TOKEN_SCAN_INTERVAL)
+                    continue
+                logger.warning(f"Backfill : slot {start} abandonné après {passes} passages en échec.")
+                frontier = start
+            # Le scan live a pu confier des slots au backfill pendant le passage
+            gaps = [list(gap) for gap in self.checkpoint.gaps]
+            index = next((i for i, gap in enumerate(gaps) if gap[0] == start), None)
+            if index is not None:
+                if frontier >= gaps[index][1]:
+                    gaps.pop(index)
+                else:
+                    gaps[index][0] = frontier + 1
+            self.checkpoint.set_gaps(gaps, flush=True)
+        logger.info("Backfill des slots manqués terminé.")
+
+    def _defer_slot(self, slot: int):
+        """Slot live en échec répété : confié au backfill pour que le curseur avance."""
+        self.checkpoint.set_gaps(self._bound_gaps(self.checkpoint.gaps + [[slot, slot]]), flush=True)
+        if self._backfill_task is None or self._backfill_task.done():
+            self._backfill_task = asyncio.create_task(self._backfill_loop())
 
     async def _scan_for_new_tokens(self):
         import time
@@ -26,35 +131,31 @@ class TokenScanner:
             current_slot = slot_resp.get("result")
             if not hasattr(self, "last_scanned_slot"):
                 self.last_scanned_slot = current_slot - 5
-            # Batch scan des slots
-            slots_to_scan = list(range(self.last_scanned_slot + 1, current_slot + 1))
-            for slot in slots_to_scan:
-                block_resp = await call_solana_rpc(self.rpc_url, "getBlock", [slot, {"encoding": "json", "transactionDetails": "full", "rewards": False}])
-                if not block_resp or not block_resp.get("result"):
-                    continue
-                block = block_resp["result"]
-                transactions = block.get("transactions", [])
-                for tx in transactions:
-                    for instr in tx["transaction"]["message"]["instructions"]:
-                        if instr.get("programId") == "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA":
-                            data = instr.get("data")
-                            if data:
-                                try:
-                                    decoded = base64.b64decode(data)
-                                    if len(decoded) > 0 and decoded[0] == 0:
-                                        mint_address = instr["accounts"][0]
-                                        if mint_address not in self.known_mints:
-                                            logger.info(f"Nouveau token détecté : {mint_address} (slot {slot})")
-                                            await self.analyze_and_decide(mint_address)
-                                            self.known_mints.add(mint_address)
-                                except Exception as e:
-                                    logger.warning(f"Erreur décodage instruction : {e}")
-            self.last_scanned_slot = current_slot
+            # Pipeline getBlock concurrent : le curseur n'avance que sur le préfixe contigu terminé
+            first_slot = self.last_scanned_slot + 1
+            self.last_scanned_slot = await self.block_fetcher.run(
+                first_slot, current_slot, self._process_block, on_give_up=self._defer_slot
+            )
+            self.checkpoint.update(self.last_scanned_slot)
             latency = (time.time() - start) * 1000
-            logger.info(f"Scan batch slots latence: {latency:.1f}ms pour {len(slots_to_scan)} slots.")
+            scanned = self.last_scanned_slot - first_slot + 1
+            logger.info(f"Scan batch slots latence: {latency:.1f}ms pour {scanned}/{current_slot - first_slot + 1} slots.")
         except Exception as e:
             logger.error(f"Erreur lors du scan des nouveaux tokens : {e}")
 
+    async def _process_block(self, slot: int, records: List[Dict[str, Any]]):
+        """Lance l'analyse des mints créés dans un bloc (enregistrements issus du BlockDecoder)."""
+        for record in records:
+            if record["type"] != "mint_init":
+                continue
+            mint_address = record["mint"]
+            if self.mint_dedup.seen(mint_address):
+                continue
+            logger.info(f"Nouveau token détecté : {mint_address} (slot {slot})")
+            # Marqué seulement une fois accepté : un candidat rejeté (file pleine) reste éligible
+            if await self.mint_queue.put(mint_address):
+                self.mint_dedup.add(mint_address)
+
     async def analyze_and_decide(self, token_mint_address: str) -> bool:
         """Analyse complète d'un token potentiel."""
         logger.info(f"Analyzing token: {token_mint_address}")
@@ -96,10 +197,11 @@ class TokenScanner:
             logger.error(f"Error analyzing token {token_mint_address}: {e}")
             return False
     
-    def _is_sufficient_liquidity(self, liquidity: Dict[str, Any]) -> bool:
-        """Vérifie si la liquidité est suffisante."""
-        # Implémenter la logique de vérification de la liquidité
-        return True
+    def _is_sufficient_liquidity(self, liquidity: Optional[Dict[str, Any]]) -> bool:
+        """Vérifie si la liquidité est suffisante (SOL en pool, d'après l'index des pools)."""
+        if liquidity is None:
+            return True  # pas d'index des pools rattaché au cache : pas de filtre
+        return liquidity.get("sol", 0) >= settings.MIN_LIQUIDITY_POOL_SOL
     
     def _is_sufficient_volume(self, volume: Dict[str, Any]) -> bool:
         """Vérifie si le volume de trading est suffisant."""
@@ -108,10 +210,16 @@ class TokenScanner:
 
     async def start_scanning(self, interval: int = 5):
         if self._scanning_task is None or self._scanning_task.done():
+            self.mint_queue.start()
+            self.mint_dedup.start()
             self._scanning_task = asyncio.create_task(self._scanning_loop(interval))
             logger.info(f"Token scanner started with interval: {interval} seconds.")
 
     async def _scanning_loop(self, interval: int):
+        try:
+            await self._init_cursor()
+        except Exception as e:
+            logger.error(f"Impossible de reprendre le curseur de scan : {e}")
         while True:
             try:
                 await self._scan_for_new_tokens()
@@ -125,4 +233,11 @@ class TokenScanner:
             try:
                 await self._scanning_task
             except asyncio.CancelledError:
-                logger.info("Token scanning task cancelled.")
\ No newline at end of file
+                logger.info("Token scanning task cancelled.")
+        if self._backfill_task:
+            self._backfill_task.cancel()
+        await self.mint_queue.stop()
+        self.checkpoint.flush()
+        await self.mint_dedup.stop()
+        if self._owns_block_decoder:
+            self.block_decoder.shutdown()
\ No newline at end of file
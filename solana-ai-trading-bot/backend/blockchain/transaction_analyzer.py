@@ -1,24 +1,32 @@
 import asyncio
 from loguru import logger
 from ..database.db import DatabaseManager, Transaction, Alert
+from .cache_manager import BlockchainCache, fetch_transactions
+from .disk_cache import get_disk_cache
 from .rpc_client import call_solana_rpc
+from .rpc_limiter import RPCPriority
 
 class TransactionAnalyzer:
-    def __init__(self, database_url: str, rpc_url: str):
-        self.db_manager = DatabaseManager(database_url)
+    def __init__(self, database_url: str, rpc_url: str, cache: BlockchainCache = None,
+                 db_manager: DatabaseManager = None):
+        self.db_manager = db_manager or DatabaseManager(database_url)
         self.rpc_url = rpc_url
+        # Transactions finalisées : immuables, persistées sur disque entre deux redémarrages
+        self.cache = cache or BlockchainCache(maxsize=5000, ttl=3600, name="transaction_analyzer", disk=get_disk_cache())
 
     async def analyze_token_transactions(self, mint_address: str):
         logger.info(f"Analyse des transactions pour le token {mint_address}")
         # Récupérer les transactions du token (exemple simplifié : recherche sur le mint)
-        resp = await call_solana_rpc(self.rpc_url, "getSignaturesForAddress", [mint_address, {"limit": 100}])
+        resp = await call_solana_rpc(self.rpc_url, "getSignaturesForAddress", [mint_address, {"limit": 100}], priority=RPCPriority.ANALYTICS)
         if not resp or not resp.get("result"):
             logger.warning(f"Aucune transaction trouvée pour le token {mint_address}")
             return
         signatures = [tx['signature'] for tx in resp['result']]
-        for signature in signatures:
-            tx_resp = await call_solana_rpc(self.rpc_url, "getTransaction", [signature, {"encoding": "json"}])
+        tx_responses = await fetch_transactions(self.cache, self.rpc_url, signatures, priority=RPCPriority.ANALYTICS)
+        for signature, tx_resp in zip(signatures, tx_responses):
             if not tx_resp or not tx_resp.get("result"):
+                if tx_resp and tx_resp.get("error"):
+                    logger.warning(f"getTransaction {signature} en échec : {tx_resp['error']}")
                 continue
             tx = tx_resp["result"]
             # Parcourir les instructions pour détecter des achats sur DEX (exemple : Raydium, Orca, Jupiter, Pump.fun)
@@ -1,206 +1,467 @@
 import asyncio
+import random
+import time
 import websockets
 import json
-import base64
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
 from .rpc_client import call_solana_rpc
+from .rpc_limiter import RPCPriority
 from loguru import logger
-from ..database.db import DatabaseManager, Token, Creator
-from .creator_tracker import CreatorTracker
-from .transaction_analyzer import TransactionAnalyzer
-from .linked_account_detector import LinkedAccountDetector
-from .creator_monitor import CreatorMonitor
-from .real_time_analyzer import RealTimeAnalyzer
-from .cache_manager import BlockchainCache
+from ..config.settings import settings
+from ..database.db import Token, Creator, Transaction
+from .block_decoder import extract_records, ORCA_PROGRAM_ID, RAYDIUM_AMM_PROGRAM_ID, TOKEN_PROGRAM_ID
+from .block_fetcher import BlockFetcher
+from .log_matcher import classify_logs
+from .ingest import IngestHub, build_ingest_sources, transaction_event
+from .commitment_gate import commitment_rank, get_commitment_gate
+from .mint_dedup import get_mint_dedup
+from .work_queue import WorkQueue, POLICY_DROP_OLDEST
+from ..utils.metrics import metrics
+from ..utils.traffic_recorder import get_traffic_recorder
+from ..services import Services
+
+metrics.describe("ws_reconnects_total", "Reconnexions du listener WebSocket")
+metrics.describe("ws_notifications_total", "Notifications logsSubscribe reçues")
+metrics.describe("ws_log_events_total", "Événements extraits des logs (mint_init, pool_init, pump_create)")
+metrics.describe("ws_gap_fill_slots_total", "Slots rattrapés par getBlock après une reconnexion")
+metrics.describe("speculation_total", "Candidats traités à processed, par issue (confirmed, wasted, cancelled)")
+
 
 class WebSocketListener:
-    def __init__(self, websocket_url: str, database_url: str, rpc_url: str):
+    _listeners: List["WebSocketListener"] = []
+
+    def __init__(self, websocket_url: str, database_url: str, rpc_url: str, services: Services = None):
         self.websocket_url = websocket_url
+        self.rpc_url = rpc_url
         self.connection = None
         self.listening_task = None
-        self.db_manager = DatabaseManager(database_url)
-        self.cache_manager = BlockchainCache(maxsize=10000, ttl=300)  # Cache plus grand pour l'analyse en temps réel
-        self.creator_tracker = CreatorTracker(database_url, rpc_url)
-        self.transaction_analyzer = TransactionAnalyzer(database_url, rpc_url)
-        self.linked_account_detector = LinkedAccountDetector(database_url)
-        self.creator_monitor = CreatorMonitor(database_url, rpc_url)
-        self.real_time_analyzer = RealTimeAnalyzer(database_url, rpc_url, self.cache_manager)
-        
+        # Composants partagés du processus (main.py) ; sans conteneur fourni, un conteneur propre à ce listener
+        self._owns_services = services is None
+        services = services or Services(database_url, rpc_url, websocket_url)
+        self.db_manager = services.db_manager
+        self.cache_manager = services.cache
+        self.pool_index = services.pool_index
+        self.creator_tracker = services.creator_tracker
+        self.transaction_analyzer = services.transaction_analyzer
+        self.linked_account_detector = services.linked_account_detector
+        # Abonnements account/signature/slot/logs des autres composants ; la détection garde sa propre socket
+        self.subscription_manager = services.subscription_manager
+        self.creator_monitor = services.creator_monitor
+        self.real_time_analyzer = services.real_time_analyzer
+        self.block_decoder = services.block_decoder
+        self.block_fetcher = BlockFetcher(rpc_url, decoder=self.block_decoder)
+        # Le rattrapage suit les notifications (processed) : on lit les blocs dès `confirmed`
+        self.gap_fetcher = BlockFetcher(rpc_url, decoder=self.block_decoder, commitment="confirmed")
+        # Notifications à WS_SUBSCRIBE_COMMITMENT ; l'achat attend BUY_COMMITMENT via la porte
+        self.subscribe_commitment = settings.WS_SUBSCRIBE_COMMITMENT
+        self.commitment_gate = get_commitment_gate(rpc_url)
+        self._confirmation_waiters = set()
+        # Mints apportés par un événement `upgrade` : l'enregistrement déjà en file pour la signature les reprend
+        self._upgraded_mints: "OrderedDict[str, str]" = OrderedDict()
+        # Index partagé avec le TokenScanner : un mint vu par les deux chemins n'est traité qu'une fois
+        self.mint_dedup = get_mint_dedup()
+        # Suivi de connexion : dernier slot notifié (rattrapage après reconnexion), uptime, débit
+        self.last_notification_slot: Optional[int] = None
+        self.connection_count = 0
+        self.connected_at: Optional[float] = None
+        self.connection_notifications = 0
+        self.last_connection_uptime = 0.0
+        self._gap_fill_task = None
+        # La boucle de réception ne fait que classer les trames ; le travail part dans ces files.
+        # Un mint n'est marqué dans l'index qu'une fois accepté par une file, et oublié s'il en est évincé.
+        self.decision_module = None
+        self.mint_queue = WorkQueue(
+            "ws_mint_candidates", self._handle_mint_candidate, maxsize=settings.WS_QUEUE_MAXSIZE,
+            workers=settings.WS_MINT_WORKERS, policy=POLICY_DROP_OLDEST, on_evict=self._release_mint
+        )
+        self.registration_queue = WorkQueue(
+            "ws_token_registration", self._handle_registration, maxsize=settings.WS_QUEUE_MAXSIZE,
+            workers=settings.WS_REGISTRATION_WORKERS, policy=POLICY_DROP_OLDEST, on_evict=self._release_mint
+        )
+        # Sources d'ingestion empilées (INGEST_SOURCES), dédupliquées par signature avant les files
+        self.ingest = IngestHub(self._handle_transaction_event)
+        self.emit = self.ingest.emit
+        for source in build_ingest_sources(self):
+            self.ingest.add_source(source)
+        WebSocketListener._listeners.append(self)
+
     async def start(self):
         """Démarrage de toutes les surveillances."""
         await self.start_listening()
         await self.creator_monitor.start_monitoring()
         await self.real_time_analyzer.start_analysis()
 
-    async def _listen_for_notifications(self, decision_module=None):
+    async def start_listening(self, decision_module=None):
+        if self.listening_task is None or self.listening_task.done():
+            self.decision_module = decision_module
+            if decision_module is not None and self.creator_monitor not in decision_module.ia_hooks:
+                # Les achats/ventes mettent à jour les créateurs surveillés
+                decision_module.ia_hooks.append(self.creator_monitor)
+            self.mint_queue.start()
+            self.registration_queue.start()
+            self.mint_dedup.start()
+            self.listening_task = asyncio.create_task(self.ingest.run())
+            # Entrées du cache invalidées ou mises à jour par les notifications de slot et de compte
+            await self.cache_manager.watch(self.subscription_manager)
+            logger.info("WebSocket listener started.")
+
+    async def stop_listening(self):
+        if self.listening_task:
+            self.listening_task.cancel()
+            try:
+                await self.listening_task
+            except asyncio.CancelledError:
+                logger.info("WebSocket listening task cancelled.")
+        if self._gap_fill_task is not None:
+            self._gap_fill_task.cancel()
+        for waiter in list(self._confirmation_waiters):
+            waiter.cancel()
+        await self.mint_queue.stop()
+        await self.registration_queue.stop()
+        await self.commitment_gate.stop()
+        await self.creator_monitor.stop_monitoring()
+        await self.real_time_analyzer.stop_analysis()
+        await self.cache_manager.unwatch()
+        await self.pool_index.stop()
+        await self.subscription_manager.stop()
+        if self.connection is not None:
+            await self.connection.close()
+            self.connection = None
+        await self.mint_dedup.stop()
+        if self._owns_services:
+            self.block_decoder.shutdown()
+
+    async def _listen_for_notifications(self):
+        """Connexion supervisée : reconnexion avec backoff à gigue, réabonnement et rattrapage des slots manqués."""
+        attempt = 0
+        while True:
+            try:
+                await self._run_connection()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erreur WebSocket : {e}")
+            finally:
+                self._close_connection_stats()
+            # Une connexion restée stable assez longtemps remet le backoff à zéro
+            if self.last_connection_uptime >= settings.WS_STABLE_CONNECTION_SECONDS:
+                attempt = 0
+            delay = random.uniform(0, min(settings.WS_RECONNECT_MAX_DELAY,
+                                          settings.WS_RECONNECT_BASE_DELAY * (2 ** attempt)))
+            attempt += 1
+            metrics.inc("ws_reconnects_total", self._labels())
+            logger.warning(f"WebSocket déconnecté, reconnexion dans {delay:.2f}s (tentative {attempt}).")
+            await asyncio.sleep(delay)
+
+    async def _run_connection(self):
         logger.info(f"Connecting to WebSocket: {self.websocket_url}")
-        async with websockets.connect(self.websocket_url, ping_interval=2, close_timeout=0.5) as ws:
+        async with websockets.connect(self.websocket_url, ping_interval=5, close_timeout=1) as ws:
             self.connection = ws
-            logger.info("WebSocket connected. Subscribing to program logs.")
+            self.connection_count += 1
+            self.connected_at = time.monotonic()
+            self.connection_notifications = 0
+            logger.info(f"WebSocket connected (connexion n°{self.connection_count}). Subscribing to program logs.")
+
             programs = [
-                {"mentions": ["TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"]},
-                {"mentions": ["9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin"]},
-                {"mentions": ["Orca11111111111111111111111111111111111111111"]},
+                {"mentions": [TOKEN_PROGRAM_ID]},
+                {"mentions": [RAYDIUM_AMM_PROGRAM_ID]},
+                {"mentions": [ORCA_PROGRAM_ID]},
             ]
             for i, program in enumerate(programs):
                 await ws.send(json.dumps({
                     "jsonrpc": "2.0",
                     "id": i + 1,
                     "method": "logsSubscribe",
-                    "params": [program, {"commitment": "finalized"}]
+                    "params": [program, {"commitment": self.subscribe_commitment}]
                 }))
+            if self.last_notification_slot is not None:
+                self._start_gap_fill(self.last_notification_slot)
+
+            recorder = get_traffic_recorder()
             async for message in ws:
-                event_start = asyncio.get_event_loop().time()
-                data = json.loads(message)
-                if 'params' in data and 'result' in data['params'] and 'value' in data['params']['result']:
-                    value = data['params']['result']['value']
-                    if 'logs' in value:
-                        for log_line in value['logs']:
-                            if "initializeMint" in log_line:
-                                logger.info(f"initializeMint detected: {log_line}")
-                                mint_start = asyncio.get_event_loop().time()
-                                mint_address = self._extract_mint_address(log_line)
-                                price_resp = await call_solana_rpc(self.rpc_url, "getTokenSupply", [mint_address])
-                                current_price = 0.0
-                                if price_resp and 'result' in price_resp and 'value' in price_resp['result']:
-                                    current_price = float(price_resp['result']['value'].get('uiAmount', 0.0))
-                                if decision_module is not None:
-                                    await decision_module.process_new_token_candidate(mint_address, current_price)
-                                mint_latency = (asyncio.get_event_loop().time() - mint_start) * 1000
-                                global_latency = (asyncio.get_event_loop().time() - event_start) * 1000
-                                logger.info(f"Latence mint->achat: {mint_latency:.1f}ms | Latence totale event->achat: {global_latency:.1f}ms (objectif <600ms)")
-                                signature = value.get('signature')
-        slot_resp = await call_solana_rpc(self.rpc_url, "getSlot", [])
-        current_slot = slot_resp.get("result")
-        if not hasattr(self, "last_scanned_slot"):
-            self.last_scanned_slot = current_slot - 5
-
-        for slot in range(self.last_scanned_slot + 1, current_slot + 1):
-            block_resp = await call_solana_rpc(self.rpc_url, "getBlock", [slot, {"encoding": "json", "transactionDetails": "full", "rewards": False}])
-            if not block_resp or not block_resp.get("result"):
-                continue
-            block = block_resp["result"]
-            transactions = block.get("transactions", [])
-            for tx in transactions:
-                for instr in tx["transaction"]["message"]["instructions"]:
-                    program_id = instr.get("programId")
-                    data = instr.get("data")
-                    if program_id and data:
-                        decoded = base64.b64decode(data)
-                        instruction_type = decoded[0] if len(decoded) > 0 else None
-                        if program_id == "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA":
-                            await self._analyze_token_instruction(instr, tx)
-                        elif program_id == "9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin":
-                            await self._analyze_raydium_instruction(instr, tx)
-                        elif program_id == "Orca11111111111111111111111111111111111111111":
-                            await self._analyze_orca_instruction(instr, tx)
-        self.last_scanned_slot = current_slot
-                                        mint_address = self._extract_mint_address(log_line)
-                                        price_resp = await call_solana_rpc(self.rpc_url, "getTokenSupply", [mint_address])
-                                        current_price = 0.0
-                                        if price_resp and 'result' in price_resp and 'value' in price_resp['result']:
-                                            current_price = float(price_resp['result']['value'].get('uiAmount', 0.0))
-                                        if decision_module is not None:
-                                            await decision_module.process_new_token_candidate(mint_address, current_price)
-                                        mint_latency = (asyncio.get_event_loop().time() - mint_start) * 1000
-                                        global_latency = (asyncio.get_event_loop().time() - event_start) * 1000
-                                        logger.info(f"Latence mint->achat: {mint_latency:.1f}ms | Latence totale event->achat: {global_latency:.1f}ms (objectif <600ms)")
-                                        signature = value.get('signature')
-        slot_resp = await call_solana_rpc(self.rpc_url, "getSlot", [])
-        current_slot = slot_resp.get("result")
-        if not hasattr(self, "last_scanned_slot"):
-            self.last_scanned_slot = current_slot - 5
-
-        for slot in range(self.last_scanned_slot + 1, current_slot + 1):
-            block_resp = await call_solana_rpc(self.rpc_url, "getBlock", [slot, {"encoding": "json", "transactionDetails": "full", "rewards": False}])
-            if not block_resp or not block_resp.get("result"):
-                continue
-            block = block_resp["result"]
-            transactions = block.get("transactions", [])
-            for tx in transactions:
-                for instr in tx["transaction"]["message"]["instructions"]:
-                    program_id = instr.get("programId")
-                    data = instr.get("data")
-                    if program_id and data:
-                        try:
-                            decoded = base64.b64decode(data)
-                            instruction_type = decoded[0] if len(decoded) > 0 else None
-                            if program_id == "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA":
-                                await self._analyze_token_instruction(instr, tx)
-                            elif program_id == "9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin":
-                                await self._analyze_raydium_instruction(instr, tx)
-                            elif program_id == "Orca11111111111111111111111111111111111111111":
-                                await self._analyze_orca_instruction(instr, tx)
-                        except Exception as e:
-                            logger.warning(f"Erreur décodage instruction : {e}")
-        self.last_scanned_slot = current_slot
-                                logger.warning(f"Erreur décodage instruction : {e}")
-            
-            self.last_scanned_slot = current_slot
-        except Exception as e:
-            logger.error(f"Erreur lors du scan des activités : {e}")
-
-    async def process_new_token(self, signature):
-        # Appel RPC pour récupérer la transaction et extraire le mint et le créateur
-        resp = await call_solana_rpc("https://api.mainnet-beta.solana.com", "getTransaction", [signature, {"encoding": "json"}])
-        if resp and resp.get("result"):
-            tx = resp["result"]
-            # Chercher l'instruction initializeMint
-            for instr in tx["transaction"]["message"]["instructions"]:
-                if instr.get("programId") == "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA":
-                    data = instr.get("data")
-                    if data:
-                        decoded = base64.b64decode(data)
-                        if len(decoded) > 0 and decoded[0] == 0:  # 0 = initializeMint
-                            mint_address = instr["accounts"][0]
-                            creator_address = tx["transaction"]["message"]["accountKeys"][instr["accounts"][1]]
-                            logger.info(f"Mint: {mint_address}, Créateur: {creator_address}")
-                            # Enregistrer dans la base de données
-                            with self.db_manager.SessionLocal() as db:
-                                # Créateur
-                                creator = db.query(Creator).filter_by(address=creator_address).first()
-                                if not creator:
-                                    creator = Creator(address=creator_address)
+                if recorder is not None:
+                    recorder.record_ws(message)
+                await self._handle_message(json.loads(message))
+
+    async def _handle_message(self, data: Dict[str, Any]):
+        """Boucle de réception : classe la trame et la transmet à l'IngestHub, sans attendre de RPC."""
+        if 'params' in data and 'result' in data['params'] and 'value' in data['params']['result']:
+            self.connection_notifications += 1
+            metrics.inc("ws_notifications_total", self._labels())
+            slot = data['params']['result'].get('context', {}).get('slot')
+            if slot is not None and (self.last_notification_slot is None or slot > self.last_notification_slot):
+                self.last_notification_slot = slot
+            value = data['params']['result']['value']
+            if value.get('err'):
+                return
+            events = classify_logs(value.get('logs') or [])
+            signature = value.get('signature')
+            mint_events = []
+            for event in events:
+                metrics.inc("ws_log_events_total", metrics.labels(type=event["type"]))
+                if event["type"] == "pool_init":
+                    logger.info(f"Création de pool Raydium détectée ({signature}) : {event}")
+                    # Le log ne donne pas le mint : les mints indexés encore sans pool sont redécouverts
+                    self.pool_index.on_pool_created()
+                else:
+                    mint_events.append(event)
+            if not mint_events:
+                return
+            # Un lancement pump.fun produit aussi un InitializeMint2 : une seule prise en charge par transaction
+            mint_address = next((event["mint"] for event in mint_events if event.get("mint")), None)
+            creator = next((event["creator"] for event in mint_events if event.get("creator")), None)
+            logger.info(f"{mint_events[0]['type']} detected: {mint_address or signature}")
+            await self.emit(transaction_event("websocket", signature, slot, self.subscribe_commitment,
+                                              mint=mint_address, creator=creator))
+        elif 'id' in data and 'result' in data:
+            logger.info(f"Abonnement logsSubscribe {data['id']} actif (subscription {data['result']}).")
+        elif 'error' in data:
+            logger.error(f"Abonnement WebSocket refusé : {data['error']}")
+
+    async def _handle_transaction_event(self, event: Dict[str, Any]):
+        """Événement dédupliqué par l'IngestHub, quelle que soit sa source : files de décision et d'enregistrement."""
+        signature, slot, mint_address = event["signature"], event["slot"], event["mint"]
+        if mint_address and self.mint_dedup.seen(mint_address):
+            logger.debug(f"Mint {mint_address} déjà traité, ignoré.")
+            return
+        if mint_address and self.decision_module is not None:
+            # Analyse lancée tout de suite ; seul l'achat attend la commitment
+            if await self.mint_queue.put({
+                "mint": mint_address, "received_at": event["received_at"],
+                "confirmation": self._confirmation(signature, slot, event["commitment"], settings.BUY_COMMITMENT),
+            }, key=mint_address):
+                self.mint_dedup.add(mint_address)
+        if event.get("upgrade"):
+            # L'enregistrement est déjà en file sous la signature : on lui transmet le mint, sans doublon
+            # (process_new_token le marque dans l'index en l'enregistrant)
+            self._upgraded_mints[signature] = mint_address
+            if len(self._upgraded_mints) > settings.INGEST_DEDUP_SIZE:
+                self._upgraded_mints.popitem(last=False)
+            return
+        if signature:
+            item = (signature, mint_address, event["creator"])
+            confirmation = self._confirmation(signature, slot, event["commitment"], "confirmed")
+            if confirmation is None:
+                await self._queue_registration(item)
+            else:
+                # getTransaction ne voit pas une transaction seulement processed
+                waiter = asyncio.create_task(self._register_when_confirmed(item, confirmation))
+                self._confirmation_waiters.add(waiter)
+                waiter.add_done_callback(self._confirmation_waiters.discard)
+
+    def _confirmation(self, signature: Optional[str], slot: Optional[int], commitment: str,
+                      level: str) -> Optional[asyncio.Future]:
+        """Future de la porte de commitment, ou None si l'événement est déjà au niveau demandé."""
+        if commitment_rank(commitment) >= commitment_rank(level) or not signature or slot is None:
+            return None
+        return self.commitment_gate.watch(signature, slot, level)
+
+    async def _handle_mint_candidate(self, candidate: Dict[str, Any]):
+        """Travail spéculatif ; annulé si la transaction est perdue sur un fork avant la fin."""
+        confirmation = candidate.get("confirmation")
+        work = asyncio.create_task(self._speculate(candidate))
+        if confirmation is None:
+            await work
+            return
+        done, _ = await asyncio.wait({work, confirmation}, return_when=asyncio.FIRST_COMPLETED)
+        if work not in done and not self._confirmed(confirmation):
+            work.cancel()
+            try:
+                await work
+            except asyncio.CancelledError:
+                pass
+            metrics.inc("speculation_total", metrics.labels(outcome="cancelled"))
+            logger.info(f"Travail spéculatif sur {candidate['mint']} annulé : transaction non confirmée.")
+            return
+        await work
+        # Candidat rejeté par les filtres : le travail finit souvent avant la porte, l'issue est comptée à sa résolution
+        if confirmation.done():
+            self._count_speculation(confirmation)
+        else:
+            confirmation.add_done_callback(self._count_speculation)
+
+    @staticmethod
+    def _confirmed(confirmation: asyncio.Future) -> bool:
+        """Issue d'une porte de commitment terminée : annulée ou en erreur vaut « non confirmée »."""
+        if confirmation.cancelled() or confirmation.exception() is not None:
+            return False
+        return bool(confirmation.result())
+
+    @staticmethod
+    def _count_speculation(confirmation: asyncio.Future):
+        if confirmation.cancelled() or confirmation.exception() is not None:
+            return
+        metrics.inc("speculation_total", metrics.labels(outcome="confirmed" if confirmation.result() else "wasted"))
+
+    async def _speculate(self, candidate: Dict[str, Any]):
+        """Voie rapide : prix initial puis module de décision (l'achat lui-même attend la confirmation)."""
+        mint_start = asyncio.get_event_loop().time()
+        mint_address = candidate["mint"]
+        # Récupération du prix initial via la voie RPC prioritaire
+        price_resp = await call_solana_rpc(
+            self.rpc_url, "getTokenSupply", [mint_address], priority=RPCPriority.TRADING
+        )
+        current_price = 0.0
+        if price_resp and 'result' in price_resp and 'value' in price_resp['result']:
+            current_price = float(price_resp['result']['value'].get('uiAmount', 0.0))
+        await self.decision_module.process_new_token_candidate(
+            mint_address, current_price, confirmation=candidate.get("confirmation")
+        )
+        now = asyncio.get_event_loop().time()
+        mint_latency = (now - mint_start) * 1000
+        global_latency = (now - candidate["received_at"]) * 1000
+        logger.info(f"Latence mint->achat: {mint_latency:.1f}ms | Latence totale event->achat: {global_latency:.1f}ms (objectif <600ms)")
+
+    async def _register_when_confirmed(self, item, confirmation: asyncio.Future):
+        await asyncio.wait({confirmation})
+        if self._confirmed(confirmation):
+            await self._queue_registration(item)
+        else:
+            self._upgraded_mints.pop(item[0], None)
+
+    async def _queue_registration(self, item):
+        mint_address = item[1]
+        if await self.registration_queue.put(item, key=mint_address or item[0]) and mint_address:
+            self.mint_dedup.add(mint_address)
+
+    def _release_mint(self, key, item):
+        """Rappel d'éviction : le mint redevient éligible s'il n'est plus dans aucune file."""
+        mint_address = item["mint"] if isinstance(item, dict) else item[1]
+        if mint_address and mint_address not in self.mint_queue and mint_address not in self.registration_queue:
+            self.mint_dedup.discard(mint_address)
+
+    async def _handle_registration(self, item):
+        signature, mint_address, creator_address = item
+        if mint_address and creator_address:
+            # Créateur déjà connu (shreds, blocs, CreateEvent pump.fun) : pas de getTransaction
+            await self._register_token(mint_address, creator_address)
+        else:
+            await self.process_new_token(signature, known_mint=mint_address)
+
+    def _labels(self):
+        return metrics.labels(endpoint=self.websocket_url.split("?")[0])
+
+    @property
+    def connection_uptime(self) -> float:
+        if self.connected_at is None:
+            return 0.0
+        return time.monotonic() - self.connected_at
+
+    def notification_rate(self) -> float:
+        """Notifications par seconde sur la connexion courante."""
+        uptime = self.connection_uptime
+        return self.connection_notifications / uptime if uptime > 0 else 0.0
+
+    def _close_connection_stats(self):
+        self.connection = None
+        if self.connected_at is None:
+            self.last_connection_uptime = 0.0
+            return
+        self.last_connection_uptime = self.connection_uptime
+        logger.info(
+            f"Connexion WebSocket n°{self.connection_count} fermée après {self.last_connection_uptime:.0f}s : "
+            f"{self.connection_notifications} notifications ({self.notification_rate():.2f}/s)."
+        )
+        self.connected_at = None
+
+    def _start_gap_fill(self, last_slot: int):
+        """Rattrape en blocs les slots manqués pendant la coupure (les mints déjà vus sont dédupliqués)."""
+        if self._gap_fill_task is not None and not self._gap_fill_task.done():
+            return
+        self._gap_fill_task = asyncio.create_task(self._gap_fill(last_slot))
+
+    async def _gap_fill(self, last_slot: int):
         try:
-            logger.info(f"Connecting to WebSocket: {self.websocket_url}")
-            async with websockets.connect(self.websocket_url, ping_interval=5, close_timeout=1) as ws:
-                self.connection = ws
-                logger.info("WebSocket connected. Subscribing to program logs.")
-
-                programs = [
-                    {"mentions": ["TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA"]},
-                    {"mentions": ["9xQeWvG816bUx9EPjHmaT23yvVM2ZWbrrpZb9PusVFin"]},
-                    {"mentions": ["Orca11111111111111111111111111111111111111111"]},
-                ]
-                for i, program in enumerate(programs):
-                    await ws.send(json.dumps({
-                        "jsonrpc": "2.0",
-                        "id": i + 1,
-                        "method": "logsSubscribe",
-                        "params": [program, {"commitment": "finalized"}]
-                    }))
-
-                async for message in ws:
-                    start = asyncio.get_event_loop().time()
-                    data = json.loads(message)
-                    if 'params' in data and 'result' in data['params'] and 'value' in data['params']['result']:
-                        value = data['params']['result']['value']
-                        if 'logs' in value:
-                            for log_line in value['logs']:
-                                if "initializeMint" in log_line:
-                                    logger.info(f"initializeMint detected: {log_line}")
-                                    # Déclenchement prioritaire du module de décision, latence globale
-                                    mint_start = asyncio.get_event_loop().time()
-                                    if decision_module:
-                                        mint_address = self._extract_mint_address(log_line)
-                                        # Récupération du prix initial via RPC ultra-rapide
-                                        price_resp = await call_solana_rpc(self.rpc_url, "getTokenSupply", [mint_address])
-                                        current_price = 0.0
-                                        if price_resp and 'result' in price_resp and 'value' in price_resp['result']:
-                                            current_price = float(price_resp['result']['value'].get('uiAmount', 0.0))
-                                        await decision_module.process_new_token_candidate(mint_address, current_price)
-                                        mint_latency = (asyncio.get_event_loop().time() - mint_start) * 1000
-                                        logger.info(f"Latence totale création->achat: {mint_latency:.1f}ms (objectif <800ms)")
-                                    logger.info(f"Nouveau token SPL détecté (log): {log_line}")
-                                    signature = value.get('signature')
-                                    if signature:
-                                        await self.process_new_token(signature)
\ No newline at end of file
+            slot_resp = await call_solana_rpc(self.rpc_url, "getSlot", [{"commitment": "confirmed"}])
+            current_slot = slot_resp.get("result") if slot_resp else None
+            if current_slot is None or current_slot <= last_slot:
+                return
+            start_slot = max(last_slot + 1, current_slot - settings.WS_GAP_FILL_MAX_SLOTS + 1)
+            if start_slot > last_slot + 1:
+                logger.warning(f"Rattrapage WebSocket limité aux slots {start_slot}-{current_slot} (WS_GAP_FILL_MAX_SLOTS).")
+            logger.info(f"Rattrapage des slots {start_slot}-{current_slot} manqués pendant la coupure WebSocket.")
+            frontier = await self.gap_fetcher.run(start_slot, current_slot, self._process_block_records)
+            metrics.inc("ws_gap_fill_slots_total", self._labels(), amount=frontier - start_slot + 1)
+            if frontier < current_slot:
+                logger.warning(f"Rattrapage WebSocket interrompu au slot {frontier + 1}.")
+        except Exception as e:
+            logger.error(f"Erreur lors du rattrapage des slots manqués : {e}")
+
+    async def _process_block_records(self, slot: int, records: List[Dict[str, Any]]):
+        for record in records:
+            if record["type"] == "dex":
+                if record["program"] == "raydium":
+                    await self._analyze_raydium_instruction(record)
+                else:
+                    await self._analyze_orca_instruction(record)
+            else:
+                await self._analyze_token_instruction(record)
+
+    async def process_new_token(self, signature: str, known_mint: Optional[str] = None):
+        # Appel RPC pour récupérer la transaction et extraire le mint et le créateur.
+        # `known_mint` a été accepté par une file : on l'enregistre même s'il est déjà dans l'index.
+        resp = await call_solana_rpc(
+            self.rpc_url, "getTransaction",
+            [signature, {"encoding": "json", "maxSupportedTransactionVersion": 0, "commitment": "confirmed"}]
+        )
+        # Mint arrivé entre-temps par un `upgrade` : l'enregistrement en file le prend en charge
+        known_mint = self._upgraded_mints.pop(signature, None) or known_mint
+        if not resp or not resp.get("result"):
+            return
+        tx = resp["result"]
+        for record in extract_records({"transactions": [tx]}, tx.get("slot")):
+            if record["type"] == "mint_init" and \
+                    (record["mint"] == known_mint or not self.mint_dedup.seen(record["mint"])):
+                self.mint_dedup.add(record["mint"])
+                if record["mint"] != known_mint and self.decision_module is not None:
+                    # Mint absent des logs (InitializeMint SPL) : il n'a pas encore eu sa voie de décision
+                    await self.mint_queue.put({
+                        "mint": record["mint"], "received_at": asyncio.get_event_loop().time(),
+                        "confirmation": self._confirmation(signature, record["slot"], "confirmed", settings.BUY_COMMITMENT),
+                    }, key=record["mint"])
+                await self._register_token(record["mint"], record["creator"])
+
+    async def _register_token(self, mint_address: str, creator_address: str):
+        logger.info(f"Mint: {mint_address}, Créateur: {creator_address}")
+        # Enregistrer dans la base de données
+        with self.db_manager.SessionLocal() as db:
+            creator = db.query(Creator).filter_by(address=creator_address).first()
+            if not creator:
+                creator = Creator(address=creator_address)
+                db.add(creator)
+            if not db.query(Token).filter_by(mint_address=mint_address).first():
+                db.add(Token(mint_address=mint_address, creator_address=creator_address))
+            db.commit()
+        await self.creator_tracker.track(creator_address, mint_address)
+        await self.transaction_analyzer.analyze_token_transactions(mint_address)
+
+    async def _analyze_token_instruction(self, record: Dict[str, Any]):
+        if record["type"] == "mint_init":
+            if self.mint_dedup.check_and_add(record["mint"]):
+                await self._register_token(record["mint"], record["creator"])
+        elif record["type"] == "transfer":
+            with self.db_manager.SessionLocal() as db:
+                if not db.query(Transaction).filter_by(signature=record["signature"]).first():
+                    db.add(Transaction(
+                        signature=record["signature"], slot=record["slot"], source=record["source"],
+                        destination=record["destination"], amount=float(record["amount"]),
+                        token_mint=record["mint"]
+                    ))
+                    db.commit()
+
+    async def _analyze_raydium_instruction(self, record: Dict[str, Any]):
+        logger.debug(f"Raydium {record['instruction'] or 'instruction inconnue'} {record['signature']} "
+                     f"(slot {record['slot']}) par {record['signer']}")
+
+    async def _analyze_orca_instruction(self, record: Dict[str, Any]):
+        logger.debug(f"Orca {record['instruction'] or 'instruction inconnue'} {record['signature']} "
+                     f"(slot {record['slot']}) par {record['signer']}")
+
+
+metrics.register_callback("ws_connection_uptime_seconds", lambda: {
+    listener._labels(): listener.connection_uptime for listener in WebSocketListener._listeners
+}, help_text="Durée de la connexion WebSocket courante")
+metrics.register_callback("ws_notification_rate", lambda: {
+    listener._labels(): listener.notification_rate() for listener in WebSocketListener._listeners
+}, help_text="Notifications par seconde sur la connexion courante")
@@ -0,0 +1,175 @@
+import asyncio
+import heapq
+import itertools
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional
+from loguru import logger
+from ..utils.metrics import metrics
+
+POLICY_BLOCK = "block"              # put() attend qu'une place se libère (backpressure)
+POLICY_DROP_NEW = "drop_new"        # le nouvel élément est rejeté
+POLICY_DROP_OLDEST = "drop_oldest"  # l'élément le moins prioritaire (le plus ancien) est évincé
+
+metrics.describe("work_queue_depth", "Éléments en attente dans la file")
+metrics.describe("work_queue_oldest_age_ms", "Âge de l'élément le plus ancien en attente (ms)")
+metrics.describe("work_queue_wait_ms", "Temps d'attente en file avant traitement (ms)")
+metrics.describe("work_queue_processing_ms", "Durée de traitement par élément (ms)")
+metrics.describe("work_queue_dropped_total", "Éléments rejetés ou évincés, par raison")
+metrics.describe("work_queue_deduped_total", "Éléments ignorés car déjà en file ou en cours")
+
+
+class WorkQueue:
+    """
+    File de travail bornée consommée par un pool de workers asyncio.
+
+    Les éléments sont servis par priorité (plus petit = plus prioritaire) puis par ordre
+    d'arrivée. Un élément dont la clé est déjà en file ou en cours de traitement est ignoré ;
+    la clé n'est marquée qu'une fois l'élément accepté (un élément rejeté peut être resoumis).
+    Quand la file est pleine, la politique choisit entre attendre, rejeter le nouvel élément
+    ou évincer le moins prioritaire ; `on_evict(clé, élément)` prévient alors le producteur.
+    Une file arrêtée (stop) sort des métriques.
+    """
+
+    _queues: List["WorkQueue"] = []
+
+    def __init__(self, name: str, handler: Callable[[Any], Awaitable[Any]], maxsize: int = 1000,
+                 workers: int = 4, policy: str = POLICY_DROP_OLDEST,
+                 on_evict: Callable[[Hashable, Any], None] = None):
+        if policy not in (POLICY_BLOCK, POLICY_DROP_NEW, POLICY_DROP_OLDEST):
+            raise ValueError(f"Politique de file inconnue : {policy}")
+        self.name = name
+        self.handler = handler
+        self.maxsize = max(1, maxsize)
+        self.worker_count = max(1, workers)
+        self.policy = policy
+        self.on_evict = on_evict
+        self._heap: list = []
+        self._sequence = itertools.count()
+        self._pending: Dict[Hashable, float] = {}  # clé -> instant d'entrée (en file ou en cours)
+        # Créées dans la boucle d'exécution (les primitives asyncio s'y lient en Python 3.9)
+        self._not_empty: Optional[asyncio.Condition] = None
+        self._not_full: Optional[asyncio.Condition] = None
+        self._workers: List[asyncio.Task] = []
+        self.in_progress = 0
+        self.processed = 0
+        WorkQueue._queues.append(self)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Vrai si la clé est en file ou en cours de traitement."""
+        return key in self._pending
+
+    @property
+    def depth(self) -> int:
+        return len(self._heap)
+
+    def oldest_age_ms(self) -> float:
+        if not self._heap:
+            return 0.0
+        return (time.monotonic() - min(entry[2] for entry in self._heap)) * 1000
+
+    def _labels(self, **extra):
+        return metrics.labels(queue=self.name, **extra)
+
+    def _ensure_conditions(self):
+        if self._not_empty is None:
+            self._not_empty = asyncio.Condition()
+            self._not_full = asyncio.Condition()
+
+    async def put(self, item: Any, key: Hashable = None, priority: int = 1) -> bool:
+        """Ajoute un élément ; retourne False s'il a été dédupliqué ou rejeté."""
+        self._ensure_conditions()
+        key = item if key is None else key
+        if key in self._pending:
+            metrics.inc("work_queue_deduped_total", self._labels())
+            return False
+        while len(self._heap) >= self.maxsize:
+            if self.policy == POLICY_BLOCK:
+                async with self._not_full:
+                    await self._not_full.wait_for(lambda: len(self._heap) < self.maxsize)
+                # Même clé acceptée pendant l'attente
+                if key in self._pending:
+                    metrics.inc("work_queue_deduped_total", self._labels())
+                    return False
+            elif self.policy == POLICY_DROP_NEW or not self._evict_for(priority):
+                metrics.inc("work_queue_dropped_total", self._labels(reason="full"))
+                logger.warning(f"File {self.name} pleine ({self.maxsize}), élément {key} rejeté.")
+                return False
+        await self._accept(key, item, priority)
+        return True
+
+    async def _accept(self, key: Hashable, item: Any, priority: int):
+        """Seul point où une clé est marquée : l'élément entre en file dans le même pas."""
+        now = time.monotonic()
+        self._pending[key] = now
+        heapq.heappush(self._heap, (priority, next(self._sequence), now, key, item))
+        async with self._not_empty:
+            self._not_empty.notify()
+
+    def _evict_for(self, priority: int) -> bool:
+        """Évince l'élément le moins prioritaire (le plus ancien à priorité égale) s'il ne l'est pas plus que le nouveau."""
+        victim_index = max(range(len(self._heap)), key=lambda i: (self._heap[i][0], -self._heap[i][1]))
+        victim = self._heap[victim_index]
+        if victim[0] < priority:
+            return False
+        self._heap[victim_index] = self._heap[-1]
+        self._heap.pop()
+        heapq.heapify(self._heap)
+        self._pending.pop(victim[3], None)
+        metrics.inc("work_queue_dropped_total", self._labels(reason="evicted"))
+        logger.warning(f"File {self.name} pleine, élément {victim[3]} évincé.")
+        if self.on_evict is not None:
+            try:
+                self.on_evict(victim[3], victim[4])
+            except Exception as e:
+                logger.error(f"Erreur du rappel d'éviction de la file {self.name} : {e}")
+        return True
+
+    async def _worker(self):
+        while True:
+            async with self._not_empty:
+                await self._not_empty.wait_for(lambda: bool(self._heap))
+                _, _, enqueued_at, key, item = heapq.heappop(self._heap)
+            async with self._not_full:
+                self._not_full.notify()
+            start = time.monotonic()
+            metrics.observe("work_queue_wait_ms", (start - enqueued_at) * 1000, self._labels())
+            self.in_progress += 1
+            try:
+                await self.handler(item)
+            except Exception as e:
+                logger.error(f"Erreur de traitement dans la file {self.name} pour {key} : {e}")
+            finally:
+                self.in_progress -= 1
+                self.processed += 1
+                self._pending.pop(key, None)
+                metrics.observe("work_queue_processing_ms", (time.monotonic() - start) * 1000, self._labels())
+
+    def start(self):
+        self._ensure_conditions()
+        if self not in WorkQueue._queues:
+            WorkQueue._queues.append(self)
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.worker_count)]
+            logger.info(f"File {self.name} démarrée avec {self.worker_count} workers (max {self.maxsize}, politique {self.policy}).")
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        if self in WorkQueue._queues:
+            WorkQueue._queues.remove(self)
+
+
+metrics.register_callback("work_queue_depth", lambda: {
+    q._labels(): q.depth for q in WorkQueue._queues
+})
+metrics.register_callback("work_queue_in_progress", lambda: {
+    q._labels(): q.in_progress for q in WorkQueue._queues
+})
+metrics.register_callback("work_queue_oldest_age_ms", lambda: {
+    q._labels(): q.oldest_age_ms() for q in WorkQueue._queues
+})
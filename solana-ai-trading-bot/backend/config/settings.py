@@ -7,9 +7,61 @@ class Settings:
     # Solana RPC
     SOLANA_RPC_URL = os.getenv("SOLANA_RPC_URL", "https://api.mainnet-beta.solana.com")
     SOLANA_WS_URL = os.getenv("SOLANA_WS_URL", "wss://api.mainnet-beta.solana.com/")
+    WS_RECONNECT_BASE_DELAY = float(os.getenv("WS_RECONNECT_BASE_DELAY", 0.5))  # backoff exponentiel à gigue
+    WS_RECONNECT_MAX_DELAY = float(os.getenv("WS_RECONNECT_MAX_DELAY", 30.0))
+    WS_STABLE_CONNECTION_SECONDS = float(os.getenv("WS_STABLE_CONNECTION_SECONDS", 60.0))  # remet le backoff à zéro
+    WS_GAP_FILL_MAX_SLOTS = int(os.getenv("WS_GAP_FILL_MAX_SLOTS", 1500))  # slots rattrapés après reconnexion
+    WS_SUBSCRIBE_COMMITMENT = os.getenv("WS_SUBSCRIBE_COMMITMENT", "processed")  # notifications spéculatives
+    BUY_COMMITMENT = os.getenv("BUY_COMMITMENT", "confirmed")  # commitment exigée avant execute_buy
+    HELD_TOKEN_POLL_INTERVAL = float(os.getenv("HELD_TOKEN_POLL_INTERVAL", 5.0))  # prix relu si les coffres se taisent
+    COMMITMENT_GATE_POLL_INTERVAL = float(os.getenv("COMMITMENT_GATE_POLL_INTERVAL", 0.2))
+    COMMITMENT_GATE_TIMEOUT = float(os.getenv("COMMITMENT_GATE_TIMEOUT", 30.0))
+    COMMITMENT_GATE_FORK_MARGIN = int(os.getenv("COMMITMENT_GATE_FORK_MARGIN", 2))  # slots avant de déclarer un fork
+    COMMITMENT_GATE_MAX_PENDING = int(os.getenv("COMMITMENT_GATE_MAX_PENDING", 5000))
+    WS_QUEUE_MAXSIZE = int(os.getenv("WS_QUEUE_MAXSIZE", 1000))  # par file de dispatch
+    WS_MINT_WORKERS = int(os.getenv("WS_MINT_WORKERS", 4))  # getTokenSupply + module de décision
+    WS_REGISTRATION_WORKERS = int(os.getenv("WS_REGISTRATION_WORKERS", 2))  # getTransaction + écritures BDD
+    SUBSCRIPTION_MAX_CONNECTIONS = int(os.getenv("SUBSCRIPTION_MAX_CONNECTIONS", 4))  # sockets du gestionnaire d'abonnements
+    SUBSCRIPTION_MAX_PER_CONNECTION = int(os.getenv("SUBSCRIPTION_MAX_PER_CONNECTION", 500))
+    SUBSCRIPTION_CALLBACK_WORKERS = int(os.getenv("SUBSCRIPTION_CALLBACK_WORKERS", 4))
+    SUBSCRIPTION_CALLBACK_QUEUE_MAXSIZE = int(os.getenv("SUBSCRIPTION_CALLBACK_QUEUE_MAXSIZE", 5000))
+    INGEST_SOURCES = os.getenv("INGEST_SOURCES", "websocket")  # empilables : websocket,blocks,shredstream
+    INGEST_DEDUP_SIZE = int(os.getenv("INGEST_DEDUP_SIZE", 100000))  # signatures gardées pour la déduplication
+    INGEST_BLOCK_POLL_INTERVAL = float(os.getenv("INGEST_BLOCK_POLL_INTERVAL", 0.4))
     JITO_SHREDSTREAM_GRPC_URL = os.getenv("JITO_SHREDSTREAM_GRPC_URL", "frankfurt.mainnet.jito.wtf:8001")
     HELIUS_API_KEY = os.getenv("HELIUS_API_KEY", "")
 
+    # Client HTTP RPC (connexions persistantes, HTTP/2)
+    RPC_HTTP2 = os.getenv("RPC_HTTP2", "True").lower() == "true"
+    RPC_MAX_CONNECTIONS = int(os.getenv("RPC_MAX_CONNECTIONS", 50))
+    RPC_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("RPC_MAX_KEEPALIVE_CONNECTIONS", 20))
+    RPC_KEEPALIVE_EXPIRY = float(os.getenv("RPC_KEEPALIVE_EXPIRY", 30.0))
+    RPC_CONNECT_TIMEOUT = float(os.getenv("RPC_CONNECT_TIMEOUT", 2.0))
+    RPC_READ_TIMEOUT = float(os.getenv("RPC_READ_TIMEOUT", 0.8))
+    RPC_BATCH_SIZE = int(os.getenv("RPC_BATCH_SIZE", 20))
+    RPC_BATCH_CONCURRENCY = int(os.getenv("RPC_BATCH_CONCURRENCY", 4))
+    RPC_SINGLE_FLIGHT = os.getenv("RPC_SINGLE_FLIGHT", "True").lower() == "true"
+
+    # Limitation de débit par endpoint (token bucket à voies prioritaires) et backoff sur 429
+    RPC_RATE_LIMIT_RPS = float(os.getenv("RPC_RATE_LIMIT_RPS", 40))
+    RPC_RATE_LIMIT_BURST = float(os.getenv("RPC_RATE_LIMIT_BURST", 40))
+    RPC_RATE_LIMIT_RESERVE = float(os.getenv("RPC_RATE_LIMIT_RESERVE", 0.2))  # part réservée à la voie trading
+    RPC_MAX_RETRIES = int(os.getenv("RPC_MAX_RETRIES", 2))
+    RPC_BACKOFF_BASE = float(os.getenv("RPC_BACKOFF_BASE", 0.1))
+    RPC_BACKOFF_MAX = float(os.getenv("RPC_BACKOFF_MAX", 2.0))
+
+    # Routage multi-endpoints (latence glissante, requêtes doublées)
+    SOLANA_RPC_FALLBACK_URLS = [u.strip() for u in os.getenv("SOLANA_RPC_FALLBACK_URLS", "").split(",") if u.strip()]
+    RPC_ROUTER_WINDOW = int(os.getenv("RPC_ROUTER_WINDOW", 200))
+    RPC_ROUTER_MAX_CONSECUTIVE_ERRORS = int(os.getenv("RPC_ROUTER_MAX_CONSECUTIVE_ERRORS", 3))
+    RPC_ROUTER_COOLDOWN = float(os.getenv("RPC_ROUTER_COOLDOWN", 10.0))
+    RPC_HEDGE_ENABLED = os.getenv("RPC_HEDGE_ENABLED", "True").lower() == "true"
+    RPC_HEDGE_METHODS = [m.strip() for m in os.getenv("RPC_HEDGE_METHODS", "getLatestBlockhash,getAccountInfo,getTokenSupply,getSignatureStatuses").split(",") if m.strip()]
+    RPC_HEDGE_PERCENTILE = float(os.getenv("RPC_HEDGE_PERCENTILE", 90))
+    RPC_HEDGE_MIN_DELAY_MS = float(os.getenv("RPC_HEDGE_MIN_DELAY_MS", 20))
+    # Enregistrement du trafic WS/RPC pour rejeu hors ligne (vide = désactivé)
+    TRAFFIC_RECORD_PATH = os.getenv("TRAFFIC_RECORD_PATH", "")
+
     # Wallet (à renseigner par l'utilisateur)
     PRIVATE_KEY = os.getenv("PRIVATE_KEY", "")
     WALLET_ADDRESS = os.getenv("WALLET_ADDRESS", "")
@@ -17,11 +69,43 @@ class Settings:
     # Trading Parameters
     INITIAL_CAPITAL_SOL = float(os.getenv("INITIAL_CAPITAL_SOL", 0.05)) # 10€ par défaut
     MIN_LIQUIDITY_POOL_SOL = float(os.getenv("MIN_LIQUIDITY_POOL_SOL", 3.0))
+    POOL_LP_BURNED_MIN_PCT = float(os.getenv("POOL_LP_BURNED_MIN_PCT", 0.95))  # LP considéré verrouillé au-delà
+    POOL_INDEX_MAX_MINTS = int(os.getenv("POOL_INDEX_MAX_MINTS", 150))  # mints suivis par l'index des pools (LRU)
+    POOL_INDEX_REDISCOVERY_INTERVAL = float(os.getenv("POOL_INDEX_REDISCOVERY_INTERVAL", 15.0))  # mints sans pool
+    POOL_INDEX_HOLDERS_TTL = float(os.getenv("POOL_INDEX_HOLDERS_TTL", 60.0))  # holders et autorités, rafraîchis en fond
+    POOL_INDEX_HOLDERS_TIMEOUT = float(os.getenv("POOL_INDEX_HOLDERS_TIMEOUT", 5.0))  # comptage des holders abandonné au-delà
+    POOL_INDEX_HOLDERS_CONCURRENCY = int(os.getenv("POOL_INDEX_HOLDERS_CONCURRENCY", 2))  # comptages simultanés
     BUY_AMOUNT_SOL = float(os.getenv("BUY_AMOUNT_SOL", 0.01))
     SELL_MULTIPLIER = float(os.getenv("SELL_MULTIPLIER", 2.0))
     REPUTATION_SCORE_THRESHOLD = float(os.getenv("REPUTATION_SCORE_THRESHOLD", 0.7))
     RPC_LATENCY_CHECK_INTERVAL = int(os.getenv("RPC_LATENCY_CHECK_INTERVAL", 5))
     TOKEN_SCAN_INTERVAL = int(os.getenv("TOKEN_SCAN_INTERVAL", 2))
+    SCAN_FETCH_CONCURRENCY = int(os.getenv("SCAN_FETCH_CONCURRENCY", 8))  # requêtes getBlock en vol
+    SCAN_FETCH_MAX_RETRIES = int(os.getenv("SCAN_FETCH_MAX_RETRIES", 3))
+    SCAN_CHECKPOINT_PATH = os.getenv("SCAN_CHECKPOINT_PATH", "data/scan_checkpoint.json")
+    SCAN_CHECKPOINT_FLUSH_SLOTS = int(os.getenv("SCAN_CHECKPOINT_FLUSH_SLOTS", 50))
+    SCAN_CHECKPOINT_FLUSH_INTERVAL = float(os.getenv("SCAN_CHECKPOINT_FLUSH_INTERVAL", 5.0))
+    SCAN_BACKFILL_CONCURRENCY = int(os.getenv("SCAN_BACKFILL_CONCURRENCY", 2))
+    SCAN_BACKFILL_CHUNK = int(os.getenv("SCAN_BACKFILL_CHUNK", 100))
+    SCAN_BACKFILL_SLOT_PASSES = int(os.getenv("SCAN_BACKFILL_SLOT_PASSES", 3))  # passages en échec avant d'abandonner un slot
+    SCAN_SLOT_MAX_PASSES = int(os.getenv("SCAN_SLOT_MAX_PASSES", 3))  # passages live en échec avant de confier le slot au backfill
+    MINT_QUEUE_MAXSIZE = int(os.getenv("MINT_QUEUE_MAXSIZE", 500))
+    MINT_QUEUE_WORKERS = int(os.getenv("MINT_QUEUE_WORKERS", 4))
+    MINT_QUEUE_POLICY = os.getenv("MINT_QUEUE_POLICY", "drop_oldest")  # block | drop_new | drop_oldest
+    SCAN_BACKFILL_MAX_SLOTS = int(os.getenv("SCAN_BACKFILL_MAX_SLOTS", 50000))  # ~5h30 de slots
+    MINT_DEDUP_WINDOW = float(os.getenv("MINT_DEDUP_WINDOW", 3600))  # fenêtre exacte (secondes)
+    MINT_DEDUP_LRU_SIZE = int(os.getenv("MINT_DEDUP_LRU_SIZE", 50000))
+    MINT_DEDUP_BLOOM_CAPACITY = int(os.getenv("MINT_DEDUP_BLOOM_CAPACITY", 1000000))  # mints par génération
+    MINT_DEDUP_ERROR_RATE = float(os.getenv("MINT_DEDUP_ERROR_RATE", 0.0001))
+    MINT_DEDUP_PATH = os.getenv("MINT_DEDUP_PATH", "data/mint_dedup.bin")  # vide = pas de persistance
+    MINT_DEDUP_FLUSH_INTERVAL = float(os.getenv("MINT_DEDUP_FLUSH_INTERVAL", 60.0))
+    CACHE_DISK_PATH = os.getenv("CACHE_DISK_PATH", "data/chain_cache.sqlite3")  # vide = cache mémoire seul
+    CACHE_DISK_MAX_MB = int(os.getenv("CACHE_DISK_MAX_MB", 256))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 20000))  # cache blockchain partagé du processus
+    CACHE_MAX_WATCHED_ACCOUNTS = int(os.getenv("CACHE_MAX_WATCHED_ACCOUNTS", 1000))  # accountSubscribe par cache, au-delà : TTL seul
+    CACHE_WATCH_PRUNE_SLOTS = int(os.getenv("CACHE_WATCH_PRUNE_SLOTS", 150))  # désabonnement des comptes sans entrée
+    SCAN_BLOCK_MODE = os.getenv("SCAN_BLOCK_MODE", "lean")  # lean (transactions base64) | full (json)
+    BLOCK_DECODE_WORKERS = int(os.getenv("BLOCK_DECODE_WORKERS", 0))  # process de décodage getBlock (0 = dans la boucle)
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     LOG_FORMAT = os.getenv("LOG_FORMAT", "%(asctime)s %(levelname)s %(message)s")
     PROFIT_MULTIPLIER_SELL = float(os.getenv("PROFIT_MULTIPLIER_SELL", 2.0)) # Vente si profit >= x2
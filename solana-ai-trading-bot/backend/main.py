@@ -3,7 +3,7 @@ import asyncio
 import uvicorn
 from fastapi import FastAPI, Depends, HTTPException, status, Request
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 from dotenv import load_dotenv
@@ -13,11 +13,17 @@ import logging
 from .config.settings import initiate_settings
 from .blockchain.token_scanner import TokenScanner
 from .blockchain.websocket_listener import WebSocketListener
+from .blockchain.rpc_client import close_rpc_clients, register_rpc_router, get_single_flight_stats
+from .blockchain.rpc_router import build_rpc_router
+from .blockchain.disk_cache import close_disk_cache
+from .services import get_services
 from .trading.decision_module import DecisionModule
 from utils.solana_utils import get_trustwallet_balance
 from .ai_analysis.gemini_analyzer import GeminiAnalyzer
 from .ai_analysis.reputation_db_manager import ReputationDBManager
 from .utils.logger import setup_logging
+from .utils.metrics import metrics
+from .utils.traffic_recorder import close_traffic_recorder
 from .auth.auth import authenticate_user, create_access_token, get_current_user
 
 load_dotenv()
@@ -36,17 +42,22 @@ app = FastAPI(
     version="1.0.0",
 )
 
-app.mount("/", StaticFiles(directory="backend/static", html=True), name="static")
+rpc_router = build_rpc_router()
+register_rpc_router(rpc_router)
 
-reputation_db_manager = ReputationDBManager(settings.DATABASE_URL)
+# Moteur SQLAlchemy, cache blockchain et analyseurs créés une seule fois et injectés
+services = get_services()
+reputation_db_manager = ReputationDBManager(settings.DATABASE_URL, services.db_manager)
 gemini_analyzer = GeminiAnalyzer(settings.GEMINI_API_KEY, reputation_db_manager)
 token_scanner = TokenScanner(
     settings.SOLANA_RPC_URL,
     gemini_analyzer,
     reputation_db_manager,
-    settings.REPUTATION_SCORE_THRESHOLD
+    settings.REPUTATION_SCORE_THRESHOLD,
+    services.cache,
+    services.block_decoder
 )
-websocket_listener = WebSocketListener(settings.SOLANA_WEBSOCKET_URL)
+websocket_listener = WebSocketListener(settings.SOLANA_WS_URL, settings.DATABASE_URL, settings.SOLANA_RPC_URL, services)
 order_executor = None
 decision_module = None
 
@@ -60,7 +71,8 @@ def initialize_trading_modules():
     decision_module = DecisionModule(
         order_executor,
         settings.BUY_AMOUNT_SOL,
-        settings.SELL_MULTIPLIER
+        settings.SELL_MULTIPLIER,
+        pool_index=services.pool_index
     )
 initialize_trading_modules()
 
@@ -73,6 +85,7 @@ async def startup_event():
         asyncio.create_task(token_scanner.start_scanning(settings.TOKEN_SCAN_INTERVAL))
         asyncio.create_task(websocket_listener.start_listening(decision_module))
         asyncio.create_task(log_rpc_latency())
+        services.log_report()
         logger.info("Application startup complete.")
     except Exception as e:
         logger.critical(f"Erreur au démarrage : {e}")
@@ -84,17 +97,26 @@ async def shutdown_event():
     logger.info("Shutting down application...")
     try:
         await websocket_listener.stop_listening()
+        await token_scanner.stop_scanning()
         await reputation_db_manager.disconnect()
+        await close_rpc_clients()
+        close_traffic_recorder()
+        close_disk_cache()
+        services.close()
         logger.info("Application shutdown complete.")
     except Exception as e:
         logger.error(f"Erreur à l'arrêt : {e}")
 
 async def log_rpc_latency():
-    """Tâche asynchrone pour loguer la latence RPC."""
+    """Tâche asynchrone pour sonder les endpoints RPC et loguer leurs scores de latence."""
     while True:
         try:
-            latency = await get_rpc_latency(settings.SOLANA_RPC_URL)
-            logger.info(f"RPC Latency: {latency:.2f} ms")
+            await rpc_router.probe()
+            for stats in rpc_router.snapshot():
+                logger.info(f"RPC {stats['url']}: p50={stats['p50_ms']} ms, p90={stats['p90_ms']} ms, erreurs={stats['error_rate']}")
+            logger.info(f"RPC hedging: {rpc_router.hedges_sent} requêtes doublées, {rpc_router.hedges_won} gagnées")
+            single_flight = get_single_flight_stats()
+            logger.info(f"RPC single-flight: {single_flight['calls']} appels réseau, {single_flight['coalesced']} appels mutualisés")
         except Exception as e:
             logger.warning(f"Erreur lors du check de latence RPC : {e}")
         await asyncio.sleep(settings.RPC_LATENCY_CHECK_INTERVAL)
@@ -200,5 +222,13 @@ async def set_initial_capital(request: Request):
         logger.error(f"Erreur set_initial_capital : {e}")
         return JSONResponse(status_code=500, content={"error": "Erreur lors de la définition du capital initial"})
 
+@app.get("/metrics", summary="Métriques au format Prometheus", response_class=PlainTextResponse)
+async def get_metrics():
+    """Expose les histogrammes de latence RPC et les compteurs d'erreurs au format texte Prometheus."""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+# Monté en dernier : un montage sur "/" masquerait toutes les routes déclarées après lui
+app.mount("/", StaticFiles(directory="backend/static", html=True), name="static")
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -0,0 +1,133 @@
+import gc
+import os
+import resource
+from functools import cached_property
+from typing import Any, Dict, Optional
+from loguru import logger
+from sqlalchemy.engine import Engine
+from .config.settings import settings
+from .database.db import DatabaseManager
+from .blockchain.block_decoder import BlockDecoder
+from .blockchain.cache_manager import BlockchainCache
+from .blockchain.creator_monitor import CreatorMonitor
+from .blockchain.creator_tracker import CreatorTracker
+from .blockchain.disk_cache import get_disk_cache
+from .blockchain.linked_account_detector import LinkedAccountDetector
+from .blockchain.pool_index import PoolIndex
+from .blockchain.real_time_analyzer import RealTimeAnalyzer
+from .blockchain.subscription_manager import SubscriptionManager, get_subscription_manager
+from .blockchain.transaction_analyzer import TransactionAnalyzer
+from .utils.metrics import metrics
+
+# Classes dont on compte les instances vivantes au démarrage : plus d'une trahit un composant non injecté
+_REPORTED_TYPES = (DatabaseManager, Engine, BlockchainCache, CreatorTracker, TransactionAnalyzer,
+                   LinkedAccountDetector, CreatorMonitor, RealTimeAnalyzer, SubscriptionManager, PoolIndex, BlockDecoder)
+
+
+class Services:
+    """
+    Composants partagés par tout le processus (moteur SQLAlchemy, cache blockchain, analyseurs),
+    créés une seule fois, à la première demande, puis injectés dans le listener, le scanner et
+    la base de réputation.
+    """
+
+    def __init__(self, database_url: str, rpc_url: str, websocket_url: str = None):
+        self.database_url = database_url
+        self.rpc_url = rpc_url
+        self.websocket_url = websocket_url or settings.SOLANA_WS_URL
+
+    @cached_property
+    def db_manager(self) -> DatabaseManager:
+        return DatabaseManager(self.database_url)
+
+    @cached_property
+    def cache(self) -> BlockchainCache:
+        # Chaque appel mis en cache fixe son TTL : un seul LRU pour les mints, transactions, etc.
+        return BlockchainCache(maxsize=settings.CACHE_MAX_ENTRIES, ttl=300, name="shared", disk=get_disk_cache(),
+                               pool_index=self.pool_index)
+
+    @cached_property
+    def subscription_manager(self) -> SubscriptionManager:
+        return get_subscription_manager(self.websocket_url)
+
+    @cached_property
+    def pool_index(self) -> PoolIndex:
+        return PoolIndex(self.rpc_url, self.subscription_manager)
+
+    @cached_property
+    def block_decoder(self) -> BlockDecoder:
+        # Un seul pool de process (BLOCK_DECODE_WORKERS) pour le scanner, le listener et la source blocs
+        return BlockDecoder()
+
+    @cached_property
+    def creator_tracker(self) -> CreatorTracker:
+        return CreatorTracker(self.database_url, self.rpc_url, self.cache, self.db_manager)
+
+    @cached_property
+    def transaction_analyzer(self) -> TransactionAnalyzer:
+        return TransactionAnalyzer(self.database_url, self.rpc_url, self.cache, self.db_manager)
+
+    @cached_property
+    def linked_account_detector(self) -> LinkedAccountDetector:
+        return LinkedAccountDetector(self.database_url, self.db_manager)
+
+    @cached_property
+    def creator_monitor(self) -> CreatorMonitor:
+        return CreatorMonitor(self.database_url, self.rpc_url, self.subscription_manager, self.db_manager)
+
+    @cached_property
+    def real_time_analyzer(self) -> RealTimeAnalyzer:
+        return RealTimeAnalyzer(self.database_url, self.rpc_url, self.cache, self.subscription_manager,
+                                self.db_manager, self.creator_monitor)
+
+    def report(self) -> Dict[str, Any]:
+        """Instances vivantes des classes partagées, entrées en cache et mémoire résidente."""
+        counts = {cls.__name__: 0 for cls in _REPORTED_TYPES}
+        for obj in gc.get_objects():
+            if isinstance(obj, _REPORTED_TYPES):
+                for cls in _REPORTED_TYPES:
+                    if isinstance(obj, cls):
+                        counts[cls.__name__] += 1
+        return {
+            "instances": counts,
+            "cache_entries": sum(len(cache.cache) for cache in BlockchainCache._instances),
+            "resident_memory_bytes": resident_memory(),
+        }
+
+    def log_report(self):
+        report = self.report()
+        instances = ", ".join(f"{name}={count}" for name, count in report["instances"].items())
+        logger.info(f"Services partagés : {instances} ; {report['cache_entries']} entrées en cache ; "
+                    f"mémoire résidente {report['resident_memory_bytes'] / 1e6:.0f} Mo")
+        duplicated = [name for name, count in report["instances"].items() if count > 1]
+        if duplicated:
+            logger.warning(f"Composants instanciés plusieurs fois (non injectés ?) : {', '.join(duplicated)}")
+
+    def close(self):
+        if "db_manager" in self.__dict__:
+            self.db_manager.engine.dispose()
+        if "block_decoder" in self.__dict__:
+            self.block_decoder.shutdown()
+
+
+def resident_memory() -> int:
+    """Mémoire résidente du processus en octets (/proc, sinon pic via getrusage)."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+_services: Optional[Services] = None
+
+
+def get_services() -> Services:
+    """Conteneur du processus, configuré depuis les settings (DATABASE_URL, SOLANA_RPC_URL, SOLANA_WS_URL)."""
+    global _services
+    if _services is None:
+        _services = Services(settings.DATABASE_URL, settings.SOLANA_RPC_URL, settings.SOLANA_WS_URL)
+    return _services
+
+
+metrics.register_callback("process_resident_memory_bytes", resident_memory, help_text="Mémoire résidente du processus")
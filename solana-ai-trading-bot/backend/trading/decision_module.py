@@ -1,7 +1,10 @@
 
 from loguru import logger
 import asyncio
-from typing import Dict, List, Optional, Any
+from typing import Any, Awaitable, Dict, List, Optional
+from ..config.settings import settings
+from ..blockchain.pool_index import PoolIndex
+from ..blockchain.subscription_manager import SubscriptionManager, get_subscription_manager
 
 
 class DecisionModule:
@@ -69,14 +72,19 @@ class DecisionModule:
             logger.info(f"Rapport simulation exporté pour Gemini : {filename}")
         except Exception as e:
             logger.error(f"Erreur export rapport Gemini : {e}")
-    def __init__(self, order_executor: Any, buy_amount_sol: float, sell_multiplier: float, simulation_mode: bool = False):
+    def __init__(self, order_executor: Any, buy_amount_sol: float, sell_multiplier: float, simulation_mode: bool = False,
+                 subscription_manager: Optional[SubscriptionManager] = None, pool_index: Optional[PoolIndex] = None):
         """
         Initialise le module de décision.
         order_executor : module d'exécution des ordres (buy/sell)
         buy_amount_sol : montant à investir par trade
         sell_multiplier : multiplicateur de take profit
         simulation_mode : True pour la simulation, False pour le réel
+        subscription_manager : abonnements WebSocket (confirmation des ordres)
+        pool_index : index des pools, prix des tokens détenus tiré des réserves de leurs coffres
         """
+        self.subscription_manager = subscription_manager
+        self.pool_index = pool_index
         self.order_executor = order_executor
         self.buy_amount_sol = buy_amount_sol
         self.sell_multiplier = sell_multiplier
@@ -86,6 +94,7 @@ class DecisionModule:
         self.capital: float = 0.0
         self.available_capital: float = 0.0
         self.ia_hooks: List[Any] = [] # Pour brancher des modules IA/optimisation
+        self._tasks = set()  # tâches de fond (suivi des prix, confirmations) gardées jusqu'à leur fin
 
     def set_initial_capital(self, amount: float) -> None:
         """
@@ -116,9 +125,11 @@ class DecisionModule:
         """
         return self.available_capital
 
-    async def process_new_token_candidate(self, token_mint_address: str, current_price: float) -> None:
+    async def process_new_token_candidate(self, token_mint_address: str, current_price: float,
+                                          confirmation: Optional[Awaitable[bool]] = None) -> None:
         """
         Analyse un nouveau token candidat et décide d'acheter ou non.
+        confirmation : si fourni (candidat vu à processed), l'achat n'a lieu que s'il se résout à True
         """
         logger.info(f"Decision module received new token candidate: {token_mint_address} at price {current_price}")
         try:
@@ -126,6 +137,9 @@ class DecisionModule:
             if not will_double:
                 logger.warning(f"Token {token_mint_address} ne devrait pas atteindre x2 dans les 10min, achat annulé.")
                 return
+            if confirmation is not None and not await self._confirmed(confirmation):
+                logger.warning(f"Token {token_mint_address} : transaction de création non confirmée (fork), achat annulé.")
+                return
             if self.simulation_mode:
                 result = {
                     "token": token_mint_address,
@@ -139,14 +153,16 @@ class DecisionModule:
                 return
             if token_mint_address not in self.held_tokens:
                 logger.info(f"Attempting to buy {self.buy_amount_sol} SOL worth of {token_mint_address}")
-                success = await self.order_executor.execute_buy(token_mint_address, self.buy_amount_sol)
-                if success:
+                order = await self.order_executor.execute_buy(token_mint_address, self.buy_amount_sol)
+                if order.get("success"):
                     creator_wallets = await self._detect_creator_wallets(token_mint_address)
                     self.held_tokens[token_mint_address] = {
                         "buy_price": current_price,
                         "buy_amount": self.buy_amount_sol,
                         "creator_wallets": creator_wallets
                     }
+                    await self._watch_held_token(token_mint_address)
+                    self._confirm_order(order, token_mint_address, "buy")
                     logger.success(f"Successfully bought {token_mint_address}. Tracking for sale. Creator wallets: {creator_wallets}")
                     # Hook IA/logs après achat réel
                     self.record_real_trade({
@@ -166,6 +182,13 @@ class DecisionModule:
                 logger.info(f"Already holding {token_mint_address}, skipping buy.")
         except Exception as e:
             logger.error(f"Erreur process_new_token_candidate : {e}")
+    @staticmethod
+    async def _confirmed(confirmation: Awaitable[bool]) -> bool:
+        """Attend la confirmation ; annulée ou en erreur, elle vaut « non confirmée »."""
+        future = asyncio.ensure_future(confirmation)
+        await asyncio.wait({future})
+        return not future.cancelled() and future.exception() is None and bool(future.result())
+
     async def _predict_x2_in_10min(self, token_mint_address: str, current_price: float) -> bool:
         """Prédit si le token peut atteindre x2 dans les 10min en moins de 800ms (ultra-rapide)."""
         import random, time, asyncio
@@ -221,51 +244,51 @@ class DecisionModule:
                 logger.info(f"Simulation mode: sell logged for {token_mint_address}")
                 return
             if token_mint_address in self.held_tokens:
-            buy_price = self.held_tokens[token_mint_address]["buy_price"]
-            profit_multiplier = current_price / buy_price
-            creator_wallets = self.held_tokens[token_mint_address].get("creator_wallets", [])
-            logger.info(f"Evaluating {token_mint_address}: Buy Price={buy_price}, Current Price={current_price}, Multiplier={profit_multiplier:.2f}")
-            # Trailing stop : stop loss dynamique après achat
-            trailing_stop_percent = getattr(self, 'trailing_stop_percent', 0.15) # 15% par défaut
-            if 'max_price' not in self.held_tokens[token_mint_address]:
-                self.held_tokens[token_mint_address]['max_price'] = buy_price
-            # Met à jour le plus haut atteint
-            if current_price > self.held_tokens[token_mint_address]['max_price']:
-                self.held_tokens[token_mint_address]['max_price'] = current_price
-            # Si le prix redescend de plus de trailing_stop_percent depuis le plus haut, vente
-            max_price = self.held_tokens[token_mint_address]['max_price']
-            if current_price < max_price * (1 - trailing_stop_percent):
-                logger.warning(f"[TRAILING STOP] Selling {token_mint_address}: Price dropped >{int(trailing_stop_percent*100)}% from max ({current_price:.4f} < {max_price:.4f}). Vente automatique.")
-                await self._execute_sale(token_mint_address)
-                # Hook IA/logs après vente réelle
-                self.record_real_trade({
-                    "token": token_mint_address,
-                    "price": current_price,
-                    "action": "sell",
-                    "timestamp": asyncio.get_event_loop().time()
-                })
-                for hook in self.ia_hooks:
-                    try:
-                        hook.on_trade("sell", token_mint_address, current_price)
-                    except Exception as e:
-                        logger.warning(f"Erreur hook IA après vente : {e}")
-                return
-            # PRIORITÉ : Take profit automatique à x2
-            if profit_multiplier >= self.sell_multiplier:
-                logger.info(f"[TAKE PROFIT] Selling {token_mint_address}: Price reached x{self.sell_multiplier} (x{profit_multiplier:.2f}). Vente immédiate.")
-                await self._execute_sale(token_mint_address)
-                return
-            # STOP LOSS : vente immédiate si le prix passe sous le prix d'achat
-            if profit_multiplier < 1.0:
-                logger.warning(f"[STOP LOSS] Selling {token_mint_address}: Price dropped below buy price (x{profit_multiplier:.2f} < x1.0). Vente automatique pour éviter toute perte.")
-                await self._execute_sale(token_mint_address)
-                return
-            # Détection avancée des signaux de dump (volume, créateur, liquidité)
-            if whale_selling or await self._creator_wallet_selling(token_mint_address, creator_wallets):
-                logger.warning(f"[DUMP SIGNAL] Selling {token_mint_address}: Dump ou activité suspecte détectée.")
-                await self._execute_sale(token_mint_address)
-                return
-            logger.info(f"No sale conditions met for {token_mint_address}.")
+                buy_price = self.held_tokens[token_mint_address]["buy_price"]
+                profit_multiplier = current_price / buy_price
+                creator_wallets = self.held_tokens[token_mint_address].get("creator_wallets", [])
+                logger.info(f"Evaluating {token_mint_address}: Buy Price={buy_price}, Current Price={current_price}, Multiplier={profit_multiplier:.2f}")
+                # Trailing stop : stop loss dynamique après achat
+                trailing_stop_percent = getattr(self, 'trailing_stop_percent', 0.15) # 15% par défaut
+                if 'max_price' not in self.held_tokens[token_mint_address]:
+                    self.held_tokens[token_mint_address]['max_price'] = buy_price
+                # Met à jour le plus haut atteint
+                if current_price > self.held_tokens[token_mint_address]['max_price']:
+                    self.held_tokens[token_mint_address]['max_price'] = current_price
+                # Si le prix redescend de plus de trailing_stop_percent depuis le plus haut, vente
+                max_price = self.held_tokens[token_mint_address]['max_price']
+                if current_price < max_price * (1 - trailing_stop_percent):
+                    logger.warning(f"[TRAILING STOP] Selling {token_mint_address}: Price dropped >{int(trailing_stop_percent*100)}% from max ({current_price:.4f} < {max_price:.4f}). Vente automatique.")
+                    await self._execute_sale(token_mint_address)
+                    # Hook IA/logs après vente réelle
+                    self.record_real_trade({
+                        "token": token_mint_address,
+                        "price": current_price,
+                        "action": "sell",
+                        "timestamp": asyncio.get_event_loop().time()
+                    })
+                    for hook in self.ia_hooks:
+                        try:
+                            hook.on_trade("sell", token_mint_address, current_price)
+                        except Exception as e:
+                            logger.warning(f"Erreur hook IA après vente : {e}")
+                    return
+                # PRIORITÉ : Take profit automatique à x2
+                if profit_multiplier >= self.sell_multiplier:
+                    logger.info(f"[TAKE PROFIT] Selling {token_mint_address}: Price reached x{self.sell_multiplier} (x{profit_multiplier:.2f}). Vente immédiate.")
+                    await self._execute_sale(token_mint_address)
+                    return
+                # STOP LOSS : vente immédiate si le prix passe sous le prix d'achat
+                if profit_multiplier < 1.0:
+                    logger.warning(f"[STOP LOSS] Selling {token_mint_address}: Price dropped below buy price (x{profit_multiplier:.2f} < x1.0). Vente automatique pour éviter toute perte.")
+                    await self._execute_sale(token_mint_address)
+                    return
+                # Détection avancée des signaux de dump (volume, créateur, liquidité)
+                if whale_selling or await self._creator_wallet_selling(token_mint_address, creator_wallets):
+                    logger.warning(f"[DUMP SIGNAL] Selling {token_mint_address}: Dump ou activité suspecte détectée.")
+                    await self._execute_sale(token_mint_address)
+                    return
+                logger.info(f"No sale conditions met for {token_mint_address}.")
             else:
                 logger.debug(f"Not holding {token_mint_address}, skipping sale evaluation.")
         except Exception as e:
@@ -295,11 +318,127 @@ class DecisionModule:
         try:
             logger.info(f"Attempting to sell all of {token_mint_address}")
             amount = self.held_tokens[token_mint_address]["buy_amount"]
-            success = await self.order_executor.execute_sell(token_mint_address, amount)
-            if success:
+            order = await self.order_executor.execute_sell(token_mint_address, amount)
+            if order.get("success"):
                 logger.success(f"Successfully sold {token_mint_address}.")
+                await self._unwatch_held_token(token_mint_address)
                 del self.held_tokens[token_mint_address]
+                self._confirm_order(order, token_mint_address, "sell")
             else:
                 logger.error(f"Failed to sell {token_mint_address}.")
         except Exception as e:
-            logger.error(f"Erreur _execute_sale : {e}")
\ No newline at end of file
+            logger.error(f"Erreur _execute_sale : {e}")
+
+    def _subscriptions(self) -> SubscriptionManager:
+        if self.subscription_manager is None:
+            self.subscription_manager = get_subscription_manager()
+        return self.subscription_manager
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def _task_done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Erreur d'une tâche de fond du module de décision : {task.exception()}")
+
+    async def _watch_held_token(self, token_mint_address: str) -> None:
+        """
+        Suit le prix du token détenu à partir des réserves de son pool : l'index des pools est
+        abonné aux coffres (accountSubscribe) et chaque mise à jour réévalue la vente. Un polling
+        (HELD_TOKEN_POLL_INTERVAL) prend le relais tant que le token n'a pas de pool coté en SOL
+        ou que ses coffres ne notifient plus.
+        """
+        if self.pool_index is None:
+            logger.warning(f"Pas d'index des pools : prix de {token_mint_address} non suivi.")
+            return
+        position = self.held_tokens[token_mint_address]
+        on_price = lambda price: self._on_held_price(token_mint_address, price)
+        self.pool_index.watch_price(token_mint_address, on_price)
+        position["price_watch"] = on_price
+        position["price_poll"] = self._spawn(self._poll_held_price(token_mint_address))
+
+    async def _unwatch_held_token(self, token_mint_address: str) -> None:
+        position = self.held_tokens.get(token_mint_address, {})
+        on_price = position.pop("price_watch", None)
+        if on_price is not None:
+            self.pool_index.unwatch_price(token_mint_address, on_price)
+        poll = position.pop("price_poll", None)
+        if poll is not None:
+            poll.cancel()
+
+    async def _poll_held_price(self, token_mint_address: str) -> None:
+        interval = settings.HELD_TOKEN_POLL_INTERVAL
+        loop = asyncio.get_event_loop()
+        while token_mint_address in self.held_tokens:
+            await asyncio.sleep(interval)
+            position = self.held_tokens.get(token_mint_address)
+            if position is None:
+                return
+            if loop.time() - position.get("price_at", 0.0) < interval:
+                continue  # les coffres notifient, rien à relire
+            try:
+                # Lecture en mémoire si le mint est indexé ; sinon amorçage ou redécouverte de ses pools
+                price = (await self.pool_index.get_liquidity(token_mint_address)).get("price")
+            except Exception as e:
+                logger.warning(f"Lecture du prix de {token_mint_address} impossible : {e}")
+                continue
+            if price is not None:
+                self._on_held_price(token_mint_address, price)
+
+    def _on_held_price(self, token_mint_address: str, price: float) -> None:
+        position = self.held_tokens.get(token_mint_address)
+        if position is None:
+            return
+        position["price_at"] = asyncio.get_event_loop().time()
+        if position.get("price_source") != "pool":
+            # Le prix d'achat venait de la détection (supply) : le premier prix des réserves devient la référence
+            position["buy_price"] = position["max_price"] = price
+            position["price_source"] = "pool"
+            logger.info(f"Prix de référence de {token_mint_address} tiré des réserves du pool : {price:.10f} SOL.")
+            return
+        position["last_price"] = price
+        if not position.get("evaluating"):
+            # Une seule évaluation à la fois par token : les notifications arrivées entre-temps se résument au dernier prix
+            position["evaluating"] = True
+            self._spawn(self._evaluate_latest_price(token_mint_address))
+
+    async def _evaluate_latest_price(self, token_mint_address: str) -> None:
+        try:
+            while token_mint_address in self.held_tokens:
+                price = self.held_tokens[token_mint_address].pop("last_price", None)
+                if price is None:
+                    break
+                await self.evaluate_held_tokens_for_sale(token_mint_address, price)
+        finally:
+            if token_mint_address in self.held_tokens:
+                self.held_tokens[token_mint_address]["evaluating"] = False
+
+    def _confirm_order(self, order: dict, token_mint_address: str, action: str) -> None:
+        """Suit la confirmation on-chain d'un ordre (signatureSubscribe) sans bloquer la décision."""
+        txid = order.get("txid")
+        if not txid:
+            return  # ordre simulé
+
+        async def confirm() -> None:
+            result = await self._subscriptions().wait_for_signature(txid)
+            if result is None:
+                logger.warning(f"Ordre {action} {token_mint_address} ({txid}) non confirmé dans le délai.")
+            elif (result.get("value") or {}).get("err"):
+                logger.error(f"Ordre {action} {token_mint_address} ({txid}) en échec on-chain : {result['value']['err']}")
+                if action == "buy" and token_mint_address in self.held_tokens:
+                    await self._unwatch_held_token(token_mint_address)
+                    position = self.held_tokens.pop(token_mint_address)
+                    # Position annulée : les hooks qui suivent les tokens détenus (créateurs surveillés) l'oublient
+                    for hook in self.ia_hooks:
+                        try:
+                            hook.on_trade("sell", token_mint_address, position.get("buy_price", 0.0))
+                        except Exception as e:
+                            logger.warning(f"Erreur hook IA après achat en échec : {e}")
+            else:
+                logger.success(f"Ordre {action} {token_mint_address} confirmé ({txid}).")
+
+        self._spawn(confirm())
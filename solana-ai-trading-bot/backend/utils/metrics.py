@@ -0,0 +1,134 @@
+import math
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, Tuple
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# Bornes des buckets en millisecondes (échelle quasi logarithmique)
+DEFAULT_BOUNDS_MS = (0.5, 1, 2, 3, 5, 7.5, 10, 15, 20, 30, 50, 75, 100, 150, 200, 300, 500,
+                     750, 1000, 1500, 2000, 3000, 5000, 10000, math.inf)
+
+
+class LatencyHistogram:
+    """Histogramme à buckets fixes : observation en O(log n), quantiles estimés sans stocker les valeurs."""
+
+    __slots__ = ("bounds", "counts", "count", "total", "max")
+
+    def __init__(self, bounds: Tuple[float, ...] = DEFAULT_BOUNDS_MS):
+        self.bounds = bounds
+        self.counts = [0] * len(bounds)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def quantile(self, q: float) -> float:
+        """Estime le quantile par interpolation linéaire dans le bucket concerné."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.bounds[index - 1] if index else 0.0
+                upper = min(self.bounds[index], self.max)
+                if upper <= lower:
+                    return upper
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.max
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+def _format_labels(labels: Labels, extra: Labels = ()) -> str:
+    pairs = labels + extra
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+
+class MetricsRegistry:
+    """Registre de métriques en mémoire (histogrammes, compteurs, jauges) exporté au format Prometheus."""
+
+    QUANTILES = (0.5, 0.9, 0.99)
+
+    def __init__(self):
+        self._histograms: Dict[str, Dict[Labels, LatencyHistogram]] = {}
+        self._counters: Dict[str, Dict[Labels, float]] = {}
+        self._callbacks: Dict[str, Tuple[str, Callable[[], object]]] = {}
+        self._help: Dict[str, str] = {}
+
+    @staticmethod
+    def labels(**kwargs) -> Labels:
+        return tuple(sorted(kwargs.items()))
+
+    def observe(self, name: str, value: float, labels: Labels = ()):
+        series = self._histograms.setdefault(name, {})
+        histogram = series.get(labels)
+        if histogram is None:
+            histogram = series[labels] = LatencyHistogram()
+        histogram.observe(value)
+
+    def inc(self, name: str, labels: Labels = (), amount: float = 1.0):
+        series = self._counters.setdefault(name, {})
+        series[labels] = series.get(labels, 0.0) + amount
+
+    def register_callback(self, name: str, callback: Callable[[], object], metric_type: str = "gauge",
+                          help_text: str = None):
+        """
+        Enregistre une métrique calculée à l'export. Le callback retourne soit un nombre, soit un
+        dict {labels: valeur}.
+        """
+        self._callbacks[name] = (metric_type, callback)
+        if help_text:
+            self._help[name] = help_text
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def histogram(self, name: str, labels: Labels = ()) -> LatencyHistogram:
+        return self._histograms.get(name, {}).get(labels)
+
+    def _header(self, lines: list, name: str, metric_type: str):
+        if name in self._help:
+            lines.append(f"# HELP {name} {self._help[name]}")
+        lines.append(f"# TYPE {name} {metric_type}")
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for name, series in sorted(self._histograms.items()):
+            self._header(lines, name, "summary")
+            for labels, histogram in list(series.items()):
+                for q in self.QUANTILES:
+                    lines.append(f"{name}{_format_labels(labels, (('quantile', str(q)),))} {histogram.quantile(q):.3f}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total:.3f}")
+                lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+            lines.append(f"# TYPE {name}_max gauge")
+            for labels, histogram in list(series.items()):
+                lines.append(f"{name}_max{_format_labels(labels)} {histogram.max:.3f}")
+        for name, series in sorted(self._counters.items()):
+            self._header(lines, name, "counter")
+            for labels, value in list(series.items()):
+                lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        for name, (metric_type, callback) in sorted(self._callbacks.items()):
+            try:
+                value = callback()
+            except Exception:
+                continue
+            self._header(lines, name, metric_type)
+            items: Iterable = value.items() if isinstance(value, dict) else [((), value)]
+            for labels, item_value in items:
+                lines.append(f"{name}{_format_labels(labels)} {float(item_value):g}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,88 @@
+import json
+import os
+import struct
+import time
+from typing import Iterator, Optional, Tuple, Union
+from loguru import logger
+from ..config.settings import settings
+
+# Format du fichier : suite d'enregistrements [type u8][t f64][longueur u32][contenu], t en secondes
+# depuis le début de l'enregistrement. Ajout seul, jamais réécrit.
+RECORD_HEADER = struct.Struct("<BdI")
+KIND_WS_FRAME = 1   # trame WebSocket reçue, texte UTF-8 tel quel
+KIND_RPC = 2        # requête JSON-RPC canonique, "\n", puis corps brut de la réponse
+
+
+class TrafficRecorder:
+    """
+    Enregistre le trafic reçu (trames WebSocket, paires requête/réponse RPC) pour le rejouer
+    hors ligne avec backend.benchmarks.replay_server. Les réponses RPC sont stockées sans
+    re-sérialisation ; les écritures passent par le tampon du fichier.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "ab", buffering=1 << 20)
+        self._started = time.monotonic()
+        self._last_flush = self._started
+        self.records = 0
+        logger.info(f"Enregistrement du trafic WS/RPC dans {path}.")
+
+    def _write(self, kind: int, payload: bytes):
+        if self._file.closed:
+            return
+        now = time.monotonic()
+        self._file.write(RECORD_HEADER.pack(kind, now - self._started, len(payload)))
+        self._file.write(payload)
+        self.records += 1
+        if now - self._last_flush >= self.flush_interval:
+            self._file.flush()
+            self._last_flush = now
+
+    def record_ws(self, frame: Union[str, bytes]):
+        self._write(KIND_WS_FRAME, frame.encode() if isinstance(frame, str) else frame)
+
+    def record_rpc(self, method: str, params: list, response: bytes, latency_ms: float):
+        request = json.dumps({"method": method, "params": params or [], "latency_ms": round(latency_ms, 3)},
+                             sort_keys=True, separators=(",", ":"))
+        self._write(KIND_RPC, request.encode() + b"\n" + response)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+def read_records(path: str) -> Iterator[Tuple[int, float, bytes]]:
+    """Relit un enregistrement : (type, t, contenu). Un dernier enregistrement tronqué est ignoré."""
+    with open(path, "rb") as f:
+        while True:
+            header = f.read(RECORD_HEADER.size)
+            if len(header) < RECORD_HEADER.size:
+                return
+            kind, timestamp, length = RECORD_HEADER.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            yield kind, timestamp, payload
+
+
+_recorder: Optional[TrafficRecorder] = None
+
+
+def get_traffic_recorder() -> Optional[TrafficRecorder]:
+    """Enregistreur partagé, None si TRAFFIC_RECORD_PATH est vide (cas normal)."""
+    global _recorder
+    if _recorder is None and settings.TRAFFIC_RECORD_PATH:
+        _recorder = TrafficRecorder(settings.TRAFFIC_RECORD_PATH)
+    return _recorder
+
+
+def close_traffic_recorder():
+    global _recorder
+    if _recorder is not None:
+        _recorder.close()
+        _recorder = None
@@ -0,0 +1,44 @@
+import asyncio
+
+from backend.blockchain.block_fetcher import BLOCK_FAILED, BLOCK_OK, BlockFetcher
+
+
+class FailingSlotFetcher(BlockFetcher):
+    """getBlock simulé : un slot échoue toujours, les autres renvoient un bloc vide."""
+
+    def __init__(self, failing_slot: int, **kwargs):
+        super().__init__("http://rpc.invalid", concurrency=4, max_retries=0, **kwargs)
+        self.failing_slot = failing_slot
+
+    async def fetch(self, slot):
+        if slot == self.failing_slot:
+            return BLOCK_FAILED, None
+        return BLOCK_OK, []
+
+
+async def _noop(slot, records):
+    pass
+
+
+def test_failing_slot_is_given_up_after_max_passes():
+    fetcher = FailingSlotFetcher(failing_slot=103, max_slot_passes=3)
+    given_up = []
+
+    async def scan():
+        frontiers = []
+        for _ in range(3):
+            frontiers.append(await fetcher.run(100, 110, _noop, on_give_up=given_up.append))
+        return frontiers
+
+    assert asyncio.run(scan()) == [102, 102, 110]
+    assert given_up == [103]
+    assert fetcher._failed_passes == {}
+
+
+def test_failing_slot_pins_frontier_without_max_passes():
+    fetcher = FailingSlotFetcher(failing_slot=103)
+
+    async def scan():
+        return [await fetcher.run(100, 110, _noop) for _ in range(5)]
+
+    assert asyncio.run(scan()) == [102] * 5